@@ -0,0 +1,330 @@
+# analitica_clientes.py
+# Análisis de clientes: cohortes mensuales de adquisición (por
+# Cliente.fecha_creacion) con su retención y recompra, puntajes RFM
+# (recencia, frecuencia y valor) y valor de vida neto (ventas menos
+# reembolsos) por cliente, fuente de referencia y país. El trabajo pesado se
+# hace en la base con agregados y funciones de ventana (COUNT/SUM OVER,
+# NTILE); pandas solo agrega las columnas derivadas.
+#
+# Todo se calcula con los datos hasta el fin de `fecha_referencia` (por
+# defecto ayer, el último día cerrado) y queda en la caché un día entero: una
+# venta nueva no recalcula nada, entra en el análisis del día siguiente.
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, func, select
+
+import snapshot_analitico
+from cache import cacheado
+from consultas import mes_de_numero, numero_mes, rango_fechas
+from models import Cliente, Devolucion, Venta
+
+UN_DIA = 24 * 3600
+DIMENSIONES = ("fuente_referencia", "pais")
+QUINTILES = 5
+# (segmento, condición sobre los puntajes r y f); gana la primera que se cumple
+SEGMENTOS = [
+    ("Campeones", lambda r, f: (r >= 4) & (f >= 4)),
+    ("Leales", lambda r, f: (r >= 3) & (f >= 3)),
+    ("Nuevos", lambda r, f: (r >= 4) & (f <= 1)),
+    ("Prometedores", lambda r, f: r >= 4),
+    ("En riesgo", lambda r, f: (r <= 2) & (f >= 3)),
+    ("Dormidos", lambda r, f: r <= 1),
+]
+SEGMENTO_POR_DEFECTO = "Necesitan atención"
+
+
+def fecha_referencia_por_defecto():
+    return date.today() - timedelta(days=1)
+
+
+# --- Consultas ---
+def _netos_por_cliente(hasta):
+    # Por cliente con compras hasta `hasta`: última compra, cantidad de
+    # compras, ventas, reembolsos y valor neto
+    ventas = (
+        select(
+            Venta.cliente_id,
+            func.max(Venta.fecha_venta).label("ultima_compra"),
+            func.count().label("compras"),
+            func.sum(Venta.monto).label("ventas"),
+        )
+        .where(*rango_fechas(Venta.fecha_venta, None, hasta))
+        .group_by(Venta.cliente_id)
+        .subquery()
+    )
+    reembolsos = (
+        select(
+            Venta.cliente_id,
+            func.sum(Devolucion.monto_reembolso).label("reembolsos"),
+        )
+        .join(Venta, Venta.id == Devolucion.venta_id)
+        .where(
+            *rango_fechas(Devolucion.fecha_devolucion, None, hasta),
+            *rango_fechas(Venta.fecha_venta, None, hasta),
+        )
+        .group_by(Venta.cliente_id)
+        .subquery()
+    )
+    reembolsado = func.coalesce(reembolsos.c.reembolsos, 0.0)
+    return (
+        select(
+            ventas.c.cliente_id,
+            ventas.c.ultima_compra,
+            ventas.c.compras,
+            ventas.c.ventas,
+            reembolsado.label("reembolsos"),
+            (ventas.c.ventas - reembolsado).label("valor_neto"),
+        )
+        .outerjoin(reembolsos, reembolsos.c.cliente_id == ventas.c.cliente_id)
+        .subquery("netos")
+    )
+
+
+def _clientes_por_cohorte(fecha_desde, fecha_hasta, hasta):
+    # Clientes adquiridos en el rango, con su cohorte (numero_mes de la fecha
+    # de alta) y el tamaño de la cohorte calculado con una ventana
+    cohorte = numero_mes(Cliente.fecha_creacion)
+    return (
+        select(
+            Cliente.id.label("cliente_id"),
+            cohorte.label("cohorte"),
+            func.count().over(partition_by=cohorte).label("tamano"),
+        )
+        .where(
+            *rango_fechas(Cliente.fecha_creacion, fecha_desde, fecha_hasta),
+            *rango_fechas(Cliente.fecha_creacion, None, hasta),
+        )
+        .subquery("clientes_cohorte")
+    )
+
+
+def query_cohortes(fecha_desde, fecha_hasta, hasta):
+    # Clientes de cada cohorte que compraron en cada mes desde su alta
+    clientes = _clientes_por_cohorte(fecha_desde, fecha_hasta, hasta)
+    mes_compra = numero_mes(Venta.fecha_venta)
+    compras = (
+        select(Venta.cliente_id, mes_compra.label("mes_compra"))
+        .where(*rango_fechas(Venta.fecha_venta, None, hasta))
+        .group_by(Venta.cliente_id, mes_compra)
+        .subquery()
+    )
+    mes = (compras.c.mes_compra - clientes.c.cohorte).label("mes")
+    return (
+        select(
+            clientes.c.cohorte,
+            clientes.c.tamano,
+            mes,
+            func.count().label("activos"),
+        )
+        .join_from(clientes, compras, compras.c.cliente_id == clientes.c.cliente_id)
+        .where(compras.c.mes_compra >= clientes.c.cohorte)
+        .group_by(clientes.c.cohorte, clientes.c.tamano, mes)
+        .order_by(clientes.c.cohorte, mes)
+    )
+
+
+def preparar_cohortes(df):
+    df["cohorte"] = mes_de_numero(df["cohorte"])
+    df["retencion"] = df["activos"] / df["tamano"]
+    return df
+
+
+def query_resumen_cohortes(fecha_desde, fecha_hasta, hasta):
+    # Por cohorte: compradores, recompradores (dos compras o más) y valor neto
+    clientes = _clientes_por_cohorte(fecha_desde, fecha_hasta, hasta)
+    netos = _netos_por_cliente(hasta)
+    valor = func.coalesce(func.sum(netos.c.valor_neto), 0.0)
+    return (
+        select(
+            clientes.c.cohorte,
+            clientes.c.tamano.label("clientes"),
+            func.count(netos.c.cliente_id).label("compradores"),
+            func.coalesce(func.sum(case((netos.c.compras >= 2, 1), else_=0)), 0).label(
+                "recompradores"
+            ),
+            valor.label("valor_neto"),
+        )
+        .outerjoin(netos, netos.c.cliente_id == clientes.c.cliente_id)
+        .group_by(clientes.c.cohorte, clientes.c.tamano)
+        .order_by(clientes.c.cohorte)
+    )
+
+
+def preparar_resumen_cohortes(df):
+    df["cohorte"] = mes_de_numero(df["cohorte"])
+    df["tasa_recompra"] = df["recompradores"] / df["compradores"].where(
+        df["compradores"] > 0
+    )
+    df["ltv"] = df["valor_neto"] / df["clientes"]
+    return df
+
+
+def query_rfm(hasta):
+    # Puntajes de 1 a 5 con NTILE sobre recencia, frecuencia y valor. NTILE
+    # reparte los empates entre quintiles distintos; la segunda ventana les da
+    # a todos los valores iguales el puntaje menor, así los que compraron una
+    # sola vez tienen todos la misma frecuencia.
+    netos = _netos_por_cliente(hasta)
+    cuantiles = select(
+        netos,
+        *(
+            func.ntile(QUINTILES)
+            .over(order_by=(columna, netos.c.cliente_id))
+            .label(f"{nombre}_ntile")
+            for nombre, columna in (
+                ("r", netos.c.ultima_compra),
+                ("f", netos.c.compras),
+                ("m", netos.c.valor_neto),
+            )
+        ),
+    ).subquery("cuantiles")
+    return select(
+        cuantiles.c.cliente_id,
+        cuantiles.c.ultima_compra,
+        cuantiles.c.compras,
+        cuantiles.c.ventas,
+        cuantiles.c.reembolsos,
+        cuantiles.c.valor_neto,
+        *(
+            func.min(cuantiles.c[f"{nombre}_ntile"])
+            .over(partition_by=cuantiles.c[columna])
+            .label(nombre)
+            for nombre, columna in (
+                ("r", "ultima_compra"),
+                ("f", "compras"),
+                ("m", "valor_neto"),
+            )
+        ),
+    ).order_by(cuantiles.c.cliente_id)
+
+
+def preparar_rfm(df, hasta):
+    fin = pd.Timestamp(hasta) + pd.Timedelta(days=1)
+    df["ultima_compra"] = pd.to_datetime(df["ultima_compra"])
+    df.insert(2, "recencia_dias", (fin - df["ultima_compra"]).dt.days)
+    puntajes = df[["r", "f", "m"]].astype("int8")
+    df[["r", "f", "m"]] = puntajes
+    # Código de tres cifras (555 = mejor en todo); int16 para que no desborde
+    df["rfm"] = puntajes.astype("int16") @ np.array([100, 10, 1], dtype="int16")
+    df["segmento"] = pd.Categorical(
+        np.select(
+            [condicion(puntajes["r"], puntajes["f"]) for _, condicion in SEGMENTOS],
+            [nombre for nombre, _ in SEGMENTOS],
+            default=SEGMENTO_POR_DEFECTO,
+        ),
+        categories=[nombre for nombre, _ in SEGMENTOS] + [SEGMENTO_POR_DEFECTO],
+    )
+    return df
+
+
+def query_ltv(dimension, hasta):
+    # Valor neto por fuente de referencia o país. El LTV es el valor neto por
+    # cliente adquirido (compren o no); la participación usa SUM() OVER ()
+    grupo = getattr(Cliente, dimension)
+    netos = _netos_por_cliente(hasta)
+    valor = func.coalesce(func.sum(netos.c.valor_neto), 0.0)
+    clientes = func.count(Cliente.id)
+    return (
+        select(
+            grupo.label(dimension),
+            clientes.label("clientes"),
+            func.count(netos.c.cliente_id).label("compradores"),
+            func.coalesce(func.sum(netos.c.ventas), 0.0).label("ventas"),
+            func.coalesce(func.sum(netos.c.reembolsos), 0.0).label("reembolsos"),
+            valor.label("valor_neto"),
+            (valor / clientes).label("ltv"),
+            (valor / func.nullif(func.sum(valor).over(), 0)).label("participacion"),
+        )
+        .outerjoin(netos, netos.c.cliente_id == Cliente.id)
+        .where(*rango_fechas(Cliente.fecha_creacion, None, hasta))
+        .group_by(grupo)
+        .order_by(valor.desc())
+    )
+
+
+# --- Servicios ---
+# backend: "oltp" (la base) o "snapshot" (ver snapshot_analitico.py); por
+# defecto el de REPORTES_BACKEND
+def cohortes(
+    fecha_desde=None, fecha_hasta=None, fecha_referencia=None, backend=None, db=None
+):
+    # Una fila por (cohorte, mes desde el alta) con clientes activos y retención
+    hasta = fecha_referencia or fecha_referencia_por_defecto()
+    backend = backend or snapshot_analitico.BACKEND
+    return snapshot_analitico.error_backend(backend) or _cohortes(
+        fecha_desde, fecha_hasta, hasta, backend, db=db
+    )
+
+
+@cacheado(ttl=UN_DIA)
+def _cohortes(fecha_desde, fecha_hasta, hasta, backend, db=None):
+    query = query_cohortes(fecha_desde, fecha_hasta, hasta)
+    return preparar_cohortes(snapshot_analitico.leer(query, backend, db=db))
+
+
+def resumen_cohortes(
+    fecha_desde=None, fecha_hasta=None, fecha_referencia=None, backend=None, db=None
+):
+    hasta = fecha_referencia or fecha_referencia_por_defecto()
+    backend = backend or snapshot_analitico.BACKEND
+    return snapshot_analitico.error_backend(backend) or _resumen_cohortes(
+        fecha_desde, fecha_hasta, hasta, backend, db=db
+    )
+
+
+@cacheado(ttl=UN_DIA)
+def _resumen_cohortes(fecha_desde, fecha_hasta, hasta, backend, db=None):
+    query = query_resumen_cohortes(fecha_desde, fecha_hasta, hasta)
+    return preparar_resumen_cohortes(snapshot_analitico.leer(query, backend, db=db))
+
+
+def rfm(fecha_referencia=None, backend=None, db=None):
+    # Una fila por cliente con compras: recencia, frecuencia, valor neto (su
+    # LTV), puntajes r/f/m de 1 a 5 y segmento
+    hasta = fecha_referencia or fecha_referencia_por_defecto()
+    backend = backend or snapshot_analitico.BACKEND
+    return snapshot_analitico.error_backend(backend) or _rfm(hasta, backend, db=db)
+
+
+@cacheado(ttl=UN_DIA)
+def _rfm(hasta, backend, db=None):
+    return preparar_rfm(
+        snapshot_analitico.leer(query_rfm(hasta), backend, db=db), hasta
+    )
+
+
+def ltv_por(dimension, fecha_referencia=None, backend=None, db=None):
+    if dimension not in DIMENSIONES:
+        return {"error": f"Dimensión no soportada: {dimension}"}
+    hasta = fecha_referencia or fecha_referencia_por_defecto()
+    backend = backend or snapshot_analitico.BACKEND
+    return snapshot_analitico.error_backend(backend) or _ltv_por(
+        dimension, hasta, backend, db=db
+    )
+
+
+@cacheado(ttl=UN_DIA)
+def _ltv_por(dimension, hasta, backend, db=None):
+    return snapshot_analitico.leer(query_ltv(dimension, hasta), backend, db=db)
+
+
+# --- Tablas para mostrar ---
+def matriz_retencion(df_cohortes):
+    # Cohortes en filas y meses desde el alta en columnas
+    return df_cohortes.pivot(index="cohorte", columns="mes", values="retencion")
+
+
+def resumen_rfm(df_rfm):
+    # Clientes, valor y puntajes promedio por segmento
+    return (
+        df_rfm.groupby("segmento", observed=True)
+        .agg(
+            clientes=("cliente_id", "size"),
+            valor_neto=("valor_neto", "sum"),
+            recencia_dias=("recencia_dias", "mean"),
+            compras=("compras", "mean"),
+        )
+        .reset_index()
+    )
@@ -0,0 +1,567 @@
+# backfill.py
+# Carga masiva de ventas, devoluciones y comisiones históricas (la migración
+# desde la plataforma anterior) con sus fechas originales. Lee el CSV o
+# Parquet por bloques, sin tener el archivo entero en memoria; valida cada
+# bloque de forma vectorizada y las claves foráneas con una consulta por
+# tabla, e inserta las filas válidas con COPY en PostgreSQL (psycopg2) o con
+# executemany por lotes en los demás motores. Las rechazadas van, con su
+# número de fila y el motivo, a <archivo>.rechazos.csv.
+#
+# El avance se guarda en cargas_historicas en la misma transacción que cada
+# bloque, así que una carga interrumpida se reanuda (volviendo a ejecutar el
+# mismo comando) desde el último bloque confirmado. Con --diferir-indices los
+# índices secundarios de la tabla se borran antes de cargar y se crean al
+# final. ventas_diarias no se actualiza fila a fila: al terminar se
+# recalcula el rango de fechas cargado (ver resumen_ventas.reconstruir).
+#
+# Si el archivo trae una columna id, se conservan los ids de origen (las
+# devoluciones y comisiones los referencian) y en PostgreSQL se adelanta la
+# secuencia.
+#
+#   python -m backfill ventas ventas.parquet --diferir-indices
+#   python -m backfill devoluciones devoluciones.csv --bloque 100000
+#   python -m backfill estado
+import argparse
+import csv
+import io
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import Integer, insert, select, text
+
+import cache
+import resumen_ventas
+from consultas import LIMITE_PARAMETROS, leer_dataframe, valores_existentes
+from db import obtener_sesion
+from models import CargaHistorica, Cliente, Comision, Curso, Devolucion, Venta
+
+TAMANO_BLOQUE = int(os.environ.get("BACKFILL_BLOQUE", 50_000))
+# Filas por executemany (SQLite y otros motores)
+LOTE_EXECUTEMANY = 10_000
+# Las columnas Integer son de 32 bits en PostgreSQL
+_MAX_ENTERO = 2**31 - 1
+# Fechas como texto: el de COPY y el que guarda SQLAlchemy en SQLite
+_FORMATO_FECHA = "%Y-%m-%d %H:%M:%S.%f"
+
+# tabla -> (modelo, columnas obligatorias, columnas de texto)
+ENTIDADES = {
+    "ventas": (Venta, ["cliente_id", "curso_id", "monto", "fecha_venta"], []),
+    "devoluciones": (
+        Devolucion,
+        ["venta_id", "monto_reembolso", "fecha_devolucion"],
+        ["motivo"],
+    ),
+    "comisiones": (Comision, ["venta_id", "closer", "porcentaje"], ["closer"]),
+}
+
+
+# --- Lectura por bloques ---
+def _bloques(ruta, tamano, desde=0, textos=()):
+    # DataFrames de hasta `tamano` filas a partir de la fila `desde` (0 es la
+    # primera después del encabezado); el índice es la posición en el archivo
+    if ruta.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        # Los row groups anteriores a `desde` no se leen
+        posicion, grupos = 0, []
+        for i in range(archivo.num_row_groups):
+            filas = archivo.metadata.row_group(i).num_rows
+            if posicion + filas > desde or grupos:
+                grupos.append(i)
+            else:
+                posicion += filas
+        lotes = (
+            lote.to_pandas()
+            for lote in archivo.iter_batches(batch_size=tamano, row_groups=grupos)
+        )
+    else:
+        posicion = 0
+        lotes = pd.read_csv(ruta, chunksize=tamano, dtype={c: "string" for c in textos})
+    for df in lotes:
+        df.index = pd.RangeIndex(posicion, posicion + len(df.index))
+        posicion += len(df.index)
+        if posicion > desde:
+            yield df.loc[desde:] if df.index[0] < desde else df
+
+
+def _encabezado(ruta):
+    # (columnas, filas si se conocen sin leer el archivo)
+    if ruta.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        return archivo.schema_arrow.names, archivo.metadata.num_rows
+    return list(pd.read_csv(ruta, nrows=0).columns), None
+
+
+# --- Validación ---
+def _rechazar(error, mascara, mensaje):
+    # Anota el motivo en las filas de `mascara` que no tenían otro
+    error.loc[mascara & error.isna()] = mensaje
+
+
+def _entero(serie, error, columna):
+    valores = pd.to_numeric(serie, errors="coerce")
+    _rechazar(
+        error,
+        valores.isna() | (valores % 1 != 0) | (valores.abs() > _MAX_ENTERO),
+        f"{columna} debe ser un entero",
+    )
+    return valores
+
+
+def _numero(serie, error, columna, positivo=False):
+    valores = pd.to_numeric(serie, errors="coerce")
+    _rechazar(error, valores.isna(), f"Valor inválido en {columna}")
+    if positivo:
+        _rechazar(error, valores <= 0, f"{columna} debe ser mayor que cero")
+    return valores
+
+
+def _fecha(serie, error, columna):
+    # ISO 8601 (con o sin hora) en bloque; el resto de los formatos, por fila
+    fechas = pd.to_datetime(serie, errors="coerce", format="ISO8601")
+    otras = fechas.isna() & serie.notna()
+    if otras.any():
+        fechas[otras] = pd.to_datetime(serie[otras], errors="coerce", format="mixed")
+    if fechas.dt.tz is not None:
+        fechas = fechas.dt.tz_localize(None)
+    _rechazar(error, serie.isna(), f"Falta {columna}")
+    _rechazar(error, fechas.isna(), f"Fecha inválida en {columna}")
+    return fechas
+
+
+def _referencias(db, columna, valores, error, mensaje):
+    # Un solo chequeo de existencia por bloque
+    existentes = valores_existentes(
+        db, columna, valores[error.isna()].astype("int64").unique().tolist()
+    )
+    _rechazar(error, ~valores.isin(list(existentes)), mensaje)
+
+
+def _ventas_referidas(db, venta_id, error):
+    # Monto y fecha de la venta de cada fila (NaN si no existe)
+    _entero(venta_id, error, "venta_id")
+    ids = venta_id[error.isna()].astype("int64").unique().tolist()
+    paso = LIMITE_PARAMETROS
+    if db.get_bind().dialect.name == "postgresql":
+        paso = max(len(ids), 1)
+    ventas = pd.concat(
+        [
+            leer_dataframe(
+                db,
+                select(Venta.id, Venta.monto, Venta.fecha_venta).where(
+                    Venta.id.in_(ids[i : i + paso])
+                ),
+                {"id": "int64", "monto": "float64", "fecha_venta": "datetime64[us]"},
+            )
+            for i in range(0, max(len(ids), 1), paso)
+        ]
+    ).set_index("id")
+    _rechazar(error, ~venta_id.isin(ventas.index), "Venta no encontrada")
+    claves = pd.to_numeric(venta_id, errors="coerce").where(error.isna(), 0)
+    referidas = ventas.reindex(claves.astype("int64").to_numpy())
+    referidas.index = venta_id.index
+    return referidas
+
+
+def _ids_de_origen(db, modelo, df, error):
+    # Columna id del archivo: entera, sin repetir y libre en la tabla
+    ids = _entero(df["id"], error, "id")
+    _rechazar(error, ids.duplicated(), "id repetido en el archivo")
+    _rechazar(
+        error,
+        ids.isin(
+            list(
+                valores_existentes(
+                    db, modelo.id, ids[error.isna()].astype("int64").tolist()
+                )
+            )
+        ),
+        "Ya existe una fila con ese id",
+    )
+    return ids
+
+
+def _validar_ventas(db, df, error):
+    datos = pd.DataFrame(
+        {
+            "cliente_id": _entero(df["cliente_id"], error, "cliente_id"),
+            "curso_id": _entero(df["curso_id"], error, "curso_id"),
+            "monto": _numero(df["monto"], error, "monto", positivo=True),
+            "fecha_venta": _fecha(df["fecha_venta"], error, "fecha_venta"),
+        }
+    )
+    _referencias(db, Curso.id, datos["curso_id"], error, "Curso no encontrado")
+    _referencias(db, Cliente.id, datos["cliente_id"], error, "Cliente no encontrado")
+    return datos, datos["fecha_venta"]
+
+
+def _validar_devoluciones(db, df, error):
+    motivo = df["motivo"] if "motivo" in df.columns else pd.Series("", df.index)
+    datos = pd.DataFrame(
+        {
+            "venta_id": pd.to_numeric(df["venta_id"], errors="coerce"),
+            "monto_reembolso": _numero(
+                df["monto_reembolso"], error, "monto_reembolso", positivo=True
+            ),
+            "fecha_devolucion": _fecha(
+                df["fecha_devolucion"], error, "fecha_devolucion"
+            ),
+            "motivo": motivo.fillna("").astype(str),
+        }
+    )
+    ventas = _ventas_referidas(db, df["venta_id"], error)
+    _rechazar(
+        error,
+        datos["monto_reembolso"] > ventas["monto"],
+        "El monto de reembolso no puede exceder el monto de la venta",
+    )
+    return datos, datos["fecha_devolucion"]
+
+
+def _validar_comisiones(db, df, error):
+    closer = df["closer"].astype("string").str.strip()
+    _rechazar(error, closer.isna() | (closer == ""), "Falta closer")
+    _rechazar(
+        error,
+        closer.str.len() > Comision.closer.type.length,
+        f"closer supera los {Comision.closer.type.length} caracteres",
+    )
+    ajuste = pd.Series(0.0, index=df.index)
+    if "ajuste_manual" in df.columns:
+        ajuste = _numero(df["ajuste_manual"].fillna(0), error, "ajuste_manual")
+    datos = pd.DataFrame(
+        {
+            "venta_id": pd.to_numeric(df["venta_id"], errors="coerce"),
+            "closer": closer,
+            "porcentaje": _numero(df["porcentaje"], error, "porcentaje"),
+            "ajuste_manual": ajuste,
+            "ajuste_reembolso": 0.0,
+        }
+    )
+    ventas = _ventas_referidas(db, df["venta_id"], error)
+    # Sin monto_comision se calcula como crear_comision
+    calculado = ventas["monto"] * datos["porcentaje"] / 100 + datos["ajuste_manual"]
+    if "monto_comision" in df.columns:
+        monto = pd.to_numeric(df["monto_comision"], errors="coerce")
+        _rechazar(
+            error,
+            df["monto_comision"].notna() & monto.isna(),
+            "Valor inválido en monto_comision",
+        )
+        calculado = monto.fillna(calculado)
+    datos["monto_comision"] = calculado
+    # En el resumen diario la comisión cuenta en el día de su venta
+    return datos, ventas["fecha_venta"]
+
+
+_VALIDADORES = {
+    "ventas": _validar_ventas,
+    "devoluciones": _validar_devoluciones,
+    "comisiones": _validar_comisiones,
+}
+
+
+def _validar(db, tabla, df):
+    # (filas válidas con los tipos de la tabla, DataFrame de rechazos, fechas
+    # de las filas válidas para el resumen diario)
+    modelo = ENTIDADES[tabla][0]
+    error = pd.Series(None, index=df.index, dtype=object)
+    ids = _ids_de_origen(db, modelo, df, error) if "id" in df.columns else None
+    datos, fechas = _VALIDADORES[tabla](db, df, error)
+    if ids is not None:
+        datos.insert(0, "id", ids)
+    validas = error.isna()
+    datos = datos.loc[validas]
+    for columna in datos.columns:
+        if isinstance(modelo.__table__.c[columna].type, Integer):
+            datos[columna] = datos[columna].astype("int64")
+    rechazos = pd.DataFrame({"fila": df.index[~validas] + 1, "error": error[~validas]})
+    return datos, rechazos, fechas[validas]
+
+
+# --- Inserción ---
+def _copiar(db, modelo, datos, textos):
+    # COPY FROM STDIN de psycopg2, dentro de la transacción de la sesión. En
+    # CSV el campo vacío es NULL: FORCE_NOT_NULL lo deja como "" en los textos.
+    buffer = io.StringIO()
+    datos.to_csv(buffer, index=False, header=False, date_format=_FORMATO_FECHA)
+    buffer.seek(0)
+    opciones = "FORMAT csv"
+    if textos:
+        opciones += f", FORCE_NOT_NULL ({', '.join(textos)})"
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {modelo.__tablename__} ({', '.join(datos.columns)}) "
+            f"FROM STDIN WITH ({opciones})",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _insertar(db, modelo, datos, textos):
+    if datos.empty:
+        return
+    if db.get_bind().dialect.driver == "psycopg2":
+        _copiar(db, modelo, datos, textos)
+        if "id" in datos.columns:
+            # Las altas de la app siguen después del mayor id de origen
+            tabla = modelo.__tablename__
+            db.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+                    f"(SELECT max(id) FROM {tabla}))"
+                )
+            )
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        # Directo al driver, sin el procesamiento por fila de SQLAlchemy
+        sql = (
+            f"INSERT INTO {modelo.__tablename__} ({', '.join(datos.columns)}) "
+            f"VALUES ({', '.join('?' * len(datos.columns))})"
+        )
+        fechas = datos.select_dtypes("datetime").columns
+        filas = list(
+            map(
+                tuple,
+                datos.assign(
+                    **{c: datos[c].dt.strftime(_FORMATO_FECHA) for c in fechas}
+                ).to_numpy(dtype=object),
+            )
+        )
+        for i in range(0, len(filas), LOTE_EXECUTEMANY):
+            db.connection().exec_driver_sql(sql, filas[i : i + LOTE_EXECUTEMANY])
+        return
+    for i in range(0, len(datos.index), LOTE_EXECUTEMANY):
+        db.connection().execute(
+            insert(modelo.__table__),
+            datos.iloc[i : i + LOTE_EXECUTEMANY].to_dict("records"),
+        )
+
+
+def _indices_secundarios(modelo):
+    return [indice for indice in modelo.__table__.indexes if not indice.unique]
+
+
+def _crear_indices(db, modelo, nombres):
+    for indice in _indices_secundarios(modelo):
+        if indice.name in nombres:
+            indice.create(db.connection(), checkfirst=True)
+
+
+def _anotar_rechazos(ruta, rechazos):
+    if rechazos.empty:
+        return
+    nuevo = not os.path.exists(ruta)
+    with open(ruta, "a", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        if nuevo:
+            escritor.writerow(["fila", "error"])
+        escritor.writerows(rechazos.itertuples(index=False))
+
+
+# --- Carga ---
+def ruta_rechazos(ruta):
+    return os.path.splitext(ruta)[0] + ".rechazos.csv"
+
+
+def _clave(tabla, ruta):
+    # Identifica la carga: el mismo archivo se reanuda, otro empieza de cero
+    return f"{tabla}:{os.path.abspath(ruta)}:{os.path.getsize(ruta)}"
+
+
+def cargar(
+    tabla,
+    ruta,
+    tamano_bloque=TAMANO_BLOQUE,
+    diferir_indices=False,
+    reiniciar=False,
+    progreso=None,
+    db=None,
+):
+    # Carga (o reanuda) el archivo en la tabla. progreso(filas, total, mensaje),
+    # si se pasa, se llama después de cada bloque. Devuelve los contadores de
+    # la carga completa y las filas por segundo de esta ejecución.
+    if tabla not in ENTIDADES:
+        return {"error": f"Tabla no admitida: {tabla}"}
+    if not os.path.isfile(ruta):
+        return {"error": f"No existe el archivo {ruta}"}
+    modelo, obligatorias, textos = ENTIDADES[tabla]
+    columnas, total = _encabezado(ruta)
+    faltantes = [c for c in obligatorias if c not in columnas]
+    if faltantes:
+        return {"error": f"Faltan columnas en el archivo: {', '.join(faltantes)}"}
+    textos = [c for c in textos if c in columnas]
+    inicio = time.perf_counter()
+    with obtener_sesion(db) as db:
+        CargaHistorica.__table__.create(db.connection(), checkfirst=True)
+        clave = _clave(tabla, ruta)
+        carga = db.get(CargaHistorica, clave)
+        if carga is not None and carga.terminada and not reiniciar:
+            return {
+                "error": f"El archivo ya se cargó el {carga.terminada:%Y-%m-%d %H:%M}; "
+                "usar --reiniciar para cargarlo de nuevo"
+            }
+        # Índices que una carga anterior borró y todavía no volvió a crear
+        pendientes = carga.indices_diferidos if carga is not None else None
+        if carga is not None and reiniciar:
+            db.delete(carga)
+            db.flush()
+            carga = None
+        if carga is None:
+            if os.path.exists(ruta_rechazos(ruta)):
+                os.remove(ruta_rechazos(ruta))
+            carga = CargaHistorica(
+                clave=clave,
+                tabla=tabla,
+                archivo=os.path.abspath(ruta),
+                filas_leidas=0,
+                insertadas=0,
+                rechazadas=0,
+                indices_diferidos=pendientes,
+                actualizada=datetime.now(),
+            )
+            db.add(carga)
+        desde = carga.filas_leidas
+        if diferir_indices and not carga.indices_diferidos:
+            indices = _indices_secundarios(modelo)
+            for indice in indices:
+                indice.drop(db.connection(), checkfirst=True)
+            carga.indices_diferidos = ",".join(i.name for i in indices)
+        db.commit()
+
+        leidas = 0
+        for df in _bloques(ruta, tamano_bloque, desde, textos):
+            try:
+                datos, rechazos, fechas = _validar(db, tabla, df)
+                _insertar(db, modelo, datos, textos)
+                carga.filas_leidas = int(df.index[-1]) + 1
+                carga.insertadas += len(datos.index)
+                carga.rechazadas += len(rechazos.index)
+                if not fechas.empty:
+                    minima, maxima = fechas.min().date(), fechas.max().date()
+                    carga.fecha_desde = min(carga.fecha_desde or minima, minima)
+                    carga.fecha_hasta = max(carga.fecha_hasta or maxima, maxima)
+                carga.actualizada = datetime.now()
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                return {
+                    "error": f"Filas {df.index[0] + 1} a {df.index[-1] + 1}: {e}. "
+                    "Las anteriores quedaron cargadas y la carga se puede reanudar"
+                }
+            _anotar_rechazos(ruta_rechazos(ruta), rechazos)
+            leidas += len(df.index)
+            if progreso is not None:
+                segundos = time.perf_counter() - inicio
+                progreso(
+                    carga.filas_leidas,
+                    total,
+                    f"{carga.filas_leidas} filas leídas, {carga.insertadas} "
+                    f"insertadas, {carga.rechazadas} rechazadas "
+                    f"({leidas / segundos:,.0f} filas/s)",
+                )
+        carga_s = time.perf_counter() - inicio
+
+        if carga.indices_diferidos:
+            if progreso is not None:
+                progreso(carga.filas_leidas, total, "Creando índices")
+            _crear_indices(db, modelo, carga.indices_diferidos.split(","))
+            carga.indices_diferidos = None
+            db.commit()
+        if carga.fecha_desde:
+            if progreso is not None:
+                progreso(carga.filas_leidas, total, "Recalculando ventas_diarias")
+            resultado = resumen_ventas.reconstruir(
+                carga.fecha_desde, carga.fecha_hasta, db=db
+            )
+            if "error" in resultado:
+                db.rollback()
+                return resultado
+        carga.terminada = carga.actualizada = datetime.now()
+        db.commit()
+        # Los ids de origen pueden quedar debajo de las marcas de agua de los
+        # snapshots en memoria: se recargan completos
+        cache.invalidar(tabla)
+        segundos = time.perf_counter() - inicio
+        return {
+            "filas": carga.filas_leidas,
+            "insertadas": carga.insertadas,
+            "rechazadas": carga.rechazadas,
+            "rechazos": ruta_rechazos(ruta) if carga.rechazadas else None,
+            "estadisticas": {
+                "filas": leidas,
+                "segundos": segundos,
+                "segundos_carga": carga_s,
+                "filas_por_segundo": leidas / carga_s if carga_s else 0.0,
+            },
+        }
+
+
+def estado(db=None):
+    # Cargas registradas, de la más reciente a la más vieja
+    with obtener_sesion(db) as db:
+        CargaHistorica.__table__.create(db.connection(), checkfirst=True)
+        db.commit()
+        return leer_dataframe(
+            db,
+            select(
+                CargaHistorica.tabla,
+                CargaHistorica.archivo,
+                CargaHistorica.filas_leidas,
+                CargaHistorica.insertadas,
+                CargaHistorica.rechazadas,
+                CargaHistorica.indices_diferidos,
+                CargaHistorica.actualizada,
+                CargaHistorica.terminada,
+            ).order_by(CargaHistorica.actualizada.desc()),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Carga masiva de ventas, devoluciones y comisiones históricas"
+    )
+    parser.add_argument("comando", choices=list(ENTIDADES) + ["estado"])
+    parser.add_argument("archivo", nargs="?", help="CSV o Parquet a cargar")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE)
+    parser.add_argument(
+        "--diferir-indices",
+        action="store_true",
+        help="Borrar los índices secundarios durante la carga y crearlos al final",
+    )
+    parser.add_argument(
+        "--reiniciar",
+        action="store_true",
+        help="Empezar de nuevo aunque haya una carga previa del archivo",
+    )
+    args = parser.parse_args()
+    if args.comando == "estado":
+        print(estado().to_string(index=False))
+    elif not args.archivo:
+        parser.error("falta el archivo a cargar")
+    else:
+        resultado = cargar(
+            args.comando,
+            args.archivo,
+            args.bloque,
+            diferir_indices=args.diferir_indices,
+            reiniciar=args.reiniciar,
+            progreso=lambda _, __, mensaje: print(mensaje, flush=True),
+        )
+        if "error" in resultado:
+            raise SystemExit(resultado["error"])
+        estadisticas = resultado["estadisticas"]
+        print(
+            f"{resultado['insertadas']} filas insertadas y {resultado['rechazadas']} "
+            f"rechazadas en {estadisticas['segundos']:.1f} s "
+            f"({estadisticas['filas_por_segundo']:,.0f} filas/s)"
+        )
+        if resultado["rechazos"]:
+            print(f"Detalle de las rechazadas: {resultado['rechazos']}")
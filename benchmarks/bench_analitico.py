@@ -0,0 +1,133 @@
+# benchmarks/bench_analitico.py
+# Compara los reportes del dashboard contra la base (backend "oltp") y contra
+# el snapshot en Parquet consultado con DuckDB (backend "snapshot", ver
+# snapshot_analitico.py): las mismas consultas, con una sesión explícita para
+# no usar la caché. Mide también la creación del snapshot, una actualización
+# incremental y el tamaño en disco.
+#
+#   python -m benchmarks.bench_analitico --escala mediana
+#   python -m benchmarks.bench_analitico --url postgresql://... --escala grande
+import argparse
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+import analitica_clientes
+import db
+import services
+import snapshot_analitico
+from benchmarks.comun import cronometrar, preparar_base
+from benchmarks.datos_sinteticos import ESCALAS, generar, rango_de_fechas
+
+
+def casos(mes, hasta):
+    # (nombre, función(backend, sesión))
+    fin_mes = (mes + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return [
+        (
+            "reporte agrupado (mes)",
+            lambda b, s: services.obtener_reporte_ventas_agrupado(backend=b, db=s),
+        ),
+        (
+            "reporte agrupado (semana, curso)",
+            lambda b, s: services.obtener_reporte_ventas_agrupado(
+                "semana", agrupar_por="curso", backend=b, db=s
+            ),
+        ),
+        (
+            "reporte agrupado (día, país, un mes)",
+            lambda b, s: services.obtener_reporte_ventas_agrupado(
+                "dia", "pais", mes, fin_mes, backend=b, db=s
+            ),
+        ),
+        (
+            "cohortes",
+            lambda b, s: analitica_clientes.cohortes(
+                fecha_referencia=hasta, backend=b, db=s
+            ),
+        ),
+        (
+            "resumen_cohortes",
+            lambda b, s: analitica_clientes.resumen_cohortes(
+                fecha_referencia=hasta, backend=b, db=s
+            ),
+        ),
+        ("rfm", lambda b, s: analitica_clientes.rfm(hasta, backend=b, db=s)),
+        (
+            "ltv por país",
+            lambda b, s: analitica_clientes.ltv_por("pais", hasta, backend=b, db=s),
+        ),
+    ]
+
+
+def medir(repeticiones):
+    primera, ultima = rango_de_fechas()
+    mes = date(primera.year, primera.month, 1)
+    resultados = {}
+    for nombre, fn in casos(mes, ultima.date()):
+        fila = {}
+        for backend in snapshot_analitico.BACKENDS:
+            with db.SessionLocal() as sesion:
+                fn(backend, sesion)  # calentamiento
+                fila[backend] = cronometrar(lambda: fn(backend, sesion), repeticiones)
+                fila[f"filas_{backend}"] = len(fn(backend, sesion).index)
+        if fila["filas_oltp"] != fila["filas_snapshot"]:
+            raise RuntimeError(f"{nombre}: los backends devuelven distintas filas")
+        resultados[nombre] = fila
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes: base contra snapshot")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--escala", choices=ESCALAS, default="mediana")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--altas", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    generar(engine, ESCALAS[args.escala], progreso=lambda _: None)
+    snapshot_analitico.DIRECTORIO = tempfile.mkdtemp(prefix="bench_analitico_")
+    try:
+        inicio = time.perf_counter()
+        creacion = snapshot_analitico.actualizar()
+        print(
+            f"Snapshot creado en {time.perf_counter() - inicio:.2f} s "
+            f"({creacion['filas_nuevas']} filas)"
+        )
+        services.crear_ventas_bulk(
+            pd.DataFrame({"cliente_id": 1, "curso_id": 1, "monto": [10.0] * args.altas})
+        )
+        inicio = time.perf_counter()
+        snapshot_analitico.actualizar()
+        print(
+            f"Actualización incremental (+{args.altas} ventas): "
+            f"{(time.perf_counter() - inicio) * 1000:.0f} ms"
+        )
+        inicio = time.perf_counter()
+        snapshot_analitico.actualizar(verificar=True)
+        print(
+            f"Verificación de todos los meses: "
+            f"{(time.perf_counter() - inicio) * 1000:.0f} ms"
+        )
+        print(snapshot_analitico.describir().to_string(index=False))
+
+        resultados = medir(args.repeticiones)
+        print(f"\nMediana de {args.repeticiones} llamadas ({engine.dialect.name})")
+        print(f"{'reporte':<38} {'oltp':>10} {'snapshot':>10} {'factor':>8}")
+        for nombre, fila in resultados.items():
+            oltp = fila["oltp"]["mediana_ms"]
+            snapshot = fila["snapshot"]["mediana_ms"]
+            print(
+                f"{nombre:<38} {oltp:>8.1f}ms {snapshot:>8.1f}ms "
+                f"{oltp / snapshot:>7.1f}x"
+            )
+    finally:
+        shutil.rmtree(snapshot_analitico.DIRECTORIO, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_arranque.py
+# Arranque en frío: tiempo de importación de app.py (menú y primera página) y
+# de cada página de paginas/, cada uno en un proceso nuevo con
+# python -X importtime. Informa qué dependencias pesadas carga cada uno (el
+# acumulado de un paquete lo paga el primer módulo que lo importa) y guarda el
+# resultado en JSON para seguirlo entre commits.
+#
+#   python -m benchmarks.bench_arranque
+#   python -m benchmarks.bench_arranque --json arranque.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import paginas
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dependencias pesadas cuya carga se informa: la idea es que cada página
+# cargue solo las que usa
+PAQUETES = [
+    "streamlit",
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "sqlalchemy",
+    "psycopg2",
+    "plotly",
+    "plotly.express",
+    "sqlalchemy.ext.asyncio",
+    "aiosqlite",
+    "asyncpg",
+    "xlsxwriter",
+    "openpyxl",
+]
+
+
+def medir(codigo, entorno):
+    # {módulo: (propio, acumulado)} en ms de `python -X importtime -c codigo`
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True,
+        text=True,
+        env=entorno,
+        cwd=RAIZ,
+    )
+    if proceso.returncode:
+        raise RuntimeError(proceso.stderr[-2000:])
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        partes = linea.removeprefix("import time:").split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue
+        propio, acumulado, nombre = partes
+        modulos[nombre.strip()] = (int(propio) / 1000, int(acumulado) / 1000)
+    return modulos
+
+
+def casos():
+    # (nombre, código, módulo cuyo acumulado es el total)
+    yield "app.py (menú + Cursos)", "import app", "app"
+    for opcion, modulo in paginas.PAGINAS.items():
+        yield f"página {opcion}", f"import paginas.{modulo}", f"paginas.{modulo}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--json", help="Guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    # app.py muestra la primera página al importarse: base SQLite vacía
+    entorno = dict(
+        os.environ,
+        DATABASE_URL="sqlite:///" + os.path.join(tempfile.gettempdir(), "arranque.db"),
+        ADMIN_PASSWORD=os.environ.get("ADMIN_PASSWORD", "benchmark"),
+    )
+    resultado = {}
+    for nombre, codigo, raiz in casos():
+        # Mejor de varias corridas: la primera paga el disco frío
+        corridas = [medir(codigo, entorno) for _ in range(args.repeticiones)]
+        modulos = min(corridas, key=lambda m: m[raiz][1])
+        cargados = {p: modulos[p][1] for p in PAQUETES if p in modulos}
+        resultado[nombre] = {
+            "total_ms": modulos[raiz][1],
+            "modulos": len(modulos),
+            "paquetes_ms": cargados,
+        }
+        print(f"{nombre:<24} {modulos[raiz][1]:>8.0f} ms  ({len(modulos)} módulos)")
+        print("    " + ", ".join(f"{p} {ms:.0f}" for p, ms in cargados.items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
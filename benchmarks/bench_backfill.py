@@ -0,0 +1,109 @@
+# benchmarks/bench_backfill.py
+# Filas por segundo de backfill.py contra crear_ventas_bulk (la carga por
+# lotes de la app) sobre datos sintéticos: genera la base, exporta ventas,
+# devoluciones y comisiones a CSV y Parquet con sus ids, vacía esas tablas y
+# las vuelve a cargar. Los tiempos totales incluyen la creación de índices
+# diferidos y el recálculo de ventas_diarias.
+#
+#   python -m benchmarks.bench_backfill --escala mediana
+#   python -m benchmarks.bench_backfill --url postgresql://... --escala grande
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import delete, select
+
+import backfill
+import db
+import services
+from benchmarks.comun import preparar_base
+from benchmarks.datos_sinteticos import ESCALAS, generar
+from consultas import leer_dataframe
+from models import CargaHistorica, Comision, Devolucion, Venta, VentaDiaria
+
+
+def exportar(directorio):
+    # tabla -> DataFrame con todas sus columnas, escrito también a CSV y Parquet
+    tablas = {}
+    with db.SessionLocal() as sesion:
+        for modelo in (Venta, Devolucion, Comision):
+            df = leer_dataframe(sesion, select(*modelo.__table__.c).order_by(modelo.id))
+            nombre = modelo.__tablename__
+            df.to_csv(os.path.join(directorio, f"{nombre}.csv"), index=False)
+            df.to_parquet(
+                os.path.join(directorio, f"{nombre}.parquet"),
+                index=False,
+                row_group_size=backfill.TAMANO_BLOQUE,
+            )
+            tablas[nombre] = df
+    return tablas
+
+
+def vaciar():
+    with db.SessionLocal() as sesion:
+        for modelo in (Comision, Devolucion, Venta, VentaDiaria, CargaHistorica):
+            sesion.execute(delete(modelo))
+        sesion.commit()
+
+
+def medir_backfill(tabla, ruta, bloque, diferir_indices=False):
+    inicio = time.perf_counter()
+    resultado = backfill.cargar(tabla, ruta, bloque, diferir_indices=diferir_indices)
+    if "error" in resultado:
+        raise RuntimeError(resultado["error"])
+    return resultado["insertadas"], time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="backfill.py contra crear_ventas_bulk")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--escala", choices=ESCALAS, default="mediana")
+    parser.add_argument("--bloque", type=int, default=backfill.TAMANO_BLOQUE)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    generar(engine, ESCALAS[args.escala], progreso=lambda _: None)
+    directorio = tempfile.mkdtemp(prefix="bench_backfill_")
+    try:
+        tablas = exportar(directorio)
+        ventas = tablas["ventas"]
+        resultados = []
+
+        vaciar()
+        inicio = time.perf_counter()
+        resultado = services.crear_ventas_bulk(ventas.drop(columns="id"), 5000)
+        resultados.append(
+            ("crear_ventas_bulk", resultado["insertados"], time.perf_counter() - inicio)
+        )
+        for formato, diferir in (("csv", False), ("parquet", False), ("parquet", True)):
+            vaciar()
+            nombre = (
+                f"backfill ventas ({formato}{', índices diferidos' if diferir else ''})"
+            )
+            ruta = os.path.join(directorio, f"ventas.{formato}")
+            resultados.append(
+                (nombre, *medir_backfill("ventas", ruta, args.bloque, diferir))
+            )
+        for tabla in ("devoluciones", "comisiones"):
+            ruta = os.path.join(directorio, f"{tabla}.parquet")
+            resultados.append(
+                (
+                    f"backfill {tabla} (parquet)",
+                    *medir_backfill(tabla, ruta, args.bloque),
+                )
+            )
+
+        print(f"\n{len(ventas.index)} ventas ({engine.dialect.name})")
+        print(f"{'carga':<44} {'filas':>9} {'segundos':>9} {'filas/s':>10}")
+        for nombre, filas, segundos in resultados:
+            print(
+                f"{nombre:<44} {filas:>9} {segundos:>9.2f} {filas / segundos:>10,.0f}"
+            )
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
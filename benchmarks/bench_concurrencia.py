@@ -0,0 +1,63 @@
+# benchmarks/bench_concurrencia.py
+# Página de Analytics: los reportes uno tras otro con los servicios
+# sincrónicos contra los mismos reportes a la vez con servicios_async.py.
+# Sin caché, para medir las consultas.
+#
+#   python -m benchmarks.bench_concurrencia --ventas 200000
+#   python -m benchmarks.bench_concurrencia --url postgresql://...
+import argparse
+
+import cache
+import services
+import servicios_async
+from benchmarks.comun import cronometrar, preparar_base
+from benchmarks.datos_sinteticos import generar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reportes en serie y concurrentes")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--ventas", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    generar(engine, args.ventas, progreso=lambda _: None)
+    cache.HABILITADA = False
+
+    def en_serie():
+        services.obtener_reporte_ventas_agrupado("semana", agrupar_por="pais")
+        services.obtener_reporte_ventas_agrupado("dia", agrupar_por="curso")
+        services.obtener_reportes_clientes()
+
+    def concurrentes():
+        resultados = servicios_async.ejecutar_concurrente(
+            por_pais=servicios_async.obtener_reporte_ventas_agrupado(
+                "semana", agrupar_por="pais"
+            ),
+            por_curso=servicios_async.obtener_reporte_ventas_agrupado(
+                "dia", agrupar_por="curso"
+            ),
+            clientes=servicios_async.obtener_reportes_clientes(),
+        )
+        for nombre, resultado in resultados.items():
+            if isinstance(resultado, dict):
+                raise RuntimeError(f"{nombre}: {resultado['error']}")
+
+    motor = servicios_async.url_async(engine.url)
+    print(
+        f"{engine.dialect.name}, driver asíncrono: {motor.drivername if motor else 'no'}"
+    )
+    # Calentamiento: compilación de sentencias y apertura de los pools
+    en_serie()
+    concurrentes()
+    for nombre, fn in (("en serie", en_serie), ("concurrentes", concurrentes)):
+        tiempos = cronometrar(fn, args.repeticiones)
+        print(
+            f"{nombre:<13} mediana {tiempos['mediana_ms']:>8.1f} ms "
+            f"(min {tiempos['min_ms']:.1f}, max {tiempos['max_ms']:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/bench_distribucion.py
+# Reparto de utilidades sobre varios años de resumen diario sintético:
+# cálculo de todos los meses desde el resumen, lectura con los meses pasados
+# cerrados en distribuciones y reparto vectorizado contra un reparto fila por
+# fila con Decimal.
+#
+#   python -m benchmarks.bench_distribucion --anios 5 --cursos 200
+import argparse
+import random
+from datetime import date, timedelta
+from decimal import ROUND_FLOOR, Decimal
+
+import numpy as np
+from sqlalchemy import insert
+
+import db
+import distribucion
+from benchmarks.comun import cronometrar, preparar_base
+from models import Curso, Socio, VentaDiaria
+
+SOCIOS = [("Ana", 33.3), ("Beto", 33.3), ("Carla", 21.15), ("Dani", 12.25)]
+
+
+def poblar(engine, anios, cursos, semilla=42):
+    rng = random.Random(semilla)
+    inicio = date(date.today().year - anios, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Curso),
+            [
+                {"nombre": f"curso {i}", "descripcion": "", "precio": 100.0}
+                for i in range(cursos)
+            ],
+        )
+        conn.execute(
+            insert(Socio),
+            [{"nombre": n, "porcentaje_participacion": p} for n, p in SOCIOS],
+        )
+        dias = (date.today() - inicio).days
+        for desde in range(0, dias, 30):
+            filas = []
+            for d in range(desde, min(desde + 30, dias)):
+                for curso_id in range(1, cursos + 1):
+                    brutas = round(rng.uniform(0, 2000), 2)
+                    reembolsos = round(brutas * rng.uniform(0, 0.1), 2)
+                    comisiones = round(brutas * 0.1, 2)
+                    filas.append(
+                        {
+                            "fecha": inicio + timedelta(days=d),
+                            "curso_id": curso_id,
+                            "ventas_brutas": brutas,
+                            "reembolsos": reembolsos,
+                            "comisiones": comisiones,
+                            "ingreso_neto": brutas - reembolsos - comisiones,
+                            "cantidad_ventas": rng.randint(0, 20),
+                        }
+                    )
+            conn.execute(insert(VentaDiaria), filas)
+    return dias * cursos
+
+
+def repartir_por_filas(utilidades, porcentajes):
+    # Referencia: mayor resto período por período con Decimal
+    total = sum(Decimal(str(p)) for p in porcentajes)
+    resultado = []
+    for utilidad in utilidades:
+        centavos = Decimal(int(round(utilidad * 100)))
+        cuotas = [centavos * Decimal(str(p)) / total for p in porcentajes]
+        base = [c.to_integral_value(rounding=ROUND_FLOOR) for c in cuotas]
+        faltan = int(centavos - sum(base))
+        orden = sorted(range(len(cuotas)), key=lambda i: -(cuotas[i] - base[i]))
+        for i in orden[:faltan]:
+            base[i] += 1
+        resultado.append([int(b) for b in base])
+    return np.array(resultado, dtype=np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reparto de utilidades por socio")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--anios", type=int, default=5)
+    parser.add_argument("--cursos", type=int, default=200)
+    parser.add_argument("--meses", type=int, default=100000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    filas = poblar(engine, args.anios, args.cursos)
+    print(f"resumen diario: {filas} filas, {len(SOCIOS)} socios")
+
+    with db.SessionLocal() as sesion:
+        abiertos = cronometrar(
+            lambda: distribucion.calcular_distribucion(db=sesion), args.repeticiones
+        )
+        df = distribucion.calcular_distribucion(db=sesion)
+        for mes in sorted(set(df["periodo"]))[:-1]:
+            distribucion.cerrar_periodo(mes, db=sesion)
+        cerrados = cronometrar(
+            lambda: distribucion.calcular_distribucion(db=sesion), args.repeticiones
+        )
+        df = distribucion.calcular_distribucion(db=sesion)
+    por_mes = df.groupby("periodo").agg(
+        monto=("monto", "sum"), utilidad=("utilidad_periodo", "first")
+    )
+    exacto = ((por_mes["monto"] - por_mes["utilidad"]).abs() < 0.005).all()
+    print(f"{len(por_mes)} meses, suma exacta por mes: {exacto}")
+    print(f"sin meses cerrados (calcula todo): {abiertos['mediana_ms']:.1f} ms")
+    print(f"con los meses pasados cerrados: {cerrados['mediana_ms']:.1f} ms")
+
+    # Solo el reparto, sobre muchos períodos sintéticos
+    rng = np.random.default_rng(0)
+    utilidades = rng.uniform(-50000, 500000, args.meses).round(2)
+    porcentajes = [p for _, p in SOCIOS]
+    pesos = np.round(np.array(porcentajes) * distribucion._ESCALA_PESOS)
+    centavos = np.round(utilidades * 100).astype(np.int64)
+    vectorizado = cronometrar(
+        lambda: distribucion.repartir(centavos, pesos.astype(np.int64)),
+        args.repeticiones,
+    )
+    por_filas = cronometrar(
+        lambda: repartir_por_filas(utilidades, porcentajes), repeticiones=1
+    )
+    iguales = np.array_equal(
+        distribucion.repartir(centavos, pesos.astype(np.int64)),
+        repartir_por_filas(utilidades, porcentajes),
+    )
+    print(
+        f"reparto de {args.meses} períodos: vectorizado "
+        f"{vectorizado['mediana_ms']:.1f} ms, por filas {por_filas['mediana_ms']:.1f} ms"
+        f" (mismo resultado: {iguales})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# benchmarks/bench_escrituras.py
+# Escrituras por segundo de los servicios crear_/actualizar_ de services.py
+# sobre datos sintéticos: una llamada (y su commit) por escritura, como desde
+# la app, contando las sentencias SQL que manda cada una. Con --ref mide
+# también otro commit en un worktree temporal de git, para comparar antes y
+# después de un cambio.
+#
+#   python -m benchmarks.bench_escrituras --escrituras 2000
+#   python -m benchmarks.bench_escrituras --ref HEAD~1
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+import db
+import services
+from benchmarks.comun import preparar_base
+from benchmarks.datos_sinteticos import ESCALAS, dimensiones, generar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def casos(n_cursos, n_clientes, n_ventas):
+    # (nombre, función(i, sesión), si se espera el error de duplicado)
+    marca = time.perf_counter_ns()
+    return [
+        (
+            "crear_curso",
+            lambda i, s: services.crear_curso(f"curso {marca} {i}", "-", 100.0, db=s),
+            False,
+        ),
+        (
+            "crear_curso (duplicado)",
+            lambda i, s: services.crear_curso(f"curso {marca} 0", "-", 100.0, db=s),
+            True,
+        ),
+        (
+            "actualizar_curso",
+            lambda i, s: services.actualizar_curso(
+                i % n_cursos + 1, f"actualizado {marca} {i}", "-", 120.0, db=s
+            ),
+            False,
+        ),
+        (
+            "crear_cliente",
+            lambda i, s: services.crear_cliente(
+                "bench",
+                f"{marca}_{i}@ejemplo.com",
+                "1100000000",
+                "Chile",
+                "bench",
+                db=s,
+            ),
+            False,
+        ),
+        (
+            "actualizar_cliente",
+            lambda i, s: services.actualizar_cliente(
+                i % n_clientes + 1,
+                "bench",
+                f"actualizado{marca}_{i}@ejemplo.com",
+                "1100000000",
+                "Chile",
+                "bench",
+                db=s,
+            ),
+            False,
+        ),
+        ("crear_socio", lambda i, s: services.crear_socio("bench", 1.0, db=s), False),
+        (
+            "actualizar_socio",
+            lambda i, s: services.actualizar_socio(i % 3 + 1, f"Socio {i}", 30.0, db=s),
+            False,
+        ),
+        (
+            "crear_venta",
+            lambda i, s: services.crear_venta(
+                i % n_clientes + 1, i % n_cursos + 1, 50.0, db=s
+            ),
+            False,
+        ),
+        (
+            "crear_devolucion",
+            lambda i, s: services.crear_devolucion(
+                i % n_ventas + 1, "bench", 0.01, db=s
+            ),
+            False,
+        ),
+        (
+            "crear_comision",
+            lambda i, s: services.crear_comision(i % n_ventas + 1, "bench", 5.0, db=s),
+            False,
+        ),
+    ]
+
+
+def medir(engine, escala, escrituras):
+    n_cursos, n_clientes = dimensiones(ESCALAS[escala])
+    sentencias = [0]
+
+    def contar(*_):
+        sentencias[0] += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    resultados = {}
+    for nombre, fn, duplicado in casos(n_cursos, n_clientes, ESCALAS[escala]):
+        with db.SessionLocal() as sesion:
+            fn(0, sesion)  # calentamiento (y el original del caso duplicado)
+            sentencias[0] = 0
+            errores = 0
+            inicio = time.perf_counter()
+            for i in range(1, escrituras + 1):
+                resultado = fn(i, sesion)
+                errores += isinstance(resultado, dict) and "error" in resultado
+            segundos = time.perf_counter() - inicio
+        if errores != (escrituras if duplicado else 0):
+            raise RuntimeError(f"{nombre}: {errores} errores en {escrituras} llamadas")
+        resultados[nombre] = {
+            "escrituras_s": escrituras / segundos,
+            "sentencias": sentencias[0] / escrituras,
+        }
+    event.remove(engine, "before_cursor_execute", contar)
+    return resultados
+
+
+def medir_ref(ref, args):
+    # Corre este mismo benchmark sobre `ref` en un worktree temporal
+    destino = tempfile.mkdtemp(prefix="bench_escrituras_")
+    subprocess.run(
+        ["git", "worktree", "add", "--detach", destino, ref],
+        cwd=RAIZ,
+        check=True,
+        capture_output=True,
+    )
+    try:
+        shutil.copy(os.path.abspath(__file__), os.path.join(destino, "benchmarks"))
+        salida = os.path.join(destino, "resultado.json")
+        comando = [sys.executable, "-m", "benchmarks.bench_escrituras"]
+        comando += ["--escala", args.escala, "--escrituras", str(args.escrituras)]
+        comando += ["--json", salida] + (["--url", args.url] if args.url else [])
+        subprocess.run(comando, cwd=destino, check=True, capture_output=True)
+        with open(salida, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        subprocess.run(
+            ["git", "worktree", "remove", "--force", destino],
+            cwd=RAIZ,
+            capture_output=True,
+        )
+        shutil.rmtree(destino, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escrituras por segundo")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--escrituras", type=int, default=1000)
+    parser.add_argument("--ref", help="Commit contra el que comparar (ej. HEAD~1)")
+    parser.add_argument("--json", help="Guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    # La referencia primero: las dos corridas recrean la misma base
+    antes = medir_ref(args.ref, args) if args.ref else None
+    engine = preparar_base(args.url)
+    generar(engine, ESCALAS[args.escala], progreso=lambda _: None)
+    resultados = medir(engine, args.escala, args.escrituras)
+
+    print(f"{args.escrituras} escrituras por caso contra {engine.dialect.name}")
+    print(f"{'servicio':<26} {'escrituras/s':>13} {'sentencias':>11}", end="")
+    print(f" {'antes (' + args.ref + ')':>24}" if antes else "")
+    for nombre, fila in resultados.items():
+        linea = (
+            f"{nombre:<26} {fila['escrituras_s']:>13.0f} {fila['sentencias']:>11.1f}"
+        )
+        if antes and nombre in antes:
+            previo = antes[nombre]
+            factor = fila["escrituras_s"] / previo["escrituras_s"]
+            linea += (
+                f" {previo['escrituras_s']:>9.0f}/s {previo['sentencias']:>4.1f} sent."
+                f" (x{factor:.2f})"
+            )
+        print(linea)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_graficos.py
+# Tamaño del JSON y tiempo de preparación de la figura de tendencia con la
+# serie completa y reducida (LTTB y mínimo/máximo), para series sintéticas de
+# distinto largo. No necesita base de datos.
+#
+#   python -m benchmarks.bench_graficos --puntos 10000,100000,500000
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+import graficos
+
+
+def serie(n, series, semilla=42):
+    # Caminata aleatoria diaria por serie, como el reporte desglosado
+    rng = np.random.default_rng(semilla)
+    por_serie = n // series
+    return pd.DataFrame(
+        {
+            "periodo": np.tile(
+                pd.date_range("2000-01-01", periods=por_serie, freq="D"), series
+            ),
+            "serie": np.repeat([f"s{i}" for i in range(series)], por_serie),
+            "total": np.abs(
+                np.cumsum(rng.normal(0, 10, (series, por_serie)), axis=1).ravel()
+            )
+            + 100,
+        }
+    )
+
+
+def carga(fig):
+    # Bytes del JSON que viaja al navegador
+    return len(fig.to_json().encode("utf-8"))
+
+
+def completa(df):
+    # Lo que hacía la página antes: todas las filas a px.line
+    inicio = time.perf_counter()
+    fig = px.line(df, x="periodo", y="total", color="serie", markers=True)
+    return carga(fig), (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reducción de series para Plotly")
+    parser.add_argument("--puntos", default="10000,100000,500000")
+    parser.add_argument("--series", type=int, default=5)
+    parser.add_argument("--presupuesto", type=int, default=graficos.PRESUPUESTO_PUNTOS)
+    args = parser.parse_args()
+
+    print(f"{'filas':>9} {'variante':<10} {'puntos':>7} {'KB':>9} {'ms':>8}")
+    for n in (int(p) for p in args.puntos.split(",")):
+        df = serie(n, args.series)
+        bytes_, ms = completa(df)
+        print(
+            f"{len(df):>9} {'completa':<10} {len(df):>7} {bytes_ / 1024:>9.0f} {ms:>8.0f}"
+        )
+        for metodo in graficos.METODOS:
+            inicio = time.perf_counter()
+            fig, m = graficos.figura_lineas(
+                df,
+                "periodo",
+                "total",
+                color="serie",
+                puntos=args.presupuesto,
+                metodo=metodo,
+                markers=True,
+            )
+            bytes_ = carga(fig)
+            ms = (time.perf_counter() - inicio) * 1000
+            print(
+                f"{len(df):>9} {metodo:<10} {m['puntos']:>7} "
+                f"{bytes_ / 1024:>9.0f} {ms:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
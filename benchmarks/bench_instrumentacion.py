@@ -0,0 +1,61 @@
+# benchmarks/bench_instrumentacion.py
+# Costo de instrumentacion.py: la misma serie de consultas de servicio con la
+# instrumentación sin activar, activada y de nuevo desactivada.
+#
+#   python -m benchmarks.bench_instrumentacion --llamadas 2000
+import argparse
+
+from sqlalchemy import insert
+
+import db
+import instrumentacion
+import services
+from benchmarks.comun import cronometrar, preparar_base
+from models import Curso
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de la instrumentación")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--llamadas", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Curso),
+            [
+                {"nombre": f"curso {i}", "descripcion": "", "precio": 100.0}
+                for i in range(1000)
+            ],
+        )
+
+    def serie():
+        # Con una sesión explícita los servicios no usan la caché
+        with db.SessionLocal() as sesion:
+            for _ in range(args.llamadas):
+                services.obtener_pagina("cursos", db=sesion)
+
+    serie()  # calentamiento: compilación de sentencias y conteo en caché
+    apagada = cronometrar(serie, args.repeticiones)
+    instrumentacion.activar()
+    encendida = cronometrar(serie, args.repeticiones)
+    instrumentacion.desactivar()
+    desactivada = cronometrar(serie, args.repeticiones)
+
+    base = apagada["mediana_ms"]
+    for nombre, tiempos in (
+        ("sin activar", apagada),
+        ("activada", encendida),
+        ("desactivada", desactivada),
+    ):
+        extra = (tiempos["mediana_ms"] - base) / args.llamadas * 1000
+        print(
+            f"{nombre:<12} {tiempos['mediana_ms']:>9.1f} ms "
+            f"({extra:+.1f} µs por llamada)"
+        )
+
+
+if __name__ == "__main__":
+    main()
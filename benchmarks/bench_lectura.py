@@ -0,0 +1,152 @@
+# benchmarks/bench_lectura.py
+# Compara la lectura anterior (instancias ORM y un dict por fila) contra la
+# lectura columnar de Core (consultas.leer_dataframe y select de columnas) en
+# reportes y listados: tiempo y pico de memoria medido con tracemalloc.
+#
+#   python -m benchmarks.bench_lectura --ventas 200000
+import argparse
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import insert
+
+import db
+import services
+from benchmarks.comun import cronometrar, preparar_base
+from models import Cliente, Curso, Venta
+
+
+def poblar(engine, clientes, cursos, ventas, semilla=42):
+    rng = random.Random(semilla)
+    paises = ["Argentina", "Uruguay", "Chile", "México", "España", "Perú"]
+    fuentes = ["instagram", "google", "referido", "youtube"]
+    inicio = datetime(2023, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Cliente),
+            [
+                {
+                    "nombre": f"cliente {i}",
+                    "email": f"cliente{i}@ejemplo.com",
+                    "telefono": str(rng.randint(10**7, 10**8)),
+                    "pais": rng.choice(paises),
+                    "fuente_referencia": rng.choice(fuentes),
+                }
+                for i in range(clientes)
+            ],
+        )
+        conn.execute(
+            insert(Curso),
+            [
+                {"nombre": f"curso {i}", "descripcion": "", "precio": 100.0}
+                for i in range(cursos)
+            ],
+        )
+        conn.execute(
+            insert(Venta),
+            [
+                {
+                    "cliente_id": rng.randint(1, clientes),
+                    "curso_id": rng.randint(1, cursos),
+                    "monto": round(rng.uniform(10, 500), 2),
+                    "fecha_venta": inicio + timedelta(minutes=rng.randint(0, 10**6)),
+                }
+                for _ in range(ventas)
+            ],
+        )
+
+
+# --- Implementaciones anteriores (hidratación ORM) ---
+def reporte_ventas_orm(sesion):
+    data = []
+    for venta in sesion.query(Venta).all():
+        data.append(
+            {
+                "id": venta.id,
+                "cliente_id": venta.cliente_id,
+                "curso_id": venta.curso_id,
+                "monto": venta.monto,
+                "fecha_venta": venta.fecha_venta,
+            }
+        )
+    return pd.DataFrame(data)
+
+
+def reporte_clientes_orm(sesion):
+    data = []
+    for cliente in sesion.query(Cliente).all():
+        data.append(
+            {
+                "id": cliente.id,
+                "nombre": cliente.nombre,
+                "email": cliente.email,
+                "pais": cliente.pais,
+                "fuente_referencia": cliente.fuente_referencia,
+            }
+        )
+    return pd.DataFrame(data)
+
+
+def listado_ventas_orm(sesion):
+    return sesion.query(Venta).all()
+
+
+def _medir(fn, repeticiones):
+    # Cada llamada usa una sesión nueva, como una ejecución de la app
+    def llamada():
+        with db.SessionLocal() as sesion:
+            resultado = fn(sesion)
+            return len(resultado)
+
+    tiempos = cronometrar(llamada, repeticiones)
+    tracemalloc.start()
+    filas = llamada()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tiempos["mediana_ms"], pico / 2**20, filas
+
+
+CASOS = [
+    (
+        "reporte ventas",
+        reporte_ventas_orm,
+        lambda s: services.obtener_reportes_ventas(db=s),
+    ),
+    (
+        "reporte clientes",
+        reporte_clientes_orm,
+        lambda s: services.obtener_reportes_clientes(db=s),
+    ),
+    ("listado ventas", listado_ventas_orm, lambda s: services.obtener_ventas(db=s)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lectura ORM contra lectura columnar")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--clientes", type=int, default=100000)
+    parser.add_argument("--cursos", type=int, default=500)
+    parser.add_argument("--ventas", type=int, default=200000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    poblar(engine, args.clientes, args.cursos, args.ventas)
+
+    print(
+        f"{'caso':<17} {'filas':>7} {'orm ms':>9} {'core ms':>9} "
+        f"{'orm MiB':>8} {'core MiB':>9}"
+    )
+    for nombre, anterior, nuevo in CASOS:
+        ms_orm, mib_orm, filas = _medir(anterior, args.repeticiones)
+        ms_core, mib_core, _ = _medir(nuevo, args.repeticiones)
+        print(
+            f"{nombre:<17} {filas:>7} {ms_orm:>9.1f} {ms_core:>9.1f} "
+            f"{mib_orm:>8.1f} {mib_core:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# benchmarks/carga.py
+# Prueba de carga: N sesiones concurrentes (hilos) repiten una mezcla de
+# operaciones reales de services.py, cada una dentro de db.sesion_request()
+# como un rerun de Streamlit. Informa latencias p50/p95/p99 por operación,
+# throughput, errores y la saturación del pool del engine de db.py: espera
+# para obtener una conexión, conexiones en uso y uso del overflow.
+#
+#   python -m benchmarks.carga --sesiones 20 --duracion 30
+#   python -m benchmarks.carga --url postgresql://... --pool-size 5 --max-overflow 5
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sqlalchemy.pool import QueuePool
+
+import cache
+import db
+import services
+from benchmarks.comun import preparar_base
+from benchmarks.datos_sinteticos import ESCALAS, dimensiones, generar
+
+MEZCLA_POR_DEFECTO = "navegar=60,buscar=15,vender=10,reporte=15"
+
+
+class QueuePoolMedido(QueuePool):
+    # QueuePool que registra cuánto espera cada checkout y el máximo de
+    # conexiones en uso y de overflow
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = {"esperas_ms": [], "max_en_uso": 0, "max_overflow": 0}
+        self.timeouts = 0
+        self._lock_metricas = threading.Lock()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except Exception:
+            with self._lock_metricas:
+                self.timeouts += 1
+            raise
+        espera = (time.perf_counter() - inicio) * 1000
+        with self._lock_metricas:
+            self.metricas["esperas_ms"].append(espera)
+            self.metricas["max_en_uso"] = max(
+                self.metricas["max_en_uso"], self.checkedout()
+            )
+            self.metricas["max_overflow"] = max(
+                self.metricas["max_overflow"], self.overflow()
+            )
+        return conexion
+
+    def recreate(self):
+        # Conserva las métricas si el engine recrea el pool
+        nuevo = super().recreate()
+        nuevo.metricas, nuevo.timeouts = self.metricas, self.timeouts
+        return nuevo
+
+
+def operaciones(n_cursos, n_clientes):
+    # Acciones de un analista, con argumentos al azar
+    def navegar(rng):
+        if rng.random() < 0.5:
+            return services.obtener_pagina(
+                rng.choice(["cursos", "clientes", "ventas"]), per_page=20
+            )
+        return services.obtener_cursos(page=rng.randint(1, 10), per_page=10)
+
+    def buscar(rng):
+        termino = rng.choice(["python", "excel", "garcía", "lópez", "datos", "ana"])
+        if rng.random() < 0.5:
+            return services.buscar_cursos(termino)
+        return services.buscar_clientes(termino)
+
+    def vender(rng):
+        return services.crear_venta(
+            rng.randint(1, n_clientes),
+            rng.randint(1, n_cursos),
+            round(rng.uniform(20, 300), 2),
+        )
+
+    def reporte(rng):
+        return services.obtener_reporte_ventas_agrupado(
+            rng.choice(["dia", "semana", "mes"]),
+            agrupar_por=rng.choice([None, "curso", "pais"]),
+        )
+
+    return {"navegar": navegar, "buscar": buscar, "vender": vender, "reporte": reporte}
+
+
+def _mezcla(texto):
+    pesos = {}
+    for parte in texto.split(","):
+        nombre, peso = parte.split("=")
+        pesos[nombre.strip()] = float(peso)
+    return pesos
+
+
+def ejecutar(sesiones, duracion, mezcla, acciones, pausa_ms=0, semilla=42):
+    # Devuelve {operacion: [latencias ms]} y {operacion: errores}
+    nombres = list(mezcla)
+    pesos = [mezcla[n] for n in nombres]
+    latencias = {n: [] for n in nombres}
+    errores = {n: 0 for n in nombres}
+    lock = threading.Lock()
+    fin = time.monotonic() + duracion
+
+    def usuario(numero):
+        rng = random.Random(semilla + numero)
+        while time.monotonic() < fin:
+            nombre = rng.choices(nombres, pesos)[0]
+            inicio = time.perf_counter()
+            try:
+                with db.sesion_request():
+                    resultado = acciones[nombre](rng)
+                fallo = isinstance(resultado, dict) and "error" in resultado
+            except Exception:
+                fallo = True
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias[nombre].append(ms)
+                errores[nombre] += fallo
+            if pausa_ms:
+                time.sleep(rng.uniform(0, pausa_ms) / 1000)
+
+    with ThreadPoolExecutor(max_workers=sesiones) as ejecutor:
+        list(ejecutor.map(usuario, range(sesiones)))
+    return latencias, errores
+
+
+def informe(latencias, errores, duracion, pool):
+    filas = {}
+    total = 0
+    for nombre, valores in latencias.items():
+        total += len(valores)
+        if not valores:
+            continue
+        p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+        filas[nombre] = {
+            "operaciones": len(valores),
+            "errores": errores[nombre],
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "max_ms": max(valores),
+        }
+    esperas = pool.metricas["esperas_ms"] or [0.0]
+    return {
+        "operaciones": filas,
+        "throughput_ops_s": total / duracion,
+        "pool": {
+            "tamano": pool.size(),
+            "checkouts": len(pool.metricas["esperas_ms"]),
+            "espera_p50_ms": float(np.percentile(esperas, 50)),
+            "espera_p95_ms": float(np.percentile(esperas, 95)),
+            "espera_p99_ms": float(np.percentile(esperas, 99)),
+            "espera_max_ms": max(esperas),
+            "max_en_uso": pool.metricas["max_en_uso"],
+            "max_overflow": pool.metricas["max_overflow"],
+            "timeouts": pool.timeouts,
+        },
+    }
+
+
+def imprimir(resultado):
+    print(
+        f"{'operación':<10} {'ops':>7} {'errores':>8} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    for nombre, fila in resultado["operaciones"].items():
+        print(
+            f"{nombre:<10} {fila['operaciones']:>7} {fila['errores']:>8} "
+            f"{fila['p50_ms']:>9.1f} {fila['p95_ms']:>9.1f} {fila['p99_ms']:>9.1f} "
+            f"{fila['max_ms']:>9.1f}"
+        )
+    print(f"throughput: {resultado['throughput_ops_s']:.1f} ops/s")
+    pool = resultado["pool"]
+    print(
+        f"pool: tamaño {pool['tamano']}, {pool['checkouts']} checkouts, espera "
+        f"p50/p95/p99/max {pool['espera_p50_ms']:.1f}/{pool['espera_p95_ms']:.1f}/"
+        f"{pool['espera_p99_ms']:.1f}/{pool['espera_max_ms']:.1f} ms, "
+        f"en uso máx {pool['max_en_uso']}, overflow máx {pool['max_overflow']}, "
+        f"timeouts {pool['timeouts']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga concurrente")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--escala", choices=ESCALAS, default="mediana")
+    parser.add_argument(
+        "--sin-generar",
+        action="store_true",
+        help="Usar los datos que ya tiene la base (generados con la misma escala)",
+    )
+    parser.add_argument("--sesiones", type=int, default=20)
+    parser.add_argument("--duracion", type=float, default=20, help="Segundos")
+    parser.add_argument("--mezcla", default=MEZCLA_POR_DEFECTO)
+    parser.add_argument("--pausa-ms", type=float, default=0, help="Pausa máxima")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument("--sin-cache", action="store_true")
+    parser.add_argument("--json", help="Guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url, recrear=not args.sin_generar)
+    if not args.sin_generar:
+        generar(engine, ESCALAS[args.escala], progreso=lambda _: None)
+    # Mismo engine de db.py, con el pool medido
+    engine = db.configurar(
+        args.url or str(engine.url),
+        poolclass=QueuePoolMedido,
+        pool_size=args.pool_size,
+        max_overflow=args.max_overflow,
+        pool_timeout=args.pool_timeout,
+    )
+    if args.sin_cache:
+        cache.HABILITADA = False
+    mezcla = _mezcla(args.mezcla)
+    acciones = operaciones(*dimensiones(ESCALAS[args.escala]))
+    desconocidas = set(mezcla) - set(acciones)
+    if desconocidas:
+        raise SystemExit(f"Operaciones desconocidas: {', '.join(desconocidas)}")
+
+    print(
+        f"{args.sesiones} sesiones durante {args.duracion:.0f} s contra "
+        f"{engine.dialect.name} (pool {args.pool_size}+{args.max_overflow})"
+    )
+    latencias, errores = ejecutar(
+        args.sesiones, args.duracion, mezcla, acciones, args.pausa_ms
+    )
+    resultado = informe(latencias, errores, args.duracion, engine.pool)
+    imprimir(resultado)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# benchmarks/comun.py
+# Utilidades compartidas por los benchmarks. Se ejecutan desde la raíz del
+# repositorio, por ejemplo: python -m benchmarks.bench_busqueda
+import os
+import statistics
+import tempfile
+import time
+
+import db
+import models
+
+
+def url_por_defecto():
+    return "sqlite:///" + os.path.join(tempfile.gettempdir(), "bench_cursos.db")
+
+
+def preparar_base(url=None, recrear=True):
+    # Apunta el engine global a la base del benchmark y crea el esquema
+    engine = db.configurar(url or url_por_defecto())
+    if recrear:
+        models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    return engine
+
+
+def cronometrar(fn, repeticiones=5):
+    # Devuelve estadísticas en milisegundos de `repeticiones` llamadas a fn()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "min_ms": min(tiempos),
+        "mediana_ms": statistics.median(tiempos),
+        "max_ms": max(tiempos),
+    }
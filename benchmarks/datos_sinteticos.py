@@ -0,0 +1,257 @@
+# benchmarks/datos_sinteticos.py
+# Generador reproducible (con semilla) de datos de prueba: cursos, clientes,
+# ventas, devoluciones, comisiones y socios, con distribuciones parecidas a
+# las reales (popularidad de cursos tipo Zipf, países y fuentes sesgados,
+# estacionalidad y crecimiento de las ventas). Funciona con SQLite o
+# PostgreSQL y genera por bloques, así que la escala grande no necesita
+# tener todo en memoria.
+#
+#   python -m benchmarks.datos_sinteticos --escala mediana
+#   python -m benchmarks.datos_sinteticos --ventas 250000 --url postgresql://...
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, select, text
+
+import db
+import resumen_ventas
+from benchmarks.comun import preparar_base
+from models import Cliente, Comision, Curso, Devolucion, Socio, Venta
+
+# Cantidad de ventas de cada escala
+ESCALAS = {"pequena": 1_000, "mediana": 100_000, "grande": 10_000_000}
+TAMANO_BLOQUE = 100_000
+INICIO = datetime(2022, 1, 1)
+DIAS = 3 * 365
+
+PAISES = [
+    "Argentina",
+    "México",
+    "Colombia",
+    "España",
+    "Chile",
+    "Perú",
+    "Uruguay",
+    "Ecuador",
+    "Estados Unidos",
+    "Paraguay",
+]
+FUENTES = ["instagram", "google", "youtube", "referido", "facebook", "tiktok"]
+PESOS_FUENTES = [0.32, 0.22, 0.16, 0.12, 0.1, 0.08]
+NOMBRES = ["ana", "juan", "maría", "pedro", "lucía", "martín", "sofía", "diego"]
+APELLIDOS = ["garcía", "lópez", "martínez", "rodríguez", "pérez", "gómez"]
+TEMAS = ["python", "marketing", "excel", "diseño", "finanzas", "inglés", "datos"]
+NIVELES = ["inicial", "intermedio", "avanzado", "intensivo"]
+CLOSERS = ["ana", "bruno", "carla", "diego", "elena", "facundo", "gabriela"]
+SOCIOS = [("Socio A", 50.0), ("Socio B", 30.0), ("Socio C", 20.0)]
+
+
+def dimensiones(ventas):
+    # Cantidad de cursos y clientes que acompaña a una cantidad de ventas
+    cursos = int(np.clip(ventas // 500, 20, 2000))
+    clientes = max(ventas // 3, 100)
+    return cursos, clientes
+
+
+def _pesos_zipf(n, s=1.1):
+    pesos = 1.0 / np.arange(1, n + 1) ** s
+    return pesos / pesos.sum()
+
+
+def _fechas(rng, n):
+    # Tres años con crecimiento y estacionalidad (picos en marzo y agosto)
+    dias = np.arange(DIAS)
+    mes = (dias // 30) % 12
+    peso = (1 + dias / DIAS) * (1 + 0.35 * np.isin(mes, [2, 7]))
+    elegidos = rng.choice(dias, size=n, p=peso / peso.sum())
+    segundos = rng.integers(8 * 3600, 23 * 3600, size=n)
+    return (
+        pd.Timestamp(INICIO)
+        + pd.to_timedelta(elegidos, unit="D")
+        + pd.to_timedelta(segundos, unit="s")
+    )
+
+
+def _insertar(conn, modelo, df):
+    for i in range(0, len(df.index), TAMANO_BLOQUE):
+        conn.execute(insert(modelo), df.iloc[i : i + TAMANO_BLOQUE].to_dict("records"))
+
+
+def generar(engine, ventas, semilla=42, progreso=print):
+    # Llena una base vacía; devuelve la cantidad de filas por tabla
+    rng = np.random.default_rng(semilla)
+    n_cursos, n_clientes = dimensiones(ventas)
+    cantidades = {}
+    with engine.begin() as conn:
+        precios = np.round(np.exp(rng.normal(4.3, 0.6, n_cursos)), 2)
+        temas = rng.choice(TEMAS, n_cursos)
+        niveles = rng.choice(NIVELES, n_cursos)
+        cursos = pd.DataFrame(
+            {
+                "id": np.arange(1, n_cursos + 1),
+                "nombre": [
+                    f"{t.capitalize()} {n} {i}"
+                    for i, (t, n) in enumerate(zip(temas, niveles), 1)
+                ],
+                "descripcion": [
+                    f"Curso {n} de {t}: teoría, práctica y proyecto final"
+                    for t, n in zip(temas, niveles)
+                ],
+                "precio": precios,
+                "fecha_creacion": _fechas(rng, n_cursos),
+            }
+        )
+        _insertar(conn, Curso, cursos)
+        cantidades["cursos"] = n_cursos
+
+        for inicio in range(0, n_clientes, TAMANO_BLOQUE):
+            ids = np.arange(inicio + 1, min(inicio + TAMANO_BLOQUE, n_clientes) + 1)
+            nombres = rng.choice(NOMBRES, len(ids))
+            apellidos = rng.choice(APELLIDOS, len(ids))
+            clientes = pd.DataFrame(
+                {
+                    "id": ids,
+                    "nombre": [f"{n} {a}" for n, a in zip(nombres, apellidos)],
+                    "email": [
+                        f"{n}.{a}{i}@ejemplo.com"
+                        for n, a, i in zip(nombres, apellidos, ids)
+                    ],
+                    "telefono": rng.integers(10**9, 10**10, len(ids)).astype(str),
+                    "pais": rng.choice(PAISES, len(ids), p=_pesos_zipf(len(PAISES))),
+                    "fuente_referencia": rng.choice(FUENTES, len(ids), p=PESOS_FUENTES),
+                    "fecha_creacion": _fechas(rng, len(ids)),
+                }
+            )
+            _insertar(conn, Cliente, clientes)
+        cantidades["clientes"] = n_clientes
+        progreso(f"cursos: {n_cursos}, clientes: {n_clientes}")
+
+        popularidad = _pesos_zipf(n_cursos)
+        n_devoluciones = n_comisiones = 0
+        for inicio in range(0, ventas, TAMANO_BLOQUE):
+            n = min(TAMANO_BLOQUE, ventas - inicio)
+            ids = np.arange(inicio + 1, inicio + n + 1)
+            curso_id = rng.choice(n_cursos, n, p=popularidad) + 1
+            # Un 20% de las compras las hace el 5% de clientes recurrentes
+            recurrente = rng.random(n) < 0.2
+            cliente_id = np.where(
+                recurrente,
+                rng.integers(1, max(n_clientes // 20, 1) + 1, n),
+                rng.integers(1, n_clientes + 1, n),
+            )
+            descuento = rng.choice([1.0, 0.9, 0.8, 0.5], n, p=[0.6, 0.2, 0.15, 0.05])
+            monto = np.round(precios[curso_id - 1] * descuento, 2)
+            fecha_venta = _fechas(rng, n)
+            _insertar(
+                conn,
+                Venta,
+                pd.DataFrame(
+                    {
+                        "id": ids,
+                        "cliente_id": cliente_id,
+                        "curso_id": curso_id,
+                        "monto": monto,
+                        "fecha_venta": fecha_venta,
+                    }
+                ),
+            )
+            # ~5% de devoluciones (la mitad totales) hasta 30 días después
+            devuelta = rng.random(n) < 0.05
+            parcial = rng.uniform(0.2, 0.8, devuelta.sum())
+            total = rng.random(devuelta.sum()) < 0.5
+            _insertar(
+                conn,
+                Devolucion,
+                pd.DataFrame(
+                    {
+                        "venta_id": ids[devuelta],
+                        "fecha_devolucion": fecha_venta[devuelta]
+                        + pd.to_timedelta(rng.integers(0, 30, devuelta.sum()), "D"),
+                        "motivo": rng.choice(
+                            ["No cumplió expectativas", "Error de compra", "Otro"],
+                            devuelta.sum(),
+                        ),
+                        "monto_reembolso": np.round(
+                            monto[devuelta] * np.where(total, 1.0, parcial), 2
+                        ),
+                    }
+                ),
+            )
+            # ~60% de las ventas las cierra un closer
+            cerrada = rng.random(n) < 0.6
+            porcentaje = rng.choice([5.0, 8.0, 10.0, 12.5], cerrada.sum())
+            _insertar(
+                conn,
+                Comision,
+                pd.DataFrame(
+                    {
+                        "venta_id": ids[cerrada],
+                        "closer": rng.choice(
+                            CLOSERS, cerrada.sum(), p=_pesos_zipf(len(CLOSERS), 0.7)
+                        ),
+                        "porcentaje": porcentaje,
+                        "monto_comision": np.round(
+                            monto[cerrada] * porcentaje / 100, 2
+                        ),
+                        "ajuste_manual": 0.0,
+                    }
+                ),
+            )
+            n_devoluciones += int(devuelta.sum())
+            n_comisiones += int(cerrada.sum())
+            progreso(f"ventas: {inicio + n}/{ventas}")
+        cantidades.update(
+            ventas=ventas, devoluciones=n_devoluciones, comisiones=n_comisiones
+        )
+
+        conn.execute(
+            insert(Socio),
+            [{"nombre": n, "porcentaje_participacion": p} for n, p in SOCIOS],
+        )
+        cantidades["socios"] = len(SOCIOS)
+
+        if engine.dialect.name == "postgresql":
+            # Los ids se insertaron explícitamente: las secuencias quedan atrás
+            for modelo in (Curso, Cliente, Venta):
+                tabla = modelo.__tablename__
+                conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+                        f"(SELECT max(id) FROM {tabla}))"
+                    )
+                )
+
+    resultado = resumen_ventas.reconstruir()
+    if "error" in resultado:
+        raise RuntimeError(resultado["error"])
+    cantidades["ventas_diarias"] = resultado["filas"]
+    return cantidades
+
+
+def rango_de_fechas():
+    # (primera, última) fecha de venta de la base generada
+    with db.SessionLocal() as sesion:
+        return sesion.execute(
+            select(func.min(Venta.fecha_venta), func.max(Venta.fecha_venta))
+        ).one()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena")
+    parser.add_argument("--ventas", type=int, help="Cantidad de ventas (pisa --escala)")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = preparar_base(args.url)
+    inicio = time.perf_counter()
+    cantidades = generar(engine, args.ventas or ESCALAS[args.escala], args.semilla)
+    print(f"Listo en {time.perf_counter() - inicio:.1f} s: {cantidades}")
+
+
+if __name__ == "__main__":
+    main()
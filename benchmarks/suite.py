@@ -0,0 +1,281 @@
+# benchmarks/suite.py
+# Mide las funciones públicas de los servicios (listados, búsqueda,
+# exportación, importación, reportes, comisiones y distribución) sobre datos
+# sintéticos de cada escala y guarda los tiempos en JSON, para comparar
+# entre commits.
+#
+#   python -m benchmarks.suite --escalas pequena,mediana
+#   python -m benchmarks.suite --comparar antes.json despues.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import analitica_clientes
+import comisiones
+import db
+import distribucion
+import exportacion
+import resumen_ventas
+import services
+from benchmarks.comun import cronometrar, preparar_base
+from benchmarks.datos_sinteticos import ESCALAS, generar, rango_de_fechas
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+# Los casos que leen tablas completas se saltean por encima de este tamaño
+MAX_VENTAS_TABLA_COMPLETA = 1_000_000
+
+
+def _exportar(sesion, formato):
+    ruta = exportacion.exportar_a_archivo("ventas", formato, db=sesion)
+    if isinstance(ruta, dict):
+        raise RuntimeError(ruta["error"])
+    os.remove(ruta)
+
+
+def _clientes_nuevos(n):
+    # Emails distintos en cada llamada para que la importación inserte
+    marca = time.perf_counter_ns()
+    return pd.DataFrame(
+        {
+            "nombre": [f"importado {i}" for i in range(n)],
+            "email": [f"importado{marca}_{i}@ejemplo.com" for i in range(n)],
+            "telefono": "1100000000",
+            "pais": "Argentina",
+            "fuente_referencia": "benchmark",
+        }
+    )
+
+
+def _ventas_nuevas(n):
+    return pd.DataFrame({"cliente_id": 1, "curso_id": 1, "monto": [10.0] * n})
+
+
+def casos(mes):
+    # (nombre, función que recibe la sesión, si lee tablas completas)
+    desde, hasta = mes, (mes + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return [
+        ("obtener_cursos", lambda s: services.obtener_cursos(db=s), False),
+        (
+            "obtener_cursos(busqueda)",
+            lambda s: services.obtener_cursos(busqueda="python", db=s),
+            False,
+        ),
+        (
+            "obtener_pagina(ventas)",
+            lambda s: services.obtener_pagina("ventas", db=s),
+            False,
+        ),
+        (
+            "obtener_pagina(clientes, busqueda)",
+            lambda s: services.obtener_pagina("clientes", busqueda="garcía", db=s),
+            False,
+        ),
+        ("buscar_cursos", lambda s: services.buscar_cursos("marketing", db=s), False),
+        ("buscar_clientes", lambda s: services.buscar_clientes("lópez", db=s), False),
+        ("obtener_clientes", lambda s: services.obtener_clientes(db=s), True),
+        ("obtener_ventas", lambda s: services.obtener_ventas(db=s), True),
+        (
+            "obtener_reportes_ventas",
+            lambda s: services.obtener_reportes_ventas(db=s),
+            True,
+        ),
+        (
+            "obtener_reportes_ventas(tras crear_venta)",
+            lambda s: (
+                services.crear_venta(1, 1, 10.0, db=s),
+                services.obtener_reportes_ventas(db=s),
+            ),
+            True,
+        ),
+        (
+            "obtener_reportes_clientes",
+            lambda s: services.obtener_reportes_clientes(db=s),
+            True,
+        ),
+        (
+            "obtener_reporte_ventas_agrupado(mes)",
+            lambda s: services.obtener_reporte_ventas_agrupado(db=s),
+            False,
+        ),
+        (
+            "obtener_reporte_ventas_agrupado(semana, curso)",
+            lambda s: services.obtener_reporte_ventas_agrupado(
+                "semana", agrupar_por="curso", db=s
+            ),
+            False,
+        ),
+        (
+            "obtener_reporte_ventas_agrupado(mes, pais)",
+            lambda s: services.obtener_reporte_ventas_agrupado(
+                agrupar_por="pais", fecha_desde=desde, fecha_hasta=hasta, db=s
+            ),
+            False,
+        ),
+        ("exportar ventas csv", lambda s: _exportar(s, "csv"), True),
+        ("exportar ventas parquet", lambda s: _exportar(s, "parquet"), True),
+        (
+            "importar_clientes_df(1000)",
+            lambda s: services.importar_clientes_df(_clientes_nuevos(1000), db=s),
+            False,
+        ),
+        (
+            "crear_ventas_bulk(1000)",
+            lambda s: services.crear_ventas_bulk(_ventas_nuevas(1000), db=s),
+            False,
+        ),
+        ("crear_venta", lambda s: services.crear_venta(1, 1, 10.0, db=s), False),
+        (
+            "comisiones.resumen_pagos(mes)",
+            lambda s: comisiones.resumen_pagos(desde, hasta, db=s),
+            False,
+        ),
+        (
+            "distribucion.calcular_distribucion",
+            lambda s: distribucion.calcular_distribucion(db=s),
+            False,
+        ),
+        (
+            "analitica_clientes.cohortes",
+            lambda s: analitica_clientes.cohortes(db=s),
+            False,
+        ),
+        (
+            "analitica_clientes.resumen_cohortes",
+            lambda s: analitica_clientes.resumen_cohortes(db=s),
+            False,
+        ),
+        ("analitica_clientes.rfm", lambda s: analitica_clientes.rfm(db=s), True),
+        (
+            "analitica_clientes.ltv_por(pais)",
+            lambda s: analitica_clientes.ltv_por("pais", db=s),
+            False,
+        ),
+        (
+            "resumen_ventas.verificar(mes)",
+            lambda s: resumen_ventas.verificar(desde, hasta, db=s),
+            False,
+        ),
+    ]
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def ejecutar(escala, url=None, repeticiones=3, semilla=42, filtro=None):
+    engine = preparar_base(url)
+    ventas = ESCALAS[escala]
+    inicio = time.perf_counter()
+    cantidades = generar(engine, ventas, semilla, progreso=lambda _: None)
+    generacion = time.perf_counter() - inicio
+    primera, _ = rango_de_fechas()
+    resultados = {}
+    for nombre, fn, tabla_completa in casos(date(primera.year, primera.month, 1)):
+        if filtro and filtro not in nombre:
+            continue
+        if tabla_completa and ventas > MAX_VENTAS_TABLA_COMPLETA:
+            continue
+
+        def llamada():
+            # Con una sesión explícita los servicios no usan la caché
+            with db.SessionLocal() as sesion:
+                resultado = fn(sesion)
+            if isinstance(resultado, dict) and "error" in resultado:
+                raise RuntimeError(f"{nombre}: {resultado['error']}")
+
+        resultados[nombre] = cronometrar(llamada, repeticiones)
+        print(f"  {nombre:<48} {resultados[nombre]['mediana_ms']:>10.1f} ms")
+    return {
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "motor": engine.dialect.name,
+        "escala": escala,
+        "semilla": semilla,
+        "filas": cantidades,
+        "generacion_s": generacion,
+        "repeticiones": repeticiones,
+        "resultados": resultados,
+    }
+
+
+def comparar(ruta_antes, ruta_despues, tolerancia=0.1):
+    # Imprime la variación de la mediana de cada caso; devuelve los que empeoraron
+    with open(ruta_antes, encoding="utf-8") as f:
+        antes = json.load(f)
+    with open(ruta_despues, encoding="utf-8") as f:
+        despues = json.load(f)
+    print(
+        f"{antes['commit']} -> {despues['commit']} "
+        f"({despues['escala']}, {despues['motor']})"
+    )
+    if (antes["escala"], antes["motor"]) != (despues["escala"], despues["motor"]):
+        print("  Atención: los archivos son de distinta escala o motor")
+    peores = []
+    for nombre, actual in despues["resultados"].items():
+        previo = antes["resultados"].get(nombre)
+        if previo is None:
+            print(f"  {nombre:<48} {actual['mediana_ms']:>10.1f} ms (nuevo)")
+            continue
+        cambio = actual["mediana_ms"] / previo["mediana_ms"] - 1
+        marca = " <-- más lento" if cambio > tolerancia else ""
+        if marca:
+            peores.append(nombre)
+        print(
+            f"  {nombre:<48} {previo['mediana_ms']:>10.1f} -> "
+            f"{actual['mediana_ms']:>10.1f} ms ({cambio:+.0%}){marca}"
+        )
+    return peores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de servicios")
+    parser.add_argument("--url", help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--escalas", default="pequena,mediana")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--solo", help="Medir solo los casos que contengan este texto")
+    parser.add_argument("--salida", default=DIRECTORIO_RESULTADOS)
+    parser.add_argument(
+        "--comparar", nargs=2, metavar=("ANTES", "DESPUES"), help="Compara dos JSON"
+    )
+    args = parser.parse_args()
+
+    if args.comparar:
+        peores = comparar(*args.comparar)
+        raise SystemExit(1 if peores else 0)
+
+    os.makedirs(args.salida, exist_ok=True)
+    for escala in args.escalas.split(","):
+        if escala not in ESCALAS:
+            raise SystemExit(f"Escala desconocida: {escala} ({', '.join(ESCALAS)})")
+        print(f"Escala {escala} ({ESCALAS[escala]} ventas)")
+        informe = ejecutar(
+            escala, args.url, args.repeticiones, args.semilla, filtro=args.solo
+        )
+        ruta = os.path.join(
+            args.salida,
+            f"{informe['commit']}_{informe['motor']}_{escala}.json",
+        )
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"Resultados en {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# buscador.py
+# Búsqueda por subcadena en cursos y clientes.
+#
+# En PostgreSQL los ILIKE '%q%' se resuelven con índices GIN de trigramas
+# (pg_trgm, ver models.py) y el ranking usa word_similarity. En otros motores
+# (SQLite, pruebas) se mantiene en memoria un índice de n-gramas por entidad
+# que se reconstruye cuando cambia la versión de la tabla (ver cache.py).
+import threading
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import func, or_, select
+
+import cache
+from db import obtener_sesion
+from models import Curso, Cliente
+
+N = 3
+# Con muchas coincidencias una lista IN cuesta más que recorrer la tabla con
+# ILIKE (y SQLite limita la cantidad de parámetros)
+_MAX_CANDIDATOS = 2000
+
+ENTIDADES = {
+    "cursos": (Curso, (Curso.nombre, Curso.descripcion)),
+    "clientes": (Cliente, (Cliente.nombre, Cliente.email, Cliente.pais)),
+}
+
+
+def _ngramas(texto, n=N):
+    return {texto[i : i + n] for i in range(len(texto) - n + 1)}
+
+
+def _puntaje(textos, q):
+    # 1.0 coincidencia exacta, 0.9 prefijo, 0.7 inicio de palabra, 0.5 subcadena;
+    # los campos posteriores (descripción, país) pesan algo menos que el primero.
+    mejor = 0.0
+    for posicion, texto in enumerate(textos):
+        inicio = texto.find(q)
+        if inicio < 0:
+            continue
+        if texto == q:
+            valor = 1.0
+        elif inicio == 0:
+            valor = 0.9
+        elif not texto[inicio - 1].isalnum():
+            valor = 0.7
+        else:
+            valor = 0.5
+        mejor = max(mejor, valor * (1.0 - 0.1 * posicion))
+    return mejor
+
+
+class IndiceNgramas:
+    # Listas de posteo n-grama -> ids (arrays ordenados de int32). Los
+    # candidatos salen de intersecar las listas de los n-gramas de la consulta
+    # y se confirman contra el texto.
+    def __init__(self, filas, n=N):
+        self.n = n
+        self.textos = {}
+        posteos = defaultdict(list)
+        for fila in filas:
+            id_, textos = fila[0], tuple((t or "").lower() for t in fila[1:])
+            self.textos[id_] = textos
+            for grama in set().union(*(_ngramas(t, n) for t in textos)):
+                posteos[grama].append(id_)
+        self.posteos = {
+            grama: np.unique(np.asarray(ids, dtype=np.int32))
+            for grama, ids in posteos.items()
+        }
+
+    def candidatos(self, q):
+        gramas = _ngramas(q.lower(), self.n)
+        if not gramas:
+            return np.fromiter(self.textos, dtype=np.int32)
+        listas = []
+        for grama in gramas:
+            ids = self.posteos.get(grama)
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            listas.append(ids)
+        listas.sort(key=len)
+        resultado = listas[0]
+        for ids in listas[1:]:
+            resultado = np.intersect1d(resultado, ids, assume_unique=True)
+            if not len(resultado):
+                break
+        return resultado
+
+    def buscar(self, q, candidatos=None):
+        # Lista de (id, puntaje) de las filas que contienen q, por relevancia
+        q = q.lower()
+        if candidatos is None:
+            candidatos = self.candidatos(q)
+        encontrados = []
+        for id_ in candidatos.tolist():
+            puntaje = _puntaje(self.textos[id_], q)
+            if puntaje:
+                encontrados.append((id_, puntaje))
+        encontrados.sort(key=lambda e: (-e[1], e[0]))
+        return encontrados
+
+
+_indices = {}
+_lock = threading.Lock()
+
+
+def _indice(db, entidad):
+    vigencia = (id(db.get_bind()), cache.version(entidad))
+    guardado = _indices.get(entidad)
+    if guardado and guardado[0] == vigencia:
+        return guardado[1]
+    with _lock:
+        guardado = _indices.get(entidad)
+        if guardado and guardado[0] == vigencia:
+            return guardado[1]
+        modelo, columnas = ENTIDADES[entidad]
+        filas = db.execute(select(modelo.id, *columnas).order_by(modelo.id))
+        indice = IndiceNgramas(filas)
+        _indices[entidad] = (vigencia, indice)
+        return indice
+
+
+def _usa_indice_local(db, busqueda):
+    return db.get_bind().dialect.name != "postgresql" and len(busqueda) >= N
+
+
+def filtro_ilike(entidad, busqueda):
+    columnas = ENTIDADES[entidad][1]
+    return or_(*(columna.ilike(f"%{busqueda}%") for columna in columnas))
+
+
+def filtro(db, entidad, busqueda):
+    # Criterio WHERE para la búsqueda, apto para combinar con orden y paginación
+    if not _usa_indice_local(db, busqueda):
+        return filtro_ilike(entidad, busqueda)
+    indice = _indice(db, entidad)
+    candidatos = indice.candidatos(busqueda)
+    if len(candidatos) > _MAX_CANDIDATOS:
+        return filtro_ilike(entidad, busqueda)
+    modelo = ENTIDADES[entidad][0]
+    return modelo.id.in_([id_ for id_, _ in indice.buscar(busqueda, candidatos)])
+
+
+def buscar(entidad, busqueda, limite=20, db=None):
+    # Lista de (fila, puntaje) ordenada por relevancia
+    modelo, columnas = ENTIDADES[entidad]
+    tabla = modelo.__table__
+    with obtener_sesion(db) as db:
+        if _usa_indice_local(db, busqueda):
+            encontrados = _indice(db, entidad).buscar(busqueda)[:limite]
+            ids = [id_ for id_, _ in encontrados]
+            filas = {
+                fila.id: fila
+                for fila in db.execute(select(*tabla.c).where(modelo.id.in_(ids)))
+            }
+            return [(filas[id_], puntaje) for id_, puntaje in encontrados]
+        if db.get_bind().dialect.name != "postgresql":
+            # Consultas de menos de N caracteres: ILIKE y ranking en Python
+            filas = db.execute(
+                select(*tabla.c)
+                .where(filtro_ilike(entidad, busqueda))
+                .order_by(modelo.id)
+                .limit(limite * 10)
+            ).all()
+            q = busqueda.lower()
+            encontrados = []
+            for fila in filas:
+                textos = tuple((getattr(fila, c.key) or "").lower() for c in columnas)
+                encontrados.append((fila, _puntaje(textos, q)))
+            encontrados.sort(key=lambda e: -e[1])
+            return encontrados[:limite]
+        puntaje = func.greatest(
+            *(func.word_similarity(busqueda, columna) for columna in columnas)
+        )
+        query = (
+            select(*tabla.c, puntaje.label("puntaje"))
+            .where(filtro_ilike(entidad, busqueda))
+            .order_by(puntaje.desc(), modelo.id)
+            .limit(limite)
+        )
+        return [(fila, float(fila.puntaje)) for fila in db.execute(query)]
@@ -0,0 +1,210 @@
+# cache.py
+# Caché de resultados de los servicios de lectura, compartida por todas las
+# sesiones de Streamlit del proceso. Cada tabla tiene un contador de versión
+# que los servicios de escritura incrementan; la clave de cada entrada incluye
+# las versiones de las tablas que lee, así que una escritura deja inaccesibles
+# exactamente las entradas afectadas. Además hay TTL y desalojo LRU.
+import copy
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import pandas as pd
+from sqlalchemy import Row
+from sqlalchemy.orm import object_session
+
+TTL = float(os.environ.get("CACHE_TTL", 60))
+MAX_ENTRADAS = int(os.environ.get("CACHE_MAX_ENTRADAS", 512))
+HABILITADA = os.environ.get("CACHE_DESACTIVADA", "").lower() not in ("1", "true")
+
+_versiones = defaultdict(int)
+# Escrituras que cambian o borran filas existentes (no solo altas), por tabla
+_modificaciones = defaultdict(int)
+_lock_versiones = threading.Lock()
+
+
+def version(tabla):
+    return _versiones[tabla]
+
+
+def modificaciones(tabla):
+    return _modificaciones[tabla]
+
+
+def invalidar(*tablas, solo_altas=False):
+    with _lock_versiones:
+        for tabla in tablas:
+            _versiones[tabla] += 1
+            if not solo_altas:
+                _modificaciones[tabla] += 1
+
+
+class CacheLRU:
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"aciertos": 0, "fallos": 0, "expirados": 0, "desalojos": 0}
+
+    def obtener(self, clave):
+        # (True, valor) si la clave está vigente; (False, None) si no
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._stats["fallos"] += 1
+                return False, None
+            valor, vence = entrada
+            if vence < time.monotonic():
+                del self._entradas[clave]
+                self._stats["expirados"] += 1
+                self._stats["fallos"] += 1
+                return False, None
+            self._entradas.move_to_end(clave)
+            self._stats["aciertos"] += 1
+            return True, valor
+
+    def guardar(self, clave, valor, ttl=None):
+        vence = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entradas[clave] = (valor, vence)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._stats["desalojos"] += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats, entradas=len(self._entradas))
+        consultas = stats["aciertos"] + stats["fallos"]
+        stats["tasa_aciertos"] = stats["aciertos"] / consultas if consultas else 0.0
+        return stats
+
+
+_cache = CacheLRU()
+
+
+def estadisticas():
+    return _cache.estadisticas()
+
+
+def limpiar():
+    _cache.limpiar()
+
+
+def _desacoplar(valor):
+    # Saca de su sesión los objetos ORM del resultado para que sigan siendo
+    # legibles cuando esa sesión haga commit o se cierre
+    if isinstance(valor, (list, tuple)):
+        for elemento in valor:
+            _desacoplar(elemento)
+    elif isinstance(valor, dict):
+        for elemento in valor.values():
+            _desacoplar(elemento)
+    elif hasattr(valor, "_sa_instance_state"):
+        sesion = object_session(valor)
+        if sesion is not None:
+            sesion.expunge(valor)
+
+
+def _copia(valor):
+    # Quien recibe el resultado puede modificarlo: se entrega una copia, salvo
+    # de las filas de SQLAlchemy, que son inmutables
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, list) and all(isinstance(v, Row) for v in valor):
+        return list(valor)
+    return copy.deepcopy(valor)
+
+
+def _clave(fn, tablas, args, kwargs):
+    # Clave de una llamada, o None si los argumentos no son hasheables
+    leidas = tablas[0](*args, **kwargs) if tablas and callable(tablas[0]) else tablas
+    clave = (
+        fn.__qualname__,
+        args,
+        tuple(sorted(kwargs.items())),
+        tuple(version(tabla) for tabla in leidas),
+    )
+    try:
+        hash(clave)
+    except TypeError:
+        return None
+    return clave
+
+
+def _guardar(clave, valor, ttl):
+    if isinstance(valor, dict) and "error" in valor:
+        return valor
+    _desacoplar(valor)
+    _cache.guardar(clave, valor, ttl)
+    return _copia(valor)
+
+
+def cacheado(*tablas, ttl=None):
+    # Decorador para servicios de lectura. `tablas` son las tablas que lee la
+    # función, o una función que las calcula a partir de los argumentos; sin
+    # tablas la entrada solo vence por TTL. Las llamadas con una sesión
+    # explícita (db=...) no usan la caché.
+    def decorador(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, db=None, **kwargs):
+            if db is not None or not HABILITADA:
+                return fn(*args, db=db, **kwargs)
+            clave = _clave(fn, tablas, args, kwargs)
+            if clave is None:
+                return fn(*args, **kwargs)
+            encontrado, valor = _cache.obtener(clave)
+            if encontrado:
+                return _copia(valor)
+            return _guardar(clave, fn(*args, **kwargs), ttl)
+
+        return envoltura
+
+    return decorador
+
+
+def cacheado_async(*tablas, ttl=None):
+    # Igual que cacheado, para corrutinas (servicios_async.py). La clave usa el
+    # nombre de la función, así que la versión asíncrona de un servicio
+    # comparte las entradas de la sincrónica.
+    def decorador(fn):
+        @functools.wraps(fn)
+        async def envoltura(*args, **kwargs):
+            if not HABILITADA:
+                return await fn(*args, **kwargs)
+            clave = _clave(fn, tablas, args, kwargs)
+            if clave is None:
+                return await fn(*args, **kwargs)
+            encontrado, valor = _cache.obtener(clave)
+            if encontrado:
+                return _copia(valor)
+            return _guardar(clave, await fn(*args, **kwargs), ttl)
+
+        return envoltura
+
+    return decorador
+
+
+def invalida(*tablas, solo_altas=False):
+    # Decorador para servicios de escritura: al terminar incrementa la versión
+    # de las tablas que modifica. solo_altas marca los que solo insertan filas
+    # nuevas, para que los índices en memoria (indice_referencias.py) se
+    # pongan al día sin recargar la tabla.
+    def decorador(fn):
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                invalidar(*tablas, solo_altas=solo_altas)
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,304 @@
+# comisiones.py
+# Liquidación de comisiones por período. Una venta no guarda su closer: la
+# asignación es la fila (venta, closer) de comisiones, cargada a mano
+# (services.crear_comision, sin regla) o con asignar (con la regla del
+# closer). Una corrida recalcula, con sentencias por conjuntos, las filas con
+# regla de las ventas del rango según la tabla de reglas (reglas_comision):
+# UPDATE ... FROM de las que siguen teniendo regla y DELETE de las que ya no.
+# Lo reembolsado de cada venta se descuenta de la comisión. Las filas
+# cargadas a mano no se tocan, y la corrida nunca agrega filas.
+import argparse
+from datetime import date
+
+from sqlalchemy import and_, case, delete, exists, func, insert, literal, or_, select
+from sqlalchemy import update
+from sqlalchemy.orm import aliased
+
+import resumen_ventas
+from cache import cacheado, invalida
+from consultas import leer_dataframe, rango_fechas
+from db import obtener_sesion
+from models import Comision, Curso, Devolucion, ReglaComision, Venta
+
+
+# --- Reglas ---
+@invalida("reglas_comision")
+def guardar_regla(closer, porcentaje, curso_id=None, db=None):
+    # Crea la regla (closer, curso) o actualiza su porcentaje
+    if not closer:
+        return {"error": "El closer es obligatorio"}
+    if not 0 <= porcentaje <= 100:
+        return {"error": "El porcentaje debe estar entre 0 y 100"}
+    with obtener_sesion(db) as db:
+        try:
+            if curso_id is not None and db.get(Curso, curso_id) is None:
+                return {"error": "Curso no encontrado"}
+            regla = db.scalar(
+                select(ReglaComision).where(
+                    ReglaComision.closer == closer,
+                    (
+                        ReglaComision.curso_id.is_(None)
+                        if curso_id is None
+                        else ReglaComision.curso_id == curso_id
+                    ),
+                )
+            )
+            if regla is None:
+                regla = ReglaComision(closer=closer, curso_id=curso_id)
+                db.add(regla)
+            regla.porcentaje = porcentaje
+            db.commit()
+            db.refresh(regla)
+            return regla
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+@invalida("reglas_comision", "comisiones", "ventas_diarias")
+def eliminar_regla(regla_id, db=None):
+    # Borra la regla y las comisiones calculadas con ella; el período afectado
+    # se vuelve a liquidar con las reglas que quedan
+    with obtener_sesion(db) as db:
+        try:
+            regla = db.get(ReglaComision, regla_id)
+            if not regla:
+                return {"error": "Regla no encontrada"}
+            desde, hasta = db.execute(
+                select(func.min(Venta.fecha_venta), func.max(Venta.fecha_venta))
+                .join(Comision, Comision.venta_id == Venta.id)
+                .where(Comision.regla_id == regla_id)
+            ).one()
+            quitadas = db.execute(
+                delete(Comision).where(Comision.regla_id == regla_id)
+            ).rowcount
+            db.delete(regla)
+            if quitadas:
+                resumen = resumen_ventas.reconstruir(desde.date(), hasta.date(), db=db)
+                if "error" in resumen:
+                    raise RuntimeError(resumen["error"])
+            db.commit()
+            return {
+                "message": f"Regla eliminada ({quitadas} comisiones quitadas)",
+                "periodo": (desde.date(), hasta.date()) if quitadas else None,
+            }
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+@cacheado("reglas_comision")
+def obtener_reglas(db=None):
+    with obtener_sesion(db) as db:
+        return leer_dataframe(
+            db,
+            select(
+                ReglaComision.id,
+                ReglaComision.closer,
+                ReglaComision.curso_id,
+                ReglaComision.porcentaje,
+            ).order_by(ReglaComision.closer, ReglaComision.curso_id),
+        )
+
+
+# --- Corrida de liquidación ---
+def _calculo(query, closer):
+    # Agrega a `query` (un select sobre Venta) la regla de `closer` para el
+    # curso de la venta o, si no tiene una, su regla general, y los importes:
+    # regla_id, porcentaje, monto_comision y ajuste_reembolso
+    especifica = aliased(ReglaComision)
+    reembolsos = (
+        select(
+            Devolucion.venta_id,
+            func.sum(Devolucion.monto_reembolso).label("total"),
+        )
+        .group_by(Devolucion.venta_id)
+        .subquery()
+    )
+    aplica = and_(
+        ReglaComision.closer == closer,
+        or_(
+            ReglaComision.curso_id == Venta.curso_id,
+            and_(
+                ReglaComision.curso_id.is_(None),
+                ~exists().where(
+                    especifica.closer == ReglaComision.closer,
+                    especifica.curso_id == Venta.curso_id,
+                ),
+            ),
+        ),
+    )
+    reembolsado = func.coalesce(reembolsos.c.total, 0.0)
+    reembolsado = case((reembolsado > Venta.monto, Venta.monto), else_=reembolsado)
+    tasa = ReglaComision.porcentaje / 100.0
+    return (
+        query.add_columns(
+            ReglaComision.id.label("regla_id"),
+            ReglaComision.porcentaje.label("porcentaje"),
+            ((Venta.monto - reembolsado) * tasa).label("monto_comision"),
+            (reembolsado * tasa).label("ajuste_reembolso"),
+        )
+        .join(ReglaComision, aplica)
+        .outerjoin(reembolsos, reembolsos.c.venta_id == Venta.id)
+    )
+
+
+@invalida("comisiones", "ventas_diarias")
+def asignar(venta_id, closer, db=None):
+    # Registra al closer en la venta con la comisión de su regla; las
+    # corridas de liquidar la recalculan
+    if not closer:
+        return {"error": "El closer es obligatorio"}
+    with obtener_sesion(db) as db:
+        try:
+            if db.scalar(
+                select(
+                    exists().where(
+                        Comision.venta_id == venta_id, Comision.closer == closer
+                    )
+                )
+            ):
+                return {"error": "La venta ya tiene una comisión de ese closer"}
+            calculo = _calculo(
+                select(Venta.id, literal(closer)).where(Venta.id == venta_id),
+                literal(closer),
+            ).add_columns(literal(0.0))
+            comision = db.execute(
+                insert(Comision)
+                .from_select(
+                    [
+                        "venta_id",
+                        "closer",
+                        "regla_id",
+                        "porcentaje",
+                        "monto_comision",
+                        "ajuste_reembolso",
+                        "ajuste_manual",
+                    ],
+                    calculo,
+                )
+                .returning(*Comision.__table__.c)
+            ).first()
+            if comision is None:
+                db.rollback()
+                if db.get(Venta, venta_id) is None:
+                    return {"error": "Venta no encontrada"}
+                return {
+                    "error": f"{closer} no tiene una regla para el curso de la venta"
+                }
+            resumen_ventas.acumular(
+                db,
+                resumen_ventas.dia_de_venta(venta_id),
+                resumen_ventas.curso_de_venta(venta_id),
+                comisiones=comision.monto_comision,
+            )
+            db.commit()
+            return comision
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+@invalida("comisiones", "ventas_diarias")
+def liquidar(fecha_desde, fecha_hasta, closer=None, db=None):
+    # Recalcula las comisiones con regla de las ventas del rango (opcionalmente
+    # de un solo closer) y actualiza el resumen diario en la misma transacción
+    if fecha_desde > fecha_hasta:
+        return {"error": "La fecha inicial es posterior a la final"}
+    with obtener_sesion(db) as db:
+        try:
+            con_regla = [
+                Comision.regla_id.isnot(None),
+                Comision.venta_id.in_(
+                    select(Venta.id).where(
+                        *rango_fechas(Venta.fecha_venta, fecha_desde, fecha_hasta)
+                    )
+                ),
+            ]
+            if closer:
+                con_regla.append(Comision.closer == closer)
+            # Solo los pares (venta, closer) que ya están en comisiones
+            existentes = aliased(Comision)
+            calculo = _calculo(
+                select(existentes.id.label("comision_id"))
+                .select_from(existentes)
+                .join(Venta, Venta.id == existentes.venta_id)
+                .where(
+                    existentes.regla_id.isnot(None),
+                    *rango_fechas(Venta.fecha_venta, fecha_desde, fecha_hasta),
+                ),
+                existentes.closer,
+            ).subquery("calculo")
+            eliminadas = db.execute(
+                delete(Comision).where(
+                    *con_regla, Comision.id.not_in(select(calculo.c.comision_id))
+                )
+            ).rowcount
+            actualizadas = db.execute(
+                update(Comision)
+                .where(*con_regla, Comision.id == calculo.c.comision_id)
+                .values(
+                    regla_id=calculo.c.regla_id,
+                    porcentaje=calculo.c.porcentaje,
+                    monto_comision=calculo.c.monto_comision,
+                    ajuste_reembolso=calculo.c.ajuste_reembolso,
+                )
+            ).rowcount
+            # Las comisiones se imputan al día de la venta: alcanza con
+            # recalcular el resumen del mismo rango
+            resumen = resumen_ventas.reconstruir(fecha_desde, fecha_hasta, db=db)
+            if "error" in resumen:
+                raise RuntimeError(resumen["error"])
+            db.commit()
+            return {"actualizadas": actualizadas, "eliminadas": eliminadas}
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+@cacheado("comisiones", "ventas")
+def resumen_pagos(fecha_desde, fecha_hasta, db=None):
+    # Total a pagar por closer por las ventas del rango (incluye las
+    # comisiones cargadas a mano)
+    reembolso = func.coalesce(Comision.ajuste_reembolso, 0.0)
+    manual = func.coalesce(Comision.ajuste_manual, 0.0)
+    with obtener_sesion(db) as db:
+        return leer_dataframe(
+            db,
+            select(
+                Comision.closer,
+                func.count(func.distinct(Comision.venta_id)).label("ventas"),
+                func.sum(Comision.monto_comision + reembolso - manual).label(
+                    "comision_bruta"
+                ),
+                func.sum(reembolso).label("descuento_reembolsos"),
+                func.sum(manual).label("ajustes_manuales"),
+                func.sum(Comision.monto_comision).label("a_pagar"),
+            )
+            .join(Venta, Venta.id == Comision.venta_id)
+            .where(*rango_fechas(Venta.fecha_venta, fecha_desde, fecha_hasta))
+            .group_by(Comision.closer)
+            .order_by(Comision.closer),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liquidación de comisiones")
+    parser.add_argument("comando", choices=["liquidar", "resumen"])
+    parser.add_argument(
+        "--desde", type=date.fromisoformat, required=True, help="AAAA-MM-DD"
+    )
+    parser.add_argument(
+        "--hasta", type=date.fromisoformat, required=True, help="AAAA-MM-DD"
+    )
+    parser.add_argument("--closer", help="Liquidar solo este closer")
+    args = parser.parse_args()
+    if args.comando == "liquidar":
+        resultado = liquidar(args.desde, args.hasta, args.closer)
+        if "error" in resultado:
+            raise SystemExit(resultado["error"])
+        print(
+            f"Comisiones actualizadas: {resultado['actualizadas']}, "
+            f"eliminadas: {resultado['eliminadas']}"
+        )
+    print(resumen_pagos(args.desde, args.hasta).to_string(index=False))
@@ -0,0 +1,142 @@
+# consultas.py
+# Piezas de SQL compartidas por los servicios: chequeos masivos, inserts con
+# ON CONFLICT y filtros/agrupaciones por fecha portables entre PostgreSQL y SQLite.
+from datetime import datetime, time as dt_time, timedelta
+
+import pandas as pd
+from sqlalchemy import Date, Integer, cast, extract, func, insert, select
+
+# SQLite admite como máximo 32766 parámetros por sentencia
+LIMITE_PARAMETROS = 30000
+
+GRANULARIDADES = ("dia", "semana", "mes")
+
+
+def insert_dialecto(db, modelo):
+    # insert() del dialecto (con on_conflict_*) en PostgreSQL y SQLite
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as insert_pg
+
+        return insert_pg(modelo)
+    if dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+        return insert_sqlite(modelo)
+    return None
+
+
+def valores_existentes(db, columna, valores):
+    # Devuelve el subconjunto de `valores` presente en `columna`. En PostgreSQL
+    # es una sola consulta; en otros motores se parte en bloques de parámetros.
+    valores = list(valores)
+    if not valores:
+        return set()
+    if db.get_bind().dialect.name == "postgresql":
+        paso = len(valores)
+    else:
+        paso = LIMITE_PARAMETROS
+    existentes = set()
+    for i in range(0, len(valores), paso):
+        existentes.update(
+            db.scalars(select(columna).where(columna.in_(valores[i : i + paso])))
+        )
+    return existentes
+
+
+def insert_ignorando_conflictos(db, modelo, columnas_unicas):
+    # INSERT ... ON CONFLICT DO NOTHING en PostgreSQL y SQLite
+    stmt = insert_dialecto(db, modelo)
+    if stmt is None:
+        return insert(modelo)
+    return stmt.on_conflict_do_nothing(index_elements=columnas_unicas)
+
+
+def es_violacion_unica(error, columna):
+    # Si el IntegrityError viene de la restricción UNIQUE de `columna`. El texto
+    # del error es lo único común a SQLite ("UNIQUE constraint failed:
+    # cursos.nombre") y PostgreSQL ("duplicate key value violates unique
+    # constraint ... Key (nombre)=...").
+    mensaje = str(error.orig).lower()
+    return "unique" in mensaje and columna.name in mensaje
+
+
+def truncar_fecha(dialecto, columna, granularidad):
+    # Inicio del período (día, semana ISO o mes) calculado en la base
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad no soportada: {granularidad}")
+    if dialecto == "postgresql":
+        unidad = {"dia": "day", "semana": "week", "mes": "month"}[granularidad]
+        return func.date_trunc(unidad, columna)
+    if granularidad == "dia":
+        return func.date(columna)
+    if granularidad == "semana":
+        return func.date(columna, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", columna)
+
+
+def numero_mes(columna):
+    # Meses desde el año 0 (año * 12 + mes - 1): restando dos se obtiene la
+    # distancia en meses, igual en PostgreSQL y SQLite
+    return (
+        cast(extract("year", columna), Integer) * 12
+        + cast(extract("month", columna), Integer)
+        - 1
+    )
+
+
+def mes_de_numero(numeros):
+    # Inverso de numero_mes para una Series: primer día de cada mes
+    numeros = numeros.astype("int64")
+    return pd.to_datetime(
+        pd.DataFrame({"year": numeros // 12, "month": numeros % 12 + 1, "day": 1})
+    )
+
+
+def rango_fechas(columna, fecha_desde=None, fecha_hasta=None):
+    # Filtros inclusivos; una fecha sin hora en `fecha_hasta` cubre el día completo
+    filtros = []
+    if isinstance(columna.type, Date):
+        if fecha_desde:
+            filtros.append(columna >= a_fecha(fecha_desde))
+        if fecha_hasta:
+            filtros.append(columna <= a_fecha(fecha_hasta))
+        return filtros
+    if fecha_desde:
+        if not isinstance(fecha_desde, datetime):
+            fecha_desde = datetime.combine(fecha_desde, dt_time.min)
+        filtros.append(columna >= fecha_desde)
+    if fecha_hasta:
+        if not isinstance(fecha_hasta, datetime):
+            fecha_hasta = datetime.combine(fecha_hasta + timedelta(days=1), dt_time.min)
+            filtros.append(columna < fecha_hasta)
+        else:
+            filtros.append(columna <= fecha_hasta)
+    return filtros
+
+
+def a_fecha(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def leer_dataframe(db, query, tipos=None):
+    # DataFrame armado columna a columna desde el resultado de un select() de
+    # Core: sin instancias ORM ni un dict por fila. `tipos` fija el dtype de
+    # cada columna (category, datetime64, int32...).
+    return dataframe_de_resultado(db.execute(query), tipos)
+
+
+def dataframe_de_resultado(resultado, tipos=None):
+    # Igual que leer_dataframe, para un resultado ya ejecutado (por ejemplo,
+    # por una conexión asíncrona)
+    nombres = list(resultado.keys())
+    filas = resultado.all()
+    columnas = zip(*filas) if filas else ([] for _ in nombres)
+    tipos = tipos or {}
+    return pd.DataFrame(
+        {
+            nombre: pd.Series(valores, dtype=tipos.get(nombre))
+            for nombre, valores in zip(nombres, columnas)
+        },
+        columns=nombres,
+    )
@@ -0,0 +1,204 @@
+# distribucion.py
+# Reparto mensual de la utilidad neta (ventas brutas - reembolsos - comisiones,
+# leídas del resumen ventas_diarias) entre los socios según su porcentaje de
+# participación. El reparto se hace en centavos enteros con el método del
+# mayor resto, así que la suma de los montos de un mes es exactamente su
+# utilidad. Un mes se congela con cerrar_periodo, que lo guarda en la tabla
+# distribuciones; los meses sin cerrar se calculan cada vez desde el resumen,
+# así que una liquidación de comisiones o un reembolso tardío los actualiza.
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func, or_, select
+
+from cache import cacheado, invalida
+from consultas import insert_ignorando_conflictos, leer_dataframe, rango_fechas
+from consultas import truncar_fecha
+from db import obtener_sesion
+from models import Distribucion, Socio, VentaDiaria
+
+COLUMNAS = ["periodo", "socio_id", "socio", "porcentaje", "utilidad_periodo", "monto"]
+# Los porcentajes se llevan a enteros con esta escala (4 decimales)
+_ESCALA_PESOS = 10000
+
+
+def repartir(centavos, pesos):
+    # Matriz (períodos x socios) de centavos. Cada fila suma exactamente
+    # centavos[i]: se asigna la parte entera de cada cuota y los centavos que
+    # sobran van a las cuotas con mayor fracción (empates: orden de los socios).
+    centavos = np.asarray(centavos, dtype=np.int64)
+    pesos = np.asarray(pesos, dtype=np.int64)
+    numeradores = centavos[:, None] * pesos[None, :]
+    total_pesos = pesos.sum()
+    base = np.floor_divide(numeradores, total_pesos)
+    restos = numeradores - base * total_pesos
+    faltantes = centavos - base.sum(axis=1)
+    orden = np.argsort(-restos, axis=1, kind="stable")
+    rangos = np.empty_like(orden)
+    np.put_along_axis(rangos, orden, np.arange(len(pesos))[None, :], axis=1)
+    return base + (rangos < faltantes[:, None])
+
+
+def utilidad_por_mes(db, fecha_desde=None, fecha_hasta=None, excluir=()):
+    # Utilidad de cada mes del rango, sin leer los meses de `excluir`: solo
+    # se recorren los tramos de ventas_diarias entre meses excluidos
+    dialecto = db.get_bind().dialect.name
+    periodo = truncar_fecha(dialecto, VentaDiaria.fecha, "mes").label("periodo")
+    query = select(
+        periodo,
+        func.sum(VentaDiaria.ventas_brutas).label("ventas_brutas"),
+        func.sum(VentaDiaria.reembolsos).label("reembolsos"),
+        func.sum(VentaDiaria.comisiones).label("comisiones"),
+    ).where(*rango_fechas(VentaDiaria.fecha, fecha_desde, fecha_hasta))
+    tramos = _tramos_sin_excluir(excluir)
+    if tramos:
+        query = query.where(
+            or_(*(and_(*rango_fechas(VentaDiaria.fecha, a, b)) for a, b in tramos))
+        )
+    df = leer_dataframe(db, query.group_by(periodo).order_by(periodo))
+    df["periodo"] = pd.to_datetime(df["periodo"]).dt.date
+    df["utilidad_neta"] = df["ventas_brutas"] - df["reembolsos"] - df["comisiones"]
+    return df
+
+
+def _tramos_sin_excluir(excluir):
+    # Rangos de fechas [desde, hasta] (hasta None = sin límite) que quedan
+    # entre los meses excluidos
+    excluidos = sorted(set(excluir))
+    if not excluidos:
+        return []
+    tramos = [(None, excluidos[0] - timedelta(days=1))]
+    for mes, siguiente in zip(excluidos, excluidos[1:] + [None]):
+        inicio = _mes_siguiente(mes)
+        if siguiente is None:
+            tramos.append((inicio, None))
+        elif inicio < siguiente:
+            tramos.append((inicio, siguiente - timedelta(days=1)))
+    return tramos
+
+
+def _mes_siguiente(mes):
+    return (mes.replace(day=1) + timedelta(days=31)).replace(day=1)
+
+
+def _calcular(utilidades, socios):
+    # Reparto de los meses de `utilidades` entre `socios` (DataFrames)
+    centavos = np.round(utilidades["utilidad_neta"].to_numpy() * 100).astype(np.int64)
+    pesos = np.round(socios["porcentaje_participacion"].to_numpy() * _ESCALA_PESOS)
+    montos = repartir(centavos, pesos.astype(np.int64))
+    meses, cantidad = len(utilidades.index), len(socios.index)
+    return pd.DataFrame(
+        {
+            "periodo": np.repeat(utilidades["periodo"].to_numpy(), cantidad),
+            "socio_id": np.tile(socios["id"].to_numpy(), meses),
+            "socio": np.tile(socios["nombre"].to_numpy(), meses),
+            "porcentaje": np.tile(socios["porcentaje_participacion"].to_numpy(), meses),
+            "utilidad_periodo": np.repeat(centavos / 100, cantidad),
+            "monto": montos.ravel() / 100,
+        }
+    )
+
+
+def _mes_actual():
+    return datetime.now().date().replace(day=1)
+
+
+def _leer_socios(db):
+    # DataFrame de socios, o {"error": ...} si no se pueden repartir
+    socios = leer_dataframe(
+        db,
+        select(Socio.id, Socio.nombre, Socio.porcentaje_participacion).order_by(
+            Socio.id
+        ),
+    )
+    if socios.empty:
+        return {"error": "No hay socios registrados"}
+    if (socios["porcentaje_participacion"] <= 0).any():
+        return {"error": "Todos los socios deben tener participación positiva"}
+    total = socios["porcentaje_participacion"].sum()
+    if abs(total - 100) > 1e-6:
+        return {
+            "error": f"Las participaciones de los socios suman {total:g}%; "
+            "deben sumar 100%"
+        }
+    return socios
+
+
+def _leer_cerrados(db, fecha_desde=None, fecha_hasta=None):
+    guardadas = leer_dataframe(
+        db,
+        select(*(getattr(Distribucion, col) for col in COLUMNAS))
+        .where(*rango_fechas(Distribucion.periodo, fecha_desde, fecha_hasta))
+        .order_by(Distribucion.periodo, Distribucion.socio_id),
+    )
+    guardadas["periodo"] = pd.to_datetime(guardadas["periodo"]).dt.date
+    return guardadas
+
+
+@cacheado("ventas_diarias", "socios", "distribuciones")
+def calcular_distribucion(fecha_desde=None, fecha_hasta=None, db=None):
+    # Una fila por (mes, socio) con la columna "cerrado". Los meses cerrados
+    # se leen de distribuciones; los demás se calculan desde ventas_diarias.
+    # No escribe: los meses se guardan con cerrar_periodo.
+    if fecha_desde:
+        fecha_desde = fecha_desde.replace(day=1)
+    if fecha_hasta:
+        fecha_hasta = _mes_siguiente(fecha_hasta) - timedelta(days=1)
+    with obtener_sesion(db) as db:
+        cerrados = _leer_cerrados(db, fecha_desde, fecha_hasta)
+        abiertos = utilidad_por_mes(
+            db, fecha_desde, fecha_hasta, excluir=set(cerrados["periodo"])
+        )
+        if abiertos.empty:
+            socios = None
+        else:
+            socios = _leer_socios(db)
+            if isinstance(socios, dict):
+                return socios
+    partes = [cerrados.assign(cerrado=True)]
+    if socios is not None:
+        partes.append(_calcular(abiertos, socios).assign(cerrado=False))
+    df = pd.concat([p for p in partes if not p.empty] or partes, ignore_index=True)
+    return df.sort_values(["periodo", "socio_id"], ignore_index=True)
+
+
+@invalida("distribuciones")
+def cerrar_periodo(mes, db=None):
+    # Congela el reparto del mes (de un mes ya terminado) en distribuciones:
+    # desde entonces se lee de ahí aunque cambie ventas_diarias
+    mes = mes.replace(day=1)
+    if mes >= _mes_actual():
+        return {"error": "Solo se pueden cerrar meses terminados"}
+    with obtener_sesion(db) as db:
+        try:
+            if not _leer_cerrados(db, mes, mes).empty:
+                return {"error": f"El mes {mes:%Y-%m} ya está cerrado"}
+            socios = _leer_socios(db)
+            if isinstance(socios, dict):
+                return socios
+            utilidades = utilidad_por_mes(
+                db, mes, _mes_siguiente(mes) - timedelta(days=1)
+            )
+            if utilidades.empty:
+                utilidades = pd.DataFrame({"periodo": [mes], "utilidad_neta": [0.0]})
+            filas = _calcular(utilidades, socios)
+            # Con ON CONFLICT: si otro proceso lo cerró a la vez queda su reparto
+            db.execute(
+                insert_ignorando_conflictos(db, Distribucion, ["periodo", "socio_id"]),
+                filas.to_dict("records"),
+            )
+            db.commit()
+            return filas
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+def resumen_por_socio(distribucion):
+    # Totales del rango por socio a partir de calcular_distribucion
+    return (
+        distribucion.groupby(["socio_id", "socio"], as_index=False)["monto"]
+        .sum()
+        .round(2)
+    )
@@ -0,0 +1,212 @@
+# exportacion.py
+# Exportación por lotes de cursos, clientes y ventas. Las filas se leen con un
+# cursor del lado del servidor (yield_per) y se escriben a medida que llegan,
+# así que la memoria no depende de la cantidad de filas exportadas.
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import Date, DateTime, Float, Integer, func, select
+
+import buscador
+from consultas import rango_fechas
+from db import obtener_sesion
+from models import Curso, Cliente, Venta
+
+FORMATOS = ("csv", "excel", "parquet")
+EXTENSIONES = {"csv": ".csv", "excel": ".xlsx", "parquet": ".parquet"}
+TAMANO_LOTE = 5000
+# Límite de filas de una hoja de Excel (sin contar el encabezado)
+_FILAS_POR_HOJA = 1048575
+
+ENTIDADES = {
+    "cursos": (
+        Curso.fecha_creacion,
+        [Curso.id, Curso.nombre, Curso.descripcion, Curso.precio, Curso.fecha_creacion],
+    ),
+    "clientes": (
+        Cliente.fecha_creacion,
+        [
+            Cliente.id,
+            Cliente.nombre,
+            Cliente.email,
+            Cliente.telefono,
+            Cliente.pais,
+            Cliente.fuente_referencia,
+            Cliente.fecha_creacion,
+        ],
+    ),
+    "ventas": (
+        Venta.fecha_venta,
+        [Venta.id, Venta.cliente_id, Venta.curso_id, Venta.monto, Venta.fecha_venta],
+    ),
+}
+
+
+def _filtros(db, entidad, busqueda=None, fecha_desde=None, fecha_hasta=None):
+    filtros = rango_fechas(ENTIDADES[entidad][0], fecha_desde, fecha_hasta)
+    if busqueda:
+        filtros.append(buscador.filtro(db, entidad, busqueda))
+    return filtros
+
+
+def contar(entidad, busqueda=None, fecha_desde=None, fecha_hasta=None, db=None):
+    # Filas que exportaría leer_lotes con los mismos filtros
+    with obtener_sesion(db) as db:
+        filtros = _filtros(db, entidad, busqueda, fecha_desde, fecha_hasta)
+        return db.execute(
+            select(func.count())
+            .select_from(ENTIDADES[entidad][1][0].class_)
+            .where(*filtros)
+        ).scalar()
+
+
+def leer_lotes(
+    entidad,
+    busqueda=None,
+    fecha_desde=None,
+    fecha_hasta=None,
+    tamano_lote=TAMANO_LOTE,
+    db=None,
+):
+    # Genera DataFrames de hasta `tamano_lote` filas, ordenados por id
+    columnas = ENTIDADES[entidad][1]
+    with obtener_sesion(db) as db:
+        query = select(*columnas).where(
+            *_filtros(db, entidad, busqueda, fecha_desde, fecha_hasta)
+        )
+        resultado = db.execute(
+            query.order_by(columnas[0]).execution_options(yield_per=tamano_lote)
+        )
+        nombres = list(resultado.keys())
+        vacio = True
+        for particion in resultado.partitions():
+            vacio = False
+            yield pd.DataFrame(particion, columns=nombres)
+        if vacio:
+            yield pd.DataFrame(columns=nombres)
+
+
+def exportar_csv(entidad, **filtros):
+    # Generador de bloques de bytes CSV (el primero incluye el encabezado)
+    return _bloques_csv(leer_lotes(entidad, **filtros))
+
+
+def _bloques_csv(lotes):
+    encabezado = True
+    for lote in lotes:
+        yield lote.to_csv(index=False, header=encabezado).encode("utf-8")
+        encabezado = False
+
+
+def _con_progreso(lotes, progreso, total):
+    # Informa las filas escritas después de cada lote
+    filas = 0
+    for lote in lotes:
+        yield lote
+        filas += len(lote.index)
+        progreso(filas, total)
+
+
+def exportar_a_archivo(entidad, formato="csv", ruta=None, progreso=None, **filtros):
+    # Escribe la exportación completa en `ruta` (o en un archivo temporal) y
+    # devuelve la ruta, o {"error": ...}. progreso(filas, total) se llama
+    # después de cada lote.
+    if entidad not in ENTIDADES:
+        return {"error": f"Entidad no exportable: {entidad}"}
+    if formato not in FORMATOS:
+        return {"error": f"Formato no soportado: {formato}"}
+    if ruta is None:
+        descriptor, ruta = tempfile.mkstemp(
+            prefix=f"{entidad}_", suffix=EXTENSIONES[formato]
+        )
+        os.close(descriptor)
+    try:
+        lotes = leer_lotes(entidad, **filtros)
+        if progreso is not None:
+            lotes = _con_progreso(lotes, progreso, contar(entidad, **filtros))
+        if formato == "csv":
+            with open(ruta, "wb") as archivo:
+                for bloque in _bloques_csv(lotes):
+                    archivo.write(bloque)
+        elif formato == "excel":
+            _escribir_excel(ruta, entidad, lotes)
+        else:
+            _escribir_parquet(ruta, ENTIDADES[entidad][1], lotes)
+    except ImportError as e:
+        os.remove(ruta)
+        return {"error": f"Falta la dependencia para exportar a {formato}: {e.name}"}
+    except Exception as e:
+        os.remove(ruta)
+        return {"error": str(e)}
+    return ruta
+
+
+def _escribir_excel(ruta, entidad, lotes):
+    # xlsxwriter en modo constant_memory escribe cada fila y la libera
+    import xlsxwriter
+
+    libro = xlsxwriter.Workbook(
+        ruta, {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"}
+    )
+    try:
+        hoja = None
+        fila = 0
+        for lote in lotes:
+            for registro in lote.itertuples(index=False, name=None):
+                if hoja is None or fila > _FILAS_POR_HOJA:
+                    numero = len(libro.worksheets()) + 1
+                    nombre = entidad.capitalize()
+                    hoja = libro.add_worksheet(
+                        nombre if numero == 1 else f"{nombre} {numero}"
+                    )
+                    hoja.write_row(0, 0, list(lote.columns))
+                    fila = 1
+                hoja.write_row(fila, 0, [_valor_excel(v) for v in registro])
+                fila += 1
+            if hoja is None:
+                hoja = libro.add_worksheet(entidad.capitalize())
+                hoja.write_row(0, 0, list(lote.columns))
+    finally:
+        libro.close()
+
+
+def _valor_excel(valor):
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    return valor
+
+
+def esquema_arrow(columnas):
+    # Esquema Arrow a partir de los tipos de las columnas del modelo
+    import pyarrow as pa
+
+    tipos = {
+        Integer: pa.int64(),
+        Float: pa.float64(),
+        DateTime: pa.timestamp("us"),
+        Date: pa.date32(),
+    }
+    campos = []
+    for columna in columnas:
+        tipo = next(
+            (t for clase, t in tipos.items() if isinstance(columna.type, clase)),
+            pa.string(),
+        )
+        campos.append(pa.field(columna.key, tipo))
+    return pa.schema(campos)
+
+
+def _escribir_parquet(ruta, columnas, lotes):
+    # Un row group por lote
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = esquema_arrow(columnas)
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for lote in lotes:
+            escritor.write_table(
+                pa.Table.from_pandas(lote, schema=esquema, preserve_index=False)
+            )
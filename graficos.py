@@ -0,0 +1,168 @@
+# graficos.py
+# Gráficos de series largas: antes de armar la figura, cada serie se reduce a
+# un presupuesto de puntos con LTTB (Largest-Triangle-Three-Buckets) o con el
+# mínimo y el máximo de cada intervalo, en NumPy, y las figuras densas usan
+# trazas WebGL (scattergl). Así el JSON que viaja al navegador no crece con la
+# cantidad de filas.
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+PRESUPUESTO_PUNTOS = int(os.environ.get("GRAFICOS_PUNTOS", 2000))
+# Cantidad de puntos dibujados a partir de la cual se usa WebGL
+UMBRAL_WEBGL = int(os.environ.get("GRAFICOS_UMBRAL_WEBGL", 1000))
+METODOS = ("lttb", "minmax")
+# Puntos mínimos por serie, para que ninguna quede reducida a una recta
+MINIMO_POR_SERIE = 4
+
+
+def _a_numeros(valores):
+    # Eje x como float64; las fechas en nanosegundos desde la primera
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        numeros = np.asarray(valores, dtype="datetime64[ns]").astype(np.int64)
+    else:
+        numeros = np.asarray(valores, dtype=np.float64)
+    numeros = numeros.astype(np.float64)
+    return numeros - numeros.min() if len(numeros) else numeros
+
+
+def lttb(x, y, n):
+    # Índices de los n puntos que elige LTTB; x ordenado de menor a mayor. El
+    # primer y el último punto se conservan; el resto se reparte en n - 2
+    # intervalos y de cada uno se toma el punto que forma el triángulo más
+    # grande con el elegido antes y el promedio del intervalo siguiente.
+    largo = len(x)
+    if n >= largo or n < 3:
+        return np.arange(largo)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    bordes = np.linspace(1, largo - 1, n - 1).astype(np.int64)
+    tamanos = np.diff(bordes)
+    acumulado_x = np.concatenate(([0.0], np.cumsum(x)))
+    acumulado_y = np.concatenate(([0.0], np.cumsum(y)))
+    promedio_x = (acumulado_x[bordes[1:]] - acumulado_x[bordes[:-1]]) / tamanos
+    promedio_y = (acumulado_y[bordes[1:]] - acumulado_y[bordes[:-1]]) / tamanos
+    siguiente_x = np.append(promedio_x[1:], x[-1])
+    siguiente_y = np.append(promedio_y[1:], y[-1])
+
+    elegidos = np.empty(n, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, largo - 1
+    anterior = 0
+    for i in range(n - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        ax, ay = x[anterior], y[anterior]
+        areas = np.abs(
+            (ax - siguiente_x[i]) * (y[inicio:fin] - ay)
+            - (ax - x[inicio:fin]) * (siguiente_y[i] - ay)
+        )
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def minmax(y, n):
+    # Índices del mínimo y el máximo de cada uno de n // 2 intervalos del
+    # mismo largo, más el primer y el último punto; conserva los picos
+    largo = len(y)
+    if n >= largo or n < 4:
+        return np.arange(largo)
+    y = np.asarray(y, dtype=np.float64)
+    tamano = -(-largo // (n // 2))
+    intervalos = -(-largo // tamano)
+    relleno = intervalos * tamano - largo
+    # Los NaN y el relleno no pueden ser ni mínimo ni máximo
+    bajos = np.concatenate((np.where(np.isnan(y), np.inf, y), np.full(relleno, np.inf)))
+    altos = np.concatenate(
+        (np.where(np.isnan(y), -np.inf, y), np.full(relleno, -np.inf))
+    )
+    base = np.arange(intervalos) * tamano
+    indices = np.concatenate(
+        (
+            [0, largo - 1],
+            base + bajos.reshape(intervalos, tamano).argmin(axis=1),
+            base + altos.reshape(intervalos, tamano).argmax(axis=1),
+        )
+    )
+    return np.unique(np.minimum(indices, largo - 1))
+
+
+def reducir(df, x, y, color=None, puntos=PRESUPUESTO_PUNTOS, metodo="lttb"):
+    # Filas de df que se dibujan: a lo sumo unos `puntos` en total, repartidos
+    # entre las series (una por valor de `color`) según su largo. Se devuelven
+    # filas originales, así que las demás columnas (hover) siguen valiendo.
+    if metodo not in METODOS:
+        raise ValueError(f"Método de reducción no soportado: {metodo}")
+    total = len(df.index)
+    if total <= puntos:
+        return df
+    # Un solo ordenamiento por (serie, x); cada serie es un tramo contiguo
+    orden = [x] if color is None else [color, x]
+    df = df.sort_values(orden, kind="stable")
+    if color is None:
+        bordes = np.array([0, total])
+    else:
+        codigos = pd.factorize(df[color])[0]
+        bordes = np.concatenate(([0], np.flatnonzero(np.diff(codigos)) + 1, [total]))
+    xs = _a_numeros(df[x])
+    ys = df[y].to_numpy(dtype=np.float64)
+    elegidos = []
+    for inicio, fin in zip(bordes[:-1], bordes[1:]):
+        cupo = max(puntos * (fin - inicio) // total, MINIMO_POR_SERIE)
+        if fin - inicio <= cupo:
+            elegidos.append(np.arange(inicio, fin))
+        elif metodo == "lttb":
+            elegidos.append(inicio + lttb(xs[inicio:fin], ys[inicio:fin], cupo))
+        else:
+            elegidos.append(inicio + minmax(ys[inicio:fin], cupo))
+    return df.iloc[np.concatenate(elegidos)]
+
+
+def figura_lineas(
+    df, x, y, color=None, puntos=PRESUPUESTO_PUNTOS, metodo="lttb", **opciones
+):
+    # (figura de px.line sobre la serie reducida, métricas). Las métricas
+    # incluyen el tiempo de reducirla y armarla; el tamaño del JSON se mide en
+    # benchmarks/bench_graficos.py, para no serializar dos veces en cada rerun.
+    inicio = time.perf_counter()
+    reducido = reducir(df, x, y, color, puntos, metodo)
+    webgl = len(reducido.index) > UMBRAL_WEBGL
+    fig = px.line(
+        reducido,
+        x=x,
+        y=y,
+        color=color,
+        render_mode="webgl" if webgl else "svg",
+        **opciones,
+    )
+    return fig, {
+        "filas": len(df.index),
+        "puntos": len(reducido.index),
+        "metodo": metodo if len(reducido.index) < len(df.index) else None,
+        "webgl": webgl,
+        "ms": (time.perf_counter() - inicio) * 1000,
+    }
+
+
+def rango_seleccionado(caja):
+    # (desde, hasta) como fechas de una selección de caja de st.plotly_chart.
+    # Plotly manda las fechas como texto; los números son milisegundos.
+    valores = caja["x"]
+    if all(isinstance(v, (int, float)) for v in valores):
+        extremos = pd.to_datetime(valores, unit="ms")
+    else:
+        extremos = pd.to_datetime(valores, format="mixed")
+    return extremos.min().date(), extremos.max().date()
+
+
+def describir(metricas):
+    # Texto corto para mostrar debajo del gráfico
+    if metricas["metodo"]:
+        puntos = f"{metricas['puntos']:,} de {metricas['filas']:,} puntos ({metricas['metodo']})"
+    else:
+        puntos = f"{metricas['puntos']:,} puntos"
+    return (
+        f"{puntos}, {'WebGL' if metricas['webgl'] else 'SVG'}, "
+        f"preparado en {metricas['ms']:.0f} ms"
+    )
@@ -0,0 +1,231 @@
+# indice_referencias.py
+# Índice en memoria id -> nombre (y email) de clientes y cursos, compartido por
+# todas las sesiones del proceso. Alimenta los selectores con búsqueda por
+# prefijo de las páginas y las etiquetas de los listados de ventas, sin JOIN
+# ni lectura de la tabla completa en cada rerun.
+#
+# Los ids, nombres y emails van en arrays de numpy (los nombres internados:
+# se repiten mucho); las claves de búsqueda (nombre completo, cada palabra
+# del nombre desde la segunda y el email, sin tildes y en minúsculas) van en
+# una lista ordenada que se recorre con bisect. Se carga una vez y se pone al
+# día con las filas de id mayor a la marca de agua menos VENTANA_IDS que
+# todavía no tiene (en PostgreSQL un id menor puede confirmarse después de
+# uno mayor): cuando cambia la versión de la tabla por altas (ver
+# cache.invalida) o cada REVISION_S segundos, por las altas de otros
+# procesos. Ediciones y bajas recargan todo.
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+import unicodedata
+
+import numpy as np
+from sqlalchemy import select
+
+import cache
+from db import obtener_sesion
+from models import Cliente, Curso
+
+# Segundos entre consultas de altas hechas fuera de este proceso
+REVISION_S = float(os.environ.get("INDICE_REVISION_S", 60))
+# Ids por debajo de la marca de agua que se vuelven a leer en cada revisión
+VENTANA_IDS = int(os.environ.get("INDICE_VENTANA_IDS", 1000))
+# Con más altas que esto el índice de claves se reordena entero
+_MAX_ALTAS_INCREMENTALES = 1000
+
+ENTIDADES = {
+    "clientes": (Cliente, Cliente.nombre, Cliente.email),
+    "cursos": (Curso, Curso.nombre, None),
+}
+
+
+# Letras latinas con tilde o diacrítico -> letra base, para str.translate
+_SIN_TILDES = {
+    codigo: unicodedata.normalize("NFKD", chr(codigo))[0]
+    for codigo in range(0xC0, 0x250)
+    if unicodedata.normalize("NFKD", chr(codigo))[0].isascii()
+}
+
+
+def normalizar(texto):
+    # Minúsculas y sin tildes, para que "garcia" encuentre "García"
+    texto = (texto or "").lower()
+    return texto if texto.isascii() else texto.translate(_SIN_TILDES)
+
+
+@functools.lru_cache(maxsize=65536)
+def _claves_nombre(nombre):
+    # Los nombres se repiten mucho más que los emails
+    palabras = normalizar(nombre).split()
+    return tuple(" ".join(palabras[i:]) for i in range(len(palabras)))
+
+
+def _claves(nombre, detalle):
+    if detalle:
+        return _claves_nombre(nombre) + (normalizar(detalle),)
+    return _claves_nombre(nombre)
+
+
+class IndiceReferencias:
+    # Vista inmutable: una actualización arma un índice nuevo y lo reemplaza
+    def __init__(self, ids, nombres, detalles, claves, ids_claves):
+        self.ids = ids
+        self.nombres = nombres
+        self.detalles = detalles
+        self.claves = claves
+        self.ids_claves = ids_claves
+
+    @classmethod
+    def desde_filas(cls, filas):
+        vacio = cls(
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=object),
+            np.empty(0, dtype=object),
+            [],
+            np.empty(0, dtype=np.int64),
+        )
+        return vacio.con_altas(filas)
+
+    @property
+    def marca(self):
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def con_altas(self, filas):
+        # Índice nuevo con las filas (id, nombre, detalle), ordenadas por id,
+        # que todavía no tiene
+        ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+        if len(self.ids) and len(ids):
+            posiciones = np.searchsorted(self.ids, ids).clip(max=len(self.ids) - 1)
+            faltan = self.ids[posiciones] != ids
+            filas = [f for f, falta in zip(filas, faltan) if falta]
+            ids = ids[faltan]
+        if not filas:
+            return self
+        nombres = np.empty(len(filas), dtype=object)
+        nombres[:] = [sys.intern(f[1] or "") for f in filas]
+        detalles = np.empty(len(filas), dtype=object)
+        detalles[:] = [f[2] for f in filas]
+        nuevas = sorted(
+            (clave, id_)
+            for id_, nombre, detalle in filas
+            for clave in _claves(nombre, detalle)
+        )
+        if len(filas) > _MAX_ALTAS_INCREMENTALES or not self.claves:
+            todas = sorted(nuevas + list(zip(self.claves, self.ids_claves.tolist())))
+            claves = [sys.intern(c) for c, _ in todas]
+            ids_claves = np.fromiter(
+                (i for _, i in todas), dtype=np.int64, count=len(todas)
+            )
+        else:
+            # Intercala las claves nuevas en la lista ordenada existente
+            posiciones = [bisect.bisect_right(self.claves, c) for c, _ in nuevas]
+            claves, anterior = [], 0
+            for (clave, _), posicion in zip(nuevas, posiciones):
+                claves.extend(self.claves[anterior:posicion])
+                claves.append(sys.intern(clave))
+                anterior = posicion
+            claves.extend(self.claves[anterior:])
+            ids_claves = np.insert(
+                self.ids_claves, posiciones, [id_ for _, id_ in nuevas]
+            )
+        tardio = ids[0] < self.marca
+        ids = np.concatenate([self.ids, ids])
+        nombres = np.concatenate([self.nombres, nombres])
+        detalles = np.concatenate([self.detalles, detalles])
+        if tardio:
+            # etiquetas busca con searchsorted: los ids tienen que quedar ordenados
+            orden = np.argsort(ids, kind="stable")
+            ids, nombres, detalles = ids[orden], nombres[orden], detalles[orden]
+        return IndiceReferencias(ids, nombres, detalles, claves, ids_claves)
+
+    def buscar(self, texto, limite=20):
+        # Ids cuyo nombre, alguna palabra del nombre o email empieza con texto
+        prefijo = normalizar(texto).strip()
+        if not prefijo:
+            return []
+        inicio = bisect.bisect_left(self.claves, prefijo)
+        fin = bisect.bisect_left(self.claves, prefijo + "\U0010ffff", lo=inicio)
+        # Por bloques: un prefijo corto puede abarcar media tabla
+        encontrados = {}
+        while inicio < fin and len(encontrados) < limite:
+            bloque = self.ids_claves[inicio : min(fin, inicio + 1000)].tolist()
+            for id_ in bloque:
+                encontrados.setdefault(id_, None)
+                if len(encontrados) == limite:
+                    break
+            inicio += len(bloque)
+        return list(encontrados)
+
+    def etiquetas(self, ids):
+        # "nombre <email>" (o solo el nombre) de cada id; "" si no existe
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(ids), "", dtype=object)
+        posiciones = np.searchsorted(self.ids, ids).clip(max=len(self.ids) - 1)
+        existe = self.ids[posiciones] == ids
+        nombres = self.nombres[posiciones]
+        detalles = self.detalles[posiciones]
+        etiquetas = np.empty(len(ids), dtype=object)
+        for i, (ok, nombre, detalle) in enumerate(zip(existe, nombres, detalles)):
+            if not ok:
+                etiquetas[i] = ""
+            elif detalle:
+                etiquetas[i] = f"{nombre} <{detalle}>"
+            else:
+                etiquetas[i] = nombre
+        return etiquetas
+
+
+# entidad -> (bind, versión, modificaciones, última revisión, índice)
+_indices = {}
+_lock = threading.Lock()
+
+
+def _leer(db, entidad, desde_id=0):
+    modelo, *columnas = ENTIDADES[entidad]
+    query = select(modelo.id, *(c for c in columnas if c is not None))
+    filas = db.execute(query.where(modelo.id > desde_id).order_by(modelo.id))
+    if columnas[1] is None:
+        return [(id_, nombre, None) for id_, nombre in filas]
+    return filas.all()
+
+
+def obtener(entidad, db=None):
+    # Índice vigente de la entidad, puesto al día si hace falta
+    with obtener_sesion(db) as db:
+        bind = id(db.get_bind())
+        version = cache.version(entidad)
+        modificaciones = cache.modificaciones(entidad)
+        guardado = _indices.get(entidad)
+        ahora = time.monotonic()
+        if (
+            guardado
+            and guardado[:3] == (bind, version, modificaciones)
+            and ahora - guardado[3] < REVISION_S
+        ):
+            return guardado[4]
+        with _lock:
+            guardado = _indices.get(entidad)
+            if guardado is None or guardado[0] != bind or guardado[2] != modificaciones:
+                indice = IndiceReferencias.desde_filas(_leer(db, entidad))
+            elif guardado[1] == version and ahora - guardado[3] < REVISION_S:
+                return guardado[4]
+            else:
+                indice = guardado[4]
+                desde_id = max(indice.marca - VENTANA_IDS, 0)
+                indice = indice.con_altas(_leer(db, entidad, desde_id))
+            _indices[entidad] = (bind, version, modificaciones, ahora, indice)
+            return indice
+
+
+def buscar(entidad, texto, limite=20, db=None):
+    # Lista de (id, etiqueta) para un selector con búsqueda por prefijo
+    indice = obtener(entidad, db=db)
+    ids = indice.buscar(texto, limite)
+    return list(zip(ids, indice.etiquetas(ids)))
+
+
+def etiquetas(entidad, ids, db=None):
+    return obtener(entidad, db=db).etiquetas(ids)
@@ -0,0 +1,247 @@
+# instrumentacion.py
+# Medición de las sentencias SQL por función de servicio, con eventos de
+# SQLAlchemy (before/after_cursor_execute). Apagada no registra ningún
+# listener, así que no cuesta nada; se enciende con activar() o con la
+# variable de entorno INSTRUMENTACION=1.
+#
+# Cada sentencia se atribuye a la función de servicio más externa de la pila
+# (la que llamó la app), se acumula en un histograma de latencias y se cuenta
+# por llamada para detectar patrones N+1 (la misma sentencia repetida muchas
+# veces dentro de una sola llamada). Las sentencias lentas se guardan con su
+# plan de EXPLAIN.
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+HABILITADA_POR_ENTORNO = os.environ.get("INSTRUMENTACION", "").lower() in (
+    "1",
+    "true",
+)
+UMBRAL_LENTA_MS = float(os.environ.get("INSTRUMENTACION_LENTA_MS", 200))
+# Repeticiones de una misma sentencia en una llamada a partir de las cuales
+# se informa un N+1
+UMBRAL_N_MAS_1 = int(os.environ.get("INSTRUMENTACION_N_MAS_1", 10))
+MAX_LENTAS = 100
+# Límites superiores (ms) de los intervalos del histograma; el último es abierto
+LIMITES_HISTOGRAMA = [1, 5, 10, 50, 100, 500, 1000]
+# Módulos cuyas funciones públicas cuentan como servicios
+MODULOS_SERVICIO = {
+    "services",
+    "comisiones",
+    "distribucion",
+    "resumen_ventas",
+    "buscador",
+    "exportacion",
+    "analitica_clientes",
+    "indice_referencias",
+}
+FUERA_DE_SERVICIOS = "(fuera de servicios)"
+
+_lock = threading.Lock()
+_local = threading.local()
+_activa = False
+_funciones = {}
+_n_mas_1 = {}
+_lentas = {}
+
+
+def activa():
+    return _activa
+
+
+def activar():
+    global _activa
+    with _lock:
+        if _activa:
+            return
+        event.listen(Engine, "before_cursor_execute", _antes)
+        event.listen(Engine, "after_cursor_execute", _despues)
+        _activa = True
+
+
+def desactivar():
+    global _activa
+    with _lock:
+        if not _activa:
+            return
+        event.remove(Engine, "before_cursor_execute", _antes)
+        event.remove(Engine, "after_cursor_execute", _despues)
+        _activa = False
+
+
+def reiniciar():
+    with _lock:
+        _funciones.clear()
+        _n_mas_1.clear()
+        _lentas.clear()
+
+
+def _servicio_actual():
+    # (llamada, nombre) de la función de servicio más externa de la pila.
+    # llamada identifica la ejecución sin guardar el frame, que retendría sus
+    # variables locales después de terminar: id y código del frame, más el
+    # frame y la instrucción desde donde se llamó. Dos llamadas seguidas desde
+    # la misma línea (un bucle) pueden reusar el id y contarse como una sola.
+    frame = sys._getframe(2)
+    encontrado = None
+    while frame is not None:
+        nombre = frame.f_code.co_name
+        if (
+            frame.f_globals.get("__name__") in MODULOS_SERVICIO
+            and nombre.isidentifier()
+            and not nombre.startswith("_")
+        ):
+            encontrado = frame
+        frame = frame.f_back
+    if encontrado is None:
+        return None, FUERA_DE_SERVICIOS
+    origen = encontrado.f_back
+    llamada = (
+        id(encontrado),
+        encontrado.f_code,
+        id(origen),
+        origen.f_lasti if origen is not None else -1,
+    )
+    return llamada, encontrado.f_code.co_name
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "explicando", False):
+        return
+    conn.info.setdefault("instrumentacion_inicio", []).append(time.perf_counter())
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "explicando", False):
+        return
+    inicios = conn.info.get("instrumentacion_inicio")
+    if not inicios:
+        return
+    ms = (time.perf_counter() - inicios.pop()) * 1000
+    llamada, funcion = _servicio_actual()
+    nueva_llamada = llamada is None or getattr(_local, "llamada", None) != llamada
+    if nueva_llamada:
+        _local.llamada = llamada
+        _local.repeticiones = Counter()
+    _local.repeticiones[statement] += 1
+    repeticiones = _local.repeticiones[statement]
+    intervalo = next(
+        (i for i, limite in enumerate(LIMITES_HISTOGRAMA) if ms <= limite),
+        len(LIMITES_HISTOGRAMA),
+    )
+    with _lock:
+        stats = _funciones.get(funcion)
+        if stats is None:
+            stats = _funciones[funcion] = {
+                "llamadas": 0,
+                "sentencias": 0,
+                "tiempo_ms": 0.0,
+                "max_ms": 0.0,
+                "histograma": [0] * (len(LIMITES_HISTOGRAMA) + 1),
+            }
+        stats["llamadas"] += nueva_llamada
+        stats["sentencias"] += 1
+        stats["tiempo_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+        stats["histograma"][intervalo] += 1
+        if llamada is not None and repeticiones >= UMBRAL_N_MAS_1:
+            hallazgo = _n_mas_1.setdefault(
+                (funcion, statement),
+                {"funcion": funcion, "sentencia": statement, "repeticiones": 0},
+            )
+            hallazgo["repeticiones"] = max(hallazgo["repeticiones"], repeticiones)
+            hallazgo["ultima_vez"] = datetime.now()
+        lenta = ms >= UMBRAL_LENTA_MS
+        if lenta:
+            entrada = _lentas.get(statement)
+            if entrada is not None:
+                entrada["veces"] += 1
+                entrada["max_ms"] = max(entrada["max_ms"], ms)
+                entrada["ultima_vez"] = datetime.now()
+                return
+            if len(_lentas) >= MAX_LENTAS:
+                return
+    if lenta:
+        plan = None if executemany else _explicar(conn, statement, parameters)
+        with _lock:
+            _lentas.setdefault(
+                statement,
+                {
+                    "funcion": funcion,
+                    "sentencia": statement,
+                    "parametros": repr(parameters)[:500],
+                    "veces": 1,
+                    "max_ms": ms,
+                    "ultima_vez": datetime.now(),
+                    "plan": plan,
+                },
+            )
+
+
+def _explicar(conn, statement, parameters):
+    # Plan de una SELECT lenta, obtenido con otra conexión del mismo engine
+    # para no interferir con el cursor en curso
+    if not statement.lstrip().lower().startswith(("select", "with")):
+        return None
+    dialecto = conn.dialect.name
+    prefijo = "EXPLAIN QUERY PLAN " if dialecto == "sqlite" else "EXPLAIN "
+    _local.explicando = True
+    try:
+        with conn.engine.connect() as otra:
+            filas = otra.exec_driver_sql(prefijo + statement, parameters).all()
+        if dialecto == "sqlite":
+            return "\n".join(str(fila[-1]) for fila in filas)
+        return "\n".join(str(fila[0]) for fila in filas)
+    except Exception as e:
+        return f"No se pudo obtener el plan: {e}"
+    finally:
+        _local.explicando = False
+
+
+# --- Lectura de lo registrado ---
+def _etiquetas_histograma():
+    etiquetas = [f"≤{limite} ms" for limite in LIMITES_HISTOGRAMA]
+    return etiquetas + [f">{LIMITES_HISTOGRAMA[-1]} ms"]
+
+
+def por_funcion():
+    # Lista de dicts por función, ordenada por tiempo total
+    etiquetas = _etiquetas_histograma()
+    with _lock:
+        copia = {
+            f: dict(s, histograma=list(s["histograma"])) for f, s in _funciones.items()
+        }
+    filas = []
+    for funcion, stats in copia.items():
+        filas.append(
+            {
+                "funcion": funcion,
+                "llamadas": stats["llamadas"],
+                "sentencias": stats["sentencias"],
+                "sentencias_por_llamada": stats["sentencias"]
+                / max(stats["llamadas"], 1),
+                "tiempo_ms": stats["tiempo_ms"],
+                "promedio_ms": stats["tiempo_ms"] / stats["sentencias"],
+                "max_ms": stats["max_ms"],
+                **dict(zip(etiquetas, stats["histograma"])),
+            }
+        )
+    return sorted(filas, key=lambda f: -f["tiempo_ms"])
+
+
+def patrones_n_mas_1():
+    with _lock:
+        hallazgos = [dict(h) for h in _n_mas_1.values()]
+    return sorted(hallazgos, key=lambda h: -h["repeticiones"])
+
+
+def sentencias_lentas():
+    with _lock:
+        lentas = [dict(e) for e in _lentas.values()]
+    return sorted(lentas, key=lambda e: -e["max_ms"])
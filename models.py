@@ -1,8 +1,37 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    Date,
+    DateTime,
+    ForeignKey,
+    Text,
+    Index,
+    DDL,
+    event,
+)
 from sqlalchemy.sql import func
 from db import Base
 
+# Los índices de trigramas de la búsqueda (buscador.py) necesitan pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def _indice_trigramas(nombre, columna):
+    # Índice GIN para ILIKE '%q%'; solo existe en PostgreSQL
+    return Index(
+        nombre,
+        columna,
+        postgresql_using="gin",
+        postgresql_ops={columna: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
 
 class Curso(Base):
     __tablename__ = "cursos"
@@ -12,6 +41,13 @@ class Curso(Base):
     precio = Column(Float, nullable=False)
     fecha_creacion = Column(DateTime, default=func.now(), nullable=False)
 
+    # Índice para la paginación por cursor (fecha, id)
+    __table_args__ = (
+        Index("ix_cursos_fecha_creacion_id", "fecha_creacion", "id"),
+        _indice_trigramas("ix_cursos_nombre_trgm", "nombre"),
+        _indice_trigramas("ix_cursos_descripcion_trgm", "descripcion"),
+    )
+
 
 class Cliente(Base):
     __tablename__ = "clientes"
@@ -23,6 +59,13 @@ class Cliente(Base):
     fuente_referencia = Column(String(100), nullable=False)
     fecha_creacion = Column(DateTime, default=func.now(), nullable=False)
 
+    __table_args__ = (
+        Index("ix_clientes_fecha_creacion_id", "fecha_creacion", "id"),
+        _indice_trigramas("ix_clientes_nombre_trgm", "nombre"),
+        _indice_trigramas("ix_clientes_email_trgm", "email"),
+        _indice_trigramas("ix_clientes_pais_trgm", "pais"),
+    )
+
 
 class Venta(Base):
     __tablename__ = "ventas"
@@ -32,6 +75,12 @@ class Venta(Base):
     monto = Column(Float, nullable=False)
     fecha_venta = Column(DateTime, default=func.now(), nullable=False)
 
+    __table_args__ = (
+        Index("ix_ventas_fecha_venta_id", "fecha_venta", "id"),
+        # Agregados por cliente (analitica_clientes.py) sin leer toda la tabla
+        Index("ix_ventas_cliente_id_fecha_venta", "cliente_id", "fecha_venta", "monto"),
+    )
+
 
 class Devolucion(Base):
     __tablename__ = "devoluciones"
@@ -50,6 +99,26 @@ class Comision(Base):
     porcentaje = Column(Float, nullable=False)  # Porcentaje de comisión
     monto_comision = Column(Float, nullable=False)
     ajuste_manual = Column(Float, default=0.0)
+    # Comisiones calculadas por comisiones.py: regla aplicada y descuento por
+    # reembolsos de la venta (las cargadas a mano no tienen regla)
+    regla_id = Column(Integer, ForeignKey("reglas_comision.id"), nullable=True)
+    ajuste_reembolso = Column(Float, default=0.0)
+
+    __table_args__ = (Index("ix_comisiones_venta_id_closer", "venta_id", "closer"),)
+
+
+class ReglaComision(Base):
+    # Porcentaje de comisión de un closer sobre un curso, o sobre todos los
+    # cursos si curso_id es NULL (la regla específica tiene prioridad)
+    __tablename__ = "reglas_comision"
+    id = Column(Integer, primary_key=True, index=True)
+    closer = Column(String(100), nullable=False)
+    curso_id = Column(Integer, ForeignKey("cursos.id"), nullable=True)
+    porcentaje = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ux_reglas_comision_closer_curso", "closer", "curso_id", unique=True),
+    )
 
 
 class Socio(Base):
@@ -59,4 +128,49 @@ class Socio(Base):
     porcentaje_participacion = Column(Float, nullable=False)
 
 
-# Nota: La distribución de beneficios se puede calcular dinámicamente
+class VentaDiaria(Base):
+    # Resumen por día y curso que mantienen crear_venta, crear_devolucion y
+    # crear_comision en la misma transacción (ver resumen_ventas.py)
+    __tablename__ = "ventas_diarias"
+    fecha = Column(Date, primary_key=True)
+    curso_id = Column(Integer, ForeignKey("cursos.id"), primary_key=True)
+    ventas_brutas = Column(Float, nullable=False, default=0.0)
+    reembolsos = Column(Float, nullable=False, default=0.0)
+    comisiones = Column(Float, nullable=False, default=0.0)
+    ingreso_neto = Column(Float, nullable=False, default=0.0)
+    cantidad_ventas = Column(Integer, nullable=False, default=0)
+
+
+class CargaHistorica(Base):
+    # Avance de una carga de backfill.py. Se actualiza en la misma transacción
+    # que cada bloque insertado: una carga interrumpida se reanuda desde el
+    # último bloque confirmado sin repetir ni perder filas.
+    __tablename__ = "cargas_historicas"
+    clave = Column(String(300), primary_key=True)
+    tabla = Column(String(50), nullable=False)
+    archivo = Column(Text, nullable=False)
+    filas_leidas = Column(Integer, nullable=False, default=0)
+    insertadas = Column(Integer, nullable=False, default=0)
+    rechazadas = Column(Integer, nullable=False, default=0)
+    # Rango de fechas cargado, para recalcular ventas_diarias al terminar
+    fecha_desde = Column(Date)
+    fecha_hasta = Column(Date)
+    # Índices borrados durante la carga (separados por comas) que faltan crear
+    indices_diferidos = Column(Text)
+    actualizada = Column(DateTime, nullable=False)
+    terminada = Column(DateTime)
+
+
+class Distribucion(Base):
+    # Reparto de la utilidad de un mes cerrado entre los socios (ver
+    # distribucion.py). Se guarda al cerrar el mes y no se vuelve a calcular.
+    __tablename__ = "distribuciones"
+    periodo = Column(Date, primary_key=True)
+    socio_id = Column(Integer, ForeignKey("socios.id"), primary_key=True)
+    socio = Column(String(100), nullable=False)
+    porcentaje = Column(Float, nullable=False)
+    utilidad_periodo = Column(Float, nullable=False)
+    monto = Column(Float, nullable=False)
+
+
+# Nota: La distribución de beneficios se puede calcular dinámicamente (distribucion.py)
@@ -0,0 +1,27 @@
+# paginas/__init__.py
+# Una página por módulo, cada una con una función mostrar(). app.py importa
+# solo la página elegida en el menú, así que lo que usa cada una (plotly, el
+# driver asíncrono, los servicios de comisiones...) se carga recién cuando se
+# visita por primera vez.
+import importlib
+import os
+
+# Sin ADMIN_PASSWORD la página de rendimiento no se muestra
+ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "")
+
+# Opción del menú: módulo de la página
+PAGINAS = {
+    "Cursos": "cursos",
+    "Clientes": "clientes",
+    "Ventas": "ventas",
+    "Devoluciones": "devoluciones",
+    "Comisiones": "comisiones",
+    "Socios": "socios",
+    "Analytics": "analytics",
+}
+if ADMIN_PASSWORD:
+    PAGINAS["Rendimiento"] = "rendimiento"
+
+
+def mostrar(opcion):
+    importlib.import_module(f"{__name__}.{PAGINAS[opcion]}").mostrar()
@@ -0,0 +1,205 @@
+# paginas/analytics.py
+from datetime import datetime, timedelta
+
+import plotly.express as px
+import streamlit as st
+
+import analitica_clientes
+import graficos
+import servicios_async
+import snapshot_analitico
+
+
+def mostrar():
+    st.header("Dashboard y Análisis Avanzados")
+    if snapshot_analitico.usa_snapshot(snapshot_analitico.BACKEND):
+        st.caption(
+            "Reportes calculados sobre el snapshot analítico del "
+            f"{snapshot_analitico.actualizado():%d/%m/%Y %H:%M}"
+        )
+
+    st.subheader("Reporte de Ventas")
+    col_gran, col_grupo, col_rango = st.columns(3)
+    granularidad = col_gran.selectbox(
+        "Agrupar por período",
+        ["dia", "semana", "mes"],
+        index=2,
+        format_func={"dia": "Día", "semana": "Semana", "mes": "Mes"}.get,
+    )
+    agrupar_por = col_grupo.selectbox(
+        "Desglose",
+        [None, "curso", "pais"],
+        format_func={None: "Sin desglose", "curso": "Curso", "pais": "País"}.get,
+    )
+    rango = col_rango.date_input(
+        "Rango de fechas",
+        value=(datetime.now().date() - timedelta(days=365), datetime.now().date()),
+    )
+    fecha_desde, fecha_hasta = (tuple(rango) + (None, None))[:2]
+    # Las cohortes son las de los clientes dados de alta en el rango elegido
+    alta_desde, alta_hasta = fecha_desde, fecha_hasta
+    metodo = st.radio(
+        "Reducción del gráfico",
+        graficos.METODOS,
+        horizontal=True,
+        format_func={"lttb": "LTTB", "minmax": "Mínimo y máximo"}.get,
+    )
+    # Al seleccionar un tramo del gráfico (caja) se vuelve a consultar solo
+    # ese rango, por día
+    zoom = st.session_state.get("zoom_ventas")
+    if zoom:
+        fecha_desde, fecha_hasta = zoom
+        granularidad = "dia"
+        col_zoom, col_volver = st.columns([3, 1])
+        col_zoom.caption(f"Detalle diario del {fecha_desde} al {fecha_hasta}")
+        if col_volver.button("Ver todo el rango"):
+            del st.session_state["zoom_ventas"]
+            st.session_state["grafico_ventas"] = (
+                st.session_state.get("grafico_ventas", 0) + 1
+            )
+            st.rerun()
+    # Los reportes de la página se consultan a la vez
+    reportes = servicios_async.ejecutar_concurrente(
+        ventas=servicios_async.obtener_reporte_ventas_agrupado(
+            granularidad=granularidad,
+            agrupar_por=agrupar_por,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+        ),
+        cohortes=servicios_async.cohortes(alta_desde, alta_hasta),
+        resumen_cohortes=servicios_async.resumen_cohortes(alta_desde, alta_hasta),
+        rfm=servicios_async.rfm(),
+        ltv_fuente=servicios_async.ltv_por("fuente_referencia"),
+        ltv_pais=servicios_async.ltv_por("pais"),
+    )
+    df_ventas = reportes["ventas"]
+    if isinstance(df_ventas, dict) and "error" in df_ventas:
+        st.error(df_ventas["error"])
+    elif not df_ventas.empty:
+        color = {"curso": "curso_id", "pais": "pais"}.get(agrupar_por)
+        if color == "curso_id":
+            df_ventas["curso_id"] = df_ventas["curso_id"].astype(str)
+        fig, metricas = graficos.figura_lineas(
+            df_ventas,
+            "periodo",
+            "total",
+            color=color,
+            metodo=metodo,
+            markers=True,
+            hover_data=["cantidad", "promedio"],
+            title="Tendencia de Ventas",
+        )
+        # La clave cambia con cada zoom para descartar la selección anterior
+        evento = st.plotly_chart(
+            fig,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="box",
+            key=f"grafico_ventas_{st.session_state.get('grafico_ventas', 0)}",
+        )
+        st.caption(graficos.describir(metricas))
+        cajas = evento.selection.box if evento else []
+        if cajas:
+            st.session_state["zoom_ventas"] = graficos.rango_seleccionado(cajas[0])
+            st.session_state["grafico_ventas"] = (
+                st.session_state.get("grafico_ventas", 0) + 1
+            )
+            st.rerun()
+        st.dataframe(df_ventas)
+    else:
+        st.write("No hay datos de ventas")
+
+    st.subheader("Análisis de Clientes")
+    st.caption(
+        "Datos hasta ayer; se recalculan una vez por día. Valores netos de "
+        "reembolsos."
+    )
+    errores = [
+        r["error"]
+        for nombre, r in reportes.items()
+        if nombre != "ventas" and isinstance(r, dict) and "error" in r
+    ]
+    if errores:
+        for error in errores:
+            st.error(error)
+        return
+    tab_cohortes, tab_rfm, tab_ltv = st.tabs(["Cohortes", "RFM", "Valor de vida"])
+
+    with tab_cohortes:
+        if reportes["cohortes"].empty:
+            st.write("No hay clientes con compras en el rango elegido")
+        else:
+            matriz = analitica_clientes.matriz_retencion(reportes["cohortes"])
+            matriz.index = matriz.index.strftime("%Y-%m")
+            fig = px.imshow(
+                matriz * 100,
+                text_auto=".0f",
+                aspect="auto",
+                color_continuous_scale="Blues",
+                labels={"x": "Meses desde el alta", "y": "Cohorte", "color": "%"},
+                title="Clientes que compran cada mes (% de la cohorte)",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(
+            reportes["resumen_cohortes"].rename(
+                columns={
+                    "cohorte": "Cohorte",
+                    "clientes": "Clientes",
+                    "compradores": "Compradores",
+                    "recompradores": "Recompradores",
+                    "valor_neto": "Valor neto",
+                    "tasa_recompra": "Tasa de recompra",
+                    "ltv": "LTV por cliente",
+                }
+            )
+        )
+
+    with tab_rfm:
+        df_rfm = reportes["rfm"]
+        segmentos = analitica_clientes.resumen_rfm(df_rfm)
+        st.plotly_chart(
+            px.bar(
+                segmentos,
+                x="segmento",
+                y="clientes",
+                hover_data=["valor_neto", "recencia_dias", "compras"],
+                title="Clientes por segmento RFM",
+            ),
+            use_container_width=True,
+        )
+        st.dataframe(
+            segmentos.rename(
+                columns={
+                    "segmento": "Segmento",
+                    "clientes": "Clientes",
+                    "valor_neto": "Valor neto",
+                    "recencia_dias": "Recencia promedio (días)",
+                    "compras": "Compras promedio",
+                }
+            )
+        )
+        segmento = st.selectbox("Clientes del segmento", segmentos["segmento"])
+        st.dataframe(
+            df_rfm[df_rfm["segmento"] == segmento]
+            .nlargest(100, "valor_neto")
+            .drop(columns="segmento")
+        )
+
+    with tab_ltv:
+        for clave, dimension, titulo in (
+            ("ltv_fuente", "fuente_referencia", "Fuente de referencia"),
+            ("ltv_pais", "pais", "País"),
+        ):
+            df_ltv = reportes[clave]
+            st.plotly_chart(
+                px.bar(
+                    df_ltv,
+                    x=dimension,
+                    y="ltv",
+                    hover_data=["clientes", "compradores", "valor_neto"],
+                    labels={dimension: titulo, "ltv": "LTV por cliente"},
+                    title=f"Valor de vida neto por {titulo.lower()}",
+                ),
+                use_container_width=True,
+            )
+            st.dataframe(df_ltv)
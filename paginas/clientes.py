@@ -0,0 +1,105 @@
+# paginas/clientes.py
+import streamlit as st
+
+import trabajos
+from paginas.comunes import (
+    exportar,
+    paginar,
+    seguir_trabajos,
+    selector,
+    sesion_trabajos,
+    tabla,
+)
+from services import actualizar_cliente, buscar_clientes, crear_cliente
+
+# Errores de importación que se muestran; el resto, en el informe descargable
+MAX_ERRORES_VISIBLES = 50
+
+
+def mostrar():
+    st.header("Gestión de Clientes")
+    accion = st.selectbox(
+        "Acción", ["Registrar", "Editar", "Ver", "Importar", "Exportar"]
+    )
+
+    if accion == "Registrar":
+        with st.form("form_cliente"):
+            nombre = st.text_input("Nombre")
+            email = st.text_input("Email")
+            telefono = st.text_input("Teléfono")
+            pais = st.text_input("País")
+            fuente_referencia = st.text_input("Fuente de Referencia")
+            submit = st.form_submit_button("Registrar Cliente")
+        if submit:
+            result = crear_cliente(nombre, email, telefono, pais, fuente_referencia)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Cliente registrado exitosamente")
+
+    elif accion == "Editar":
+        cliente_id = selector("clientes", "Cliente a editar", "cliente_editar")
+        nombre = st.text_input("Nuevo nombre")
+        email = st.text_input("Nuevo email")
+        telefono = st.text_input("Nuevo teléfono")
+        pais = st.text_input("Nuevo país")
+        fuente_referencia = st.text_input("Nueva fuente de referencia")
+        if st.button("Actualizar Cliente", disabled=cliente_id is None):
+            result = actualizar_cliente(
+                cliente_id, nombre, email, telefono, pais, fuente_referencia
+            )
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Cliente actualizado")
+
+    elif accion == "Ver":
+        busqueda = st.text_input("Buscar cliente")
+        if busqueda:
+            resultados = buscar_clientes(busqueda, limite=50)
+        else:
+            resultados = [(c, None) for c in paginar("clientes_ver", "clientes")]
+        df = tabla(
+            [c for c, _ in resultados],
+            {
+                "id": "ID",
+                "nombre": "Nombre",
+                "email": "Email",
+                "pais": "País",
+                "fuente_referencia": "Fuente",
+            },
+        )
+        if busqueda:
+            df["Relevancia"] = [puntaje for _, puntaje in resultados]
+        st.dataframe(df)
+
+    elif accion == "Importar":
+        st.info("Seleccione un archivo Excel para importar clientes")
+        file = st.file_uploader("Subir archivo", type=["xlsx"])
+        if file and st.button("Importar"):
+            trabajos.importar_clientes(file, sesion_trabajos())
+        seguir_trabajos("importar_clientes", _resultado_importacion)
+
+    elif accion == "Exportar":
+        exportar("clientes", busqueda=st.text_input("Filtrar clientes (opcional)"))
+
+
+def _resultado_importacion(trabajo):
+    result = trabajo.resultado
+    st.success(f"Importación completa. Clientes insertados: {result['insertados']}")
+    stats = result["estadisticas"]
+    st.caption(
+        f"{stats['filas']} filas procesadas en {stats['segundos']:.2f} s "
+        f"({stats['filas_por_segundo']:.0f} filas/s)"
+    )
+    if result["errores"]:
+        st.warning(f"{len(result['errores'])} errores durante la importación:")
+        for err in result["errores"][:MAX_ERRORES_VISIBLES]:
+            st.write(err)
+        with open(trabajo.artefacto, "rb") as informe:
+            st.download_button(
+                "Descargar informe de errores",
+                informe.read(),
+                file_name="errores_importacion.csv",
+                key=f"informe_{trabajo.id}",
+            )
@@ -0,0 +1,114 @@
+# paginas/comisiones.py
+from datetime import datetime
+
+import streamlit as st
+
+from comisiones import (
+    asignar,
+    eliminar_regla,
+    guardar_regla,
+    liquidar,
+    obtener_reglas,
+    resumen_pagos,
+)
+from paginas.comunes import selector_venta
+from services import crear_comision
+
+
+def mostrar():
+    st.header("Gestión de Comisiones")
+    accion = st.selectbox("Acción", ["Registrar", "Reglas", "Liquidar período"])
+
+    if accion == "Registrar":
+        venta_id = selector_venta("comision")
+        with st.form("form_comision"):
+            closer = st.text_input("Nombre del Closer")
+            segun_regla = st.checkbox(
+                "Calcular con la regla del closer (se recalcula al liquidar)"
+            )
+            porcentaje = st.number_input(
+                "Porcentaje de comisión", min_value=0.0, value=0.0, step=0.1
+            )
+            ajuste_manual = st.number_input(
+                "Ajuste manual", min_value=0.0, value=0.0, step=0.1
+            )
+            submit = st.form_submit_button("Registrar Comisión")
+        if submit:
+            if venta_id is None:
+                st.error("Seleccione la venta")
+                return
+            if segun_regla:
+                result = asignar(venta_id, closer)
+            else:
+                result = crear_comision(venta_id, closer, porcentaje, ajuste_manual)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Comisión registrada")
+
+    elif accion == "Reglas":
+        st.dataframe(
+            obtener_reglas().rename(
+                columns={
+                    "id": "ID",
+                    "closer": "Closer",
+                    "curso_id": "Curso ID (vacío = todos)",
+                    "porcentaje": "Porcentaje",
+                }
+            )
+        )
+        with st.form("form_regla"):
+            closer = st.text_input("Nombre del Closer")
+            curso_id = st.number_input(
+                "ID del Curso (0 = todos los cursos)", min_value=0, step=1
+            )
+            porcentaje = st.number_input(
+                "Porcentaje de comisión",
+                min_value=0.0,
+                max_value=100.0,
+                value=0.0,
+                step=0.1,
+            )
+            submit = st.form_submit_button("Guardar Regla")
+        if submit:
+            result = guardar_regla(closer, porcentaje, curso_id or None)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Regla guardada")
+        regla_id = st.number_input("ID de la regla a eliminar", min_value=1, step=1)
+        if st.button("Eliminar Regla"):
+            result = eliminar_regla(regla_id)
+            if "error" in result:
+                st.error(result["error"])
+            else:
+                st.success(result["message"])
+
+    elif accion == "Liquidar período":
+        hoy = datetime.now().date()
+        col_desde, col_hasta, col_closer = st.columns(3)
+        fecha_desde = col_desde.date_input("Desde", value=hoy.replace(day=1))
+        fecha_hasta = col_hasta.date_input("Hasta", value=hoy)
+        closer = col_closer.text_input("Closer (opcional)")
+        if st.button("Liquidar"):
+            result = liquidar(fecha_desde, fecha_hasta, closer or None)
+            if "error" in result:
+                st.error(result["error"])
+            else:
+                st.success(
+                    f"Comisiones actualizadas: {result['actualizadas']}, "
+                    f"eliminadas: {result['eliminadas']}"
+                )
+        st.subheader("Resumen de pagos")
+        st.dataframe(
+            resumen_pagos(fecha_desde, fecha_hasta).rename(
+                columns={
+                    "closer": "Closer",
+                    "ventas": "Ventas",
+                    "comision_bruta": "Comisión bruta",
+                    "descuento_reembolsos": "Descuento por reembolsos",
+                    "ajustes_manuales": "Ajustes manuales",
+                    "a_pagar": "A pagar",
+                }
+            )
+        )
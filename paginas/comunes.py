@@ -0,0 +1,158 @@
+# paginas/comunes.py
+# Piezas compartidas por las páginas de listados
+import os
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+import indice_referencias
+import trabajos
+from exportacion import FORMATOS
+from services import obtener_pagina, ventas_de_cliente
+
+# Cada cuántos segundos se consulta el estado de los trabajos en curso
+INTERVALO_SONDEO_S = 1.0
+
+
+def paginar(clave, entidad, busqueda=None, orden="desc", per_page=20):
+    # Navegación por cursor: se guarda en la sesión la pila de cursores visitados
+    estado = st.session_state.setdefault(
+        f"paginacion_{clave}", {"busqueda": busqueda, "cursores": [None]}
+    )
+    if estado["busqueda"] != busqueda:
+        estado.update(busqueda=busqueda, cursores=[None])
+    data = obtener_pagina(
+        entidad,
+        cursor=estado["cursores"][-1],
+        per_page=per_page,
+        busqueda=busqueda or None,
+        orden=orden,
+    )
+    col_anterior, col_info, col_siguiente = st.columns([1, 2, 1])
+    if col_anterior.button(
+        "Anterior", key=f"{clave}_anterior", disabled=len(estado["cursores"]) == 1
+    ):
+        estado["cursores"].pop()
+        st.rerun()
+    if col_siguiente.button(
+        "Siguiente", key=f"{clave}_siguiente", disabled=data["siguiente"] is None
+    ):
+        estado["cursores"].append(data["siguiente"])
+        st.rerun()
+    paginas = max(1, -(-data["total"] // per_page))
+    col_info.caption(f"Página {len(estado['cursores'])} de ~{paginas}")
+    return data["items"]
+
+
+def tabla(filas, etiquetas):
+    # DataFrame a partir de filas de Core, con las columnas renombradas para mostrar
+    columnas = list(filas[0]._fields) if filas else list(etiquetas)
+    df = pd.DataFrame(filas, columns=columnas)
+    return df[list(etiquetas)].rename(columns=etiquetas)
+
+
+def selector(entidad, etiqueta, key):
+    # Búsqueda por prefijo en el índice de referencias; devuelve el id elegido
+    texto = st.text_input(
+        etiqueta, key=f"{key}_texto", placeholder="Escriba el nombre o el email"
+    )
+    if not texto:
+        return None
+    opciones = dict(indice_referencias.buscar(entidad, texto))
+    if not opciones:
+        st.caption("Sin coincidencias")
+        return None
+    return st.selectbox(
+        f"{etiqueta} (coincidencias)",
+        list(opciones),
+        format_func=lambda id_: f"{opciones[id_]} (#{id_})",
+        key=f"{key}_id",
+    )
+
+
+def selector_venta(key):
+    # Venta de un cliente: primero el cliente, después una de sus ventas
+    cliente_id = selector("clientes", "Cliente", key)
+    if cliente_id is None:
+        return None
+    ventas = ventas_de_cliente(cliente_id)
+    if not ventas:
+        st.caption("El cliente no tiene ventas")
+        return None
+    cursos = indice_referencias.etiquetas("cursos", [v.curso_id for v in ventas])
+    opciones = {
+        v.id: f"#{v.id} · {curso} · {v.monto:.2f} · {v.fecha_venta:%Y-%m-%d}"
+        for v, curso in zip(ventas, cursos)
+    }
+    return st.selectbox(
+        "Venta", list(opciones), format_func=opciones.get, key=f"{key}_venta"
+    )
+
+
+def sesion_trabajos():
+    # Dueño de los trabajos que lanza esta sesión del navegador
+    return st.session_state.setdefault("sesion_trabajos", uuid.uuid4().hex)
+
+
+def exportar(entidad, busqueda=None):
+    # La exportación corre como trabajo en segundo plano (ver trabajos.py)
+    formato = st.selectbox("Formato", list(FORMATOS))
+    col_desde, col_hasta = st.columns(2)
+    fecha_desde = col_desde.date_input("Desde (opcional)", value=None)
+    fecha_hasta = col_hasta.date_input("Hasta (opcional)", value=None)
+    if st.button("Generar archivo"):
+        trabajos.exportar(
+            entidad,
+            formato,
+            sesion=sesion_trabajos(),
+            busqueda=busqueda or None,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+        )
+    seguir_trabajos(f"exportar_{entidad}", _descarga)
+
+
+def _descarga(trabajo):
+    nombre = os.path.basename(trabajo.artefacto).split("_", 1)[1]
+    with open(trabajo.artefacto, "rb") as archivo:
+        st.download_button(
+            f"Descargar {nombre} ({trabajo.resultado['bytes'] / 1e6:.1f} MB)",
+            archivo.read(),
+            file_name=nombre,
+            key=f"descargar_{trabajo.id}",
+        )
+
+
+def seguir_trabajos(tipo, mostrar_resultado):
+    # Estado de los trabajos vigentes de `tipo`. Mientras haya alguno activo
+    # el fragmento se vuelve a ejecutar solo, sin rerun de la página.
+    activos = any(t.activo for t in trabajos.listar(tipo, sesion_trabajos()))
+    st.fragment(run_every=INTERVALO_SONDEO_S if activos else None)(_trabajos)(
+        tipo, mostrar_resultado
+    )
+
+
+def _trabajos(tipo, mostrar_resultado):
+    sesion = sesion_trabajos()
+    for trabajo in trabajos.listar(tipo, sesion):
+        with st.container(border=True):
+            st.markdown(f"**{trabajo.descripcion}**")
+            if trabajo.activo:
+                st.progress(trabajo.progreso, text=trabajo.mensaje)
+                if st.button("Cancelar", key=f"cancelar_{trabajo.id}"):
+                    trabajos.cancelar(trabajo.id, sesion)
+                    st.rerun(scope="fragment")
+            elif trabajo.estado == "terminado":
+                mostrar_resultado(trabajo)
+            elif trabajo.estado == "fallido":
+                st.error(trabajo.error)
+            else:
+                st.caption("Cancelado")
+    # Al terminar el último se deja de sondear
+    if not any(t.activo for t in trabajos.listar(tipo, sesion)):
+        if st.session_state.get(f"sondeo_{tipo}"):
+            st.session_state[f"sondeo_{tipo}"] = False
+            st.rerun()
+    else:
+        st.session_state[f"sondeo_{tipo}"] = True
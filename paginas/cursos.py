@@ -0,0 +1,72 @@
+# paginas/cursos.py
+import streamlit as st
+
+from paginas.comunes import exportar, paginar, selector, tabla
+from services import actualizar_curso, buscar_cursos, crear_curso, eliminar_curso
+
+
+def mostrar():
+    st.header("Gestión de Cursos")
+    accion = st.selectbox(
+        "Acción", ["Registrar", "Editar", "Eliminar", "Ver", "Exportar"]
+    )
+
+    if accion == "Registrar":
+        with st.form("form_curso"):
+            nombre = st.text_input("Nombre del Curso")
+            descripcion = st.text_area("Descripción")
+            precio = st.number_input("Precio", min_value=0.0, value=0.0, step=0.1)
+            submit = st.form_submit_button("Registrar")
+        if submit:
+            result = crear_curso(nombre, descripcion, precio)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Curso registrado exitosamente")
+
+    elif accion == "Editar":
+        curso_id = selector("cursos", "Curso a editar", "curso_editar")
+        nombre = st.text_input("Nuevo nombre")
+        descripcion = st.text_area("Nueva descripción")
+        precio = st.number_input("Nuevo precio", min_value=0.0, value=0.0, step=0.1)
+        if st.button("Actualizar", disabled=curso_id is None):
+            result = actualizar_curso(curso_id, nombre, descripcion, precio)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Curso actualizado")
+
+    elif accion == "Eliminar":
+        curso_id = selector("cursos", "Curso a eliminar", "curso_eliminar")
+        if st.button("Eliminar", disabled=curso_id is None):
+            result = eliminar_curso(curso_id)
+            if "error" in result:
+                st.error(result["error"])
+            else:
+                st.success(result["message"])
+
+    elif accion == "Ver":
+        busqueda = st.text_input("Buscar curso por nombre o descripción")
+        if busqueda:
+            # Con búsqueda se muestran las mejores coincidencias por relevancia
+            resultados = buscar_cursos(busqueda, limite=50)
+        else:
+            resultados = [
+                (c, None) for c in paginar("cursos_ver", "cursos", orden="asc")
+            ]
+        df = tabla(
+            [c for c, _ in resultados],
+            {
+                "id": "ID",
+                "nombre": "Nombre",
+                "descripcion": "Descripción",
+                "precio": "Precio",
+                "fecha_creacion": "Fecha Creación",
+            },
+        )
+        if busqueda:
+            df["Relevancia"] = [puntaje for _, puntaje in resultados]
+        st.dataframe(df)
+
+    elif accion == "Exportar":
+        exportar("cursos", busqueda=st.text_input("Filtrar cursos (opcional)"))
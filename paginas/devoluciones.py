@@ -0,0 +1,25 @@
+# paginas/devoluciones.py
+import streamlit as st
+
+from paginas.comunes import selector_venta
+from services import crear_devolucion
+
+
+def mostrar():
+    st.header("Gestión de Devoluciones")
+    venta_id = selector_venta("devolucion")
+    with st.form("form_devolucion"):
+        motivo = st.text_area("Motivo de la devolución")
+        monto_reembolso = st.number_input(
+            "Monto a reembolsar", min_value=0.0, value=0.0, step=0.1
+        )
+        submit = st.form_submit_button("Registrar Devolución")
+    if submit:
+        if venta_id is None:
+            st.error("Seleccione la venta")
+            return
+        result = crear_devolucion(venta_id, motivo, monto_reembolso)
+        if isinstance(result, dict) and "error" in result:
+            st.error(result["error"])
+        else:
+            st.success("Devolución registrada")
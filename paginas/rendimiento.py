@@ -0,0 +1,70 @@
+# paginas/rendimiento.py
+import hmac
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import instrumentacion
+from paginas import ADMIN_PASSWORD
+
+
+def mostrar():
+    # Página de administración: requiere la contraseña de ADMIN_PASSWORD
+    st.header("Rendimiento de consultas")
+    if not st.session_state.get("admin"):
+        clave = st.text_input("Contraseña de administrador", type="password")
+        if not clave:
+            return
+        if not hmac.compare_digest(clave, ADMIN_PASSWORD):
+            st.error("Contraseña incorrecta")
+            return
+        st.session_state["admin"] = True
+
+    col_estado, col_reiniciar = st.columns(2)
+    activa = col_estado.toggle("Instrumentación activa", value=instrumentacion.activa())
+    if activa and not instrumentacion.activa():
+        instrumentacion.activar()
+    elif not activa and instrumentacion.activa():
+        instrumentacion.desactivar()
+    if col_reiniciar.button("Reiniciar métricas"):
+        instrumentacion.reiniciar()
+    st.caption(
+        f"Sentencias lentas: ≥ {instrumentacion.UMBRAL_LENTA_MS:.0f} ms · "
+        f"N+1: la misma sentencia ≥ {instrumentacion.UMBRAL_N_MAS_1} veces "
+        "en una llamada"
+    )
+
+    st.subheader("Por función de servicio")
+    funciones = pd.DataFrame(instrumentacion.por_funcion())
+    if funciones.empty:
+        st.info("Todavía no hay sentencias registradas")
+        return
+    st.dataframe(funciones.round(2))
+    funcion = st.selectbox("Histograma de latencias de", funciones["funcion"])
+    etiquetas = [c for c in funciones.columns if c.endswith(" ms")]
+    fila = funciones.set_index("funcion").loc[funcion, etiquetas]
+    st.plotly_chart(
+        px.bar(
+            x=etiquetas,
+            y=fila.to_numpy(),
+            labels={"x": "Latencia", "y": "Sentencias"},
+        )
+    )
+
+    st.subheader("Posibles N+1")
+    n_mas_1 = instrumentacion.patrones_n_mas_1()
+    if n_mas_1:
+        st.dataframe(pd.DataFrame(n_mas_1))
+    else:
+        st.write("No se detectaron sentencias repetidas dentro de una llamada")
+
+    st.subheader("Sentencias lentas")
+    for lenta in instrumentacion.sentencias_lentas():
+        with st.expander(
+            f"{lenta['max_ms']:.0f} ms · {lenta['funcion']} · {lenta['veces']} veces"
+        ):
+            st.code(lenta["sentencia"], language="sql")
+            st.caption(f"Parámetros: {lenta['parametros']}")
+            if lenta["plan"]:
+                st.code(lenta["plan"])
@@ -0,0 +1,121 @@
+# paginas/socios.py
+from datetime import datetime
+
+import streamlit as st
+
+from distribucion import calcular_distribucion, cerrar_periodo, resumen_por_socio
+from paginas.comunes import tabla
+from services import actualizar_socio, crear_socio, obtener_socios
+
+
+def mostrar():
+    st.header("Socios y Distribución de Utilidades")
+    accion = st.selectbox("Acción", ["Registrar", "Editar", "Distribución"])
+
+    if accion == "Registrar":
+        with st.form("form_socio"):
+            nombre = st.text_input("Nombre")
+            porcentaje = st.number_input(
+                "Porcentaje de participación",
+                min_value=0.0,
+                max_value=100.0,
+                value=0.0,
+                step=0.1,
+            )
+            submit = st.form_submit_button("Registrar Socio")
+        if submit:
+            result = crear_socio(nombre, porcentaje)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Socio registrado")
+
+    elif accion == "Editar":
+        socios = obtener_socios()
+        st.dataframe(
+            tabla(
+                socios,
+                {
+                    "id": "ID",
+                    "nombre": "Nombre",
+                    "porcentaje_participacion": "Participación (%)",
+                },
+            )
+        )
+        socio_id = st.number_input("Ingrese ID del socio a editar", min_value=1, step=1)
+        nombre = st.text_input("Nuevo nombre")
+        porcentaje = st.number_input(
+            "Nuevo porcentaje", min_value=0.0, max_value=100.0, step=0.1
+        )
+        if st.button("Actualizar Socio"):
+            result = actualizar_socio(socio_id, nombre, porcentaje)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Socio actualizado")
+
+    elif accion == "Distribución":
+        # plotly solo hace falta en esta acción
+        import plotly.express as px
+
+        hoy = datetime.now().date()
+        col_desde, col_hasta = st.columns(2)
+        fecha_desde = col_desde.date_input("Desde", value=hoy.replace(month=1, day=1))
+        fecha_hasta = col_hasta.date_input("Hasta", value=hoy)
+        df_dist = calcular_distribucion(fecha_desde, fecha_hasta)
+        if isinstance(df_dist, dict) and "error" in df_dist:
+            st.error(df_dist["error"])
+        elif df_dist.empty:
+            st.info("No hay utilidades en el período seleccionado")
+        else:
+            st.caption(
+                "Los meses sin cerrar son provisorios: se recalculan con cada "
+                "venta, reembolso o liquidación de comisiones."
+            )
+            fig = px.bar(
+                df_dist,
+                x="periodo",
+                y="monto",
+                color="socio",
+                title="Distribución mensual por socio",
+            )
+            st.plotly_chart(fig)
+            st.dataframe(
+                resumen_por_socio(df_dist).rename(
+                    columns={
+                        "socio_id": "ID",
+                        "socio": "Socio",
+                        "monto": "Total del período",
+                    }
+                )
+            )
+            st.dataframe(
+                df_dist.rename(
+                    columns={
+                        "periodo": "Mes",
+                        "socio_id": "Socio ID",
+                        "socio": "Socio",
+                        "porcentaje": "Participación (%)",
+                        "utilidad_periodo": "Utilidad del mes",
+                        "monto": "Monto",
+                        "cerrado": "Cerrado",
+                    }
+                )
+            )
+        # Cierre explícito: congela el reparto de un mes terminado
+        abiertos = []
+        if not isinstance(df_dist, dict) and not df_dist.empty:
+            abiertos = sorted(
+                set(df_dist.loc[~df_dist["cerrado"], "periodo"]) - {hoy.replace(day=1)}
+            )
+        if abiertos:
+            mes = st.selectbox(
+                "Mes a cerrar", abiertos, format_func=lambda m: f"{m:%Y-%m}"
+            )
+            if st.button("Cerrar mes"):
+                result = cerrar_periodo(mes)
+                if isinstance(result, dict) and "error" in result:
+                    st.error(result["error"])
+                else:
+                    # La tabla de arriba ya muestra el mes como cerrado
+                    st.rerun()
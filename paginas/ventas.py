@@ -0,0 +1,95 @@
+# paginas/ventas.py
+import pandas as pd
+import streamlit as st
+
+import trabajos
+from indice_referencias import etiquetas
+from paginas.comunes import (
+    exportar,
+    paginar,
+    seguir_trabajos,
+    selector,
+    sesion_trabajos,
+    tabla,
+)
+from services import crear_venta
+
+# Filas del informe de importación que se muestran en la tabla
+MAX_FILAS_INFORME = 1000
+
+
+def mostrar():
+    st.header("Gestión de Ventas")
+    accion = st.selectbox("Acción", ["Registrar", "Ver", "Importar", "Exportar"])
+
+    if accion == "Registrar":
+        cliente_id = selector("clientes", "Cliente", "venta_cliente")
+        curso_id = selector("cursos", "Curso", "venta_curso")
+        with st.form("form_venta"):
+            monto = st.number_input(
+                "Monto de Venta", min_value=0.0, value=0.0, step=0.1
+            )
+            submit = st.form_submit_button("Registrar Venta")
+        if submit:
+            if cliente_id is None or curso_id is None:
+                st.error("Seleccione el cliente y el curso")
+                return
+            result = crear_venta(cliente_id, curso_id, monto)
+            if isinstance(result, dict) and "error" in result:
+                st.error(result["error"])
+            else:
+                st.success("Venta registrada")
+
+    elif accion == "Ver":
+        ventas = paginar("ventas_ver", "ventas")
+        df = tabla(
+            ventas,
+            {
+                "id": "ID",
+                "cliente_id": "Cliente ID",
+                "curso_id": "Curso ID",
+                "monto": "Monto",
+                "fecha_venta": "Fecha",
+            },
+        )
+        # Nombres desde el índice en memoria, sin JOIN con clientes y cursos
+        df.insert(2, "Cliente", etiquetas("clientes", df["Cliente ID"]))
+        df.insert(4, "Curso", etiquetas("cursos", df["Curso ID"]))
+        st.dataframe(df)
+
+    elif accion == "Importar":
+        st.info(
+            "Seleccione un archivo CSV o Excel con las columnas cliente_id, "
+            "curso_id, monto y opcionalmente fecha_venta"
+        )
+        file = st.file_uploader("Subir archivo", type=["csv", "xlsx"])
+        if file and st.button("Importar"):
+            trabajos.importar_ventas(file, sesion_trabajos())
+        seguir_trabajos("importar_ventas", _resultado_importacion)
+
+    elif accion == "Exportar":
+        exportar("ventas")
+
+
+def _resultado_importacion(trabajo):
+    result = trabajo.resultado
+    st.success(f"Importación completa. Ventas registradas: {result['insertados']}")
+    stats = result["estadisticas"]
+    st.caption(
+        f"{stats['filas']} filas procesadas en {stats['segundos']:.2f} s "
+        f"({stats['filas_por_segundo']:.0f} filas/s)"
+    )
+    if result["errores"]:
+        st.warning(f"{len(result['errores'])} filas con errores")
+    st.dataframe(
+        pd.read_csv(trabajo.artefacto, nrows=MAX_FILAS_INFORME).rename(
+            columns={"fila": "Fila", "venta_id": "Venta ID", "error": "Error"}
+        )
+    )
+    with open(trabajo.artefacto, "rb") as informe:
+        st.download_button(
+            "Descargar informe completo",
+            informe.read(),
+            file_name="informe_importacion.csv",
+            key=f"informe_{trabajo.id}",
+        )
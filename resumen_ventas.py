@@ -0,0 +1,220 @@
+# resumen_ventas.py
+import argparse
+from datetime import date, datetime, time as dt_time, timedelta
+
+import pandas as pd
+from sqlalchemy import delete, func, insert, select, update
+
+import cache
+from consultas import insert_dialecto
+from db import SessionLocal, obtener_sesion
+from models import Venta, Devolucion, Comision, VentaDiaria
+
+METRICAS = ["ventas_brutas", "reembolsos", "comisiones", "cantidad_ventas"]
+COLUMNAS = ["fecha", "curso_id"] + METRICAS + ["ingreso_neto"]
+
+
+# --- Mantenimiento incremental ---
+def acumular(
+    db,
+    fecha,
+    curso_id,
+    ventas_brutas=0.0,
+    reembolsos=0.0,
+    comisiones=0.0,
+    cantidad_ventas=0,
+):
+    # Suma los incrementos a la fila (fecha, curso_id) sin hacer commit: el
+    # llamador lo confirma junto con la venta, devolución o comisión. fecha y
+    # curso_id pueden ser expresiones SQL (ver dia_de_venta y curso_de_venta).
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    incrementos = {
+        "ventas_brutas": ventas_brutas,
+        "reembolsos": reembolsos,
+        "comisiones": comisiones,
+        "cantidad_ventas": cantidad_ventas,
+        "ingreso_neto": ventas_brutas - reembolsos - comisiones,
+    }
+    stmt = insert_dialecto(db, VentaDiaria)
+    if stmt is not None:
+        stmt = stmt.values(fecha=fecha, curso_id=curso_id, **incrementos)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["fecha", "curso_id"],
+            set_={
+                col: getattr(VentaDiaria, col) + getattr(stmt.excluded, col)
+                for col in incrementos
+            },
+        )
+        db.execute(stmt)
+        return
+    resultado = db.execute(
+        update(VentaDiaria)
+        .where(VentaDiaria.fecha == fecha, VentaDiaria.curso_id == curso_id)
+        .values(
+            {
+                col: getattr(VentaDiaria, col) + valor
+                for col, valor in incrementos.items()
+            }
+        )
+    )
+    if resultado.rowcount == 0:
+        db.execute(
+            insert(VentaDiaria).values(fecha=fecha, curso_id=curso_id, **incrementos)
+        )
+
+
+def curso_de_venta(venta_id):
+    # curso_id de una venta como subconsulta, para acumular sin leerla antes
+    return select(Venta.curso_id).where(Venta.id == venta_id).scalar_subquery()
+
+
+def dia_de_venta(venta_id):
+    # Día de una venta como subconsulta, con el mismo date() que reconstruir()
+    fecha = select(Venta.fecha_venta).where(Venta.id == venta_id).scalar_subquery()
+    return func.date(fecha)
+
+
+# --- Cálculo desde las tablas base ---
+def _filtro_dias(columna, fecha_desde=None, fecha_hasta=None):
+    filtros = []
+    if fecha_desde:
+        filtros.append(columna >= datetime.combine(fecha_desde, dt_time.min))
+    if fecha_hasta:
+        siguiente = fecha_hasta + timedelta(days=1)
+        filtros.append(columna < datetime.combine(siguiente, dt_time.min))
+    return filtros
+
+
+def _agrupar(db, query, metricas):
+    resultado = db.execute(query)
+    df = pd.DataFrame(resultado.all(), columns=["fecha", "curso_id"] + metricas)
+    df["fecha"] = pd.to_datetime(df["fecha"]).dt.date
+    return df
+
+
+def calcular_desde_base(db, fecha_desde=None, fecha_hasta=None):
+    # Las ventas y comisiones se imputan al día de la venta; los reembolsos,
+    # al día de la devolución (y al curso de la venta reembolsada).
+    dia_venta = func.date(Venta.fecha_venta)
+    ventas = _agrupar(
+        db,
+        select(
+            dia_venta,
+            Venta.curso_id,
+            func.sum(Venta.monto),
+            func.count(Venta.id),
+        )
+        .where(*_filtro_dias(Venta.fecha_venta, fecha_desde, fecha_hasta))
+        .group_by(dia_venta, Venta.curso_id),
+        ["ventas_brutas", "cantidad_ventas"],
+    )
+    dia_devolucion = func.date(Devolucion.fecha_devolucion)
+    reembolsos = _agrupar(
+        db,
+        select(dia_devolucion, Venta.curso_id, func.sum(Devolucion.monto_reembolso))
+        .join(Venta, Venta.id == Devolucion.venta_id)
+        .where(*_filtro_dias(Devolucion.fecha_devolucion, fecha_desde, fecha_hasta))
+        .group_by(dia_devolucion, Venta.curso_id),
+        ["reembolsos"],
+    )
+    comisiones = _agrupar(
+        db,
+        select(dia_venta, Venta.curso_id, func.sum(Comision.monto_comision))
+        .join(Venta, Venta.id == Comision.venta_id)
+        .where(*_filtro_dias(Venta.fecha_venta, fecha_desde, fecha_hasta))
+        .group_by(dia_venta, Venta.curso_id),
+        ["comisiones"],
+    )
+    df = ventas.merge(reembolsos, on=["fecha", "curso_id"], how="outer").merge(
+        comisiones, on=["fecha", "curso_id"], how="outer"
+    )
+    df[METRICAS] = df[METRICAS].fillna(0)
+    df["cantidad_ventas"] = df["cantidad_ventas"].astype(int)
+    df["ingreso_neto"] = df["ventas_brutas"] - df["reembolsos"] - df["comisiones"]
+    return df[COLUMNAS].sort_values(["fecha", "curso_id"], ignore_index=True)
+
+
+def _leer_resumen(db, fecha_desde=None, fecha_hasta=None):
+    query = select(*(getattr(VentaDiaria, col) for col in COLUMNAS))
+    if fecha_desde:
+        query = query.where(VentaDiaria.fecha >= fecha_desde)
+    if fecha_hasta:
+        query = query.where(VentaDiaria.fecha <= fecha_hasta)
+    resultado = db.execute(query.order_by(VentaDiaria.fecha, VentaDiaria.curso_id))
+    return pd.DataFrame(resultado.all(), columns=COLUMNAS)
+
+
+# --- Reconstrucción y verificación ---
+def reconstruir(fecha_desde=None, fecha_hasta=None, db=None):
+    # Recalcula el resumen del rango (o completo) a partir de las tablas base.
+    # Si recibe una sesión no hace commit: forma parte de la transacción del llamador.
+    propia = db is None
+    if propia:
+        db = SessionLocal()
+    try:
+        df = calcular_desde_base(db, fecha_desde, fecha_hasta)
+        borrar = delete(VentaDiaria)
+        if fecha_desde:
+            borrar = borrar.where(VentaDiaria.fecha >= fecha_desde)
+        if fecha_hasta:
+            borrar = borrar.where(VentaDiaria.fecha <= fecha_hasta)
+        db.execute(borrar)
+        if not df.empty:
+            db.execute(insert(VentaDiaria), df.to_dict("records"))
+        if propia:
+            db.commit()
+        cache.invalidar("ventas_diarias")
+        return {"filas": len(df.index)}
+    except Exception as e:
+        if propia:
+            db.rollback()
+        return {"error": str(e)}
+    finally:
+        if propia:
+            db.close()
+
+
+def verificar(fecha_desde=None, fecha_hasta=None, tolerancia=0.005, db=None):
+    # Devuelve las filas (fecha, curso_id) donde el resumen no coincide con la base
+    with obtener_sesion(db) as db:
+        esperado = calcular_desde_base(db, fecha_desde, fecha_hasta)
+        actual = _leer_resumen(db, fecha_desde, fecha_hasta)
+    comparado = esperado.merge(
+        actual,
+        on=["fecha", "curso_id"],
+        how="outer",
+        suffixes=("_base", "_resumen"),
+    )
+    diferente = pd.Series(False, index=comparado.index)
+    for col in METRICAS + ["ingreso_neto"]:
+        base = comparado[f"{col}_base"].fillna(0)
+        resumen = comparado[f"{col}_resumen"].fillna(0)
+        diferente |= (base - resumen).abs() > tolerancia
+    return comparado[diferente].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mantenimiento del resumen diario de ventas (ventas_diarias)"
+    )
+    parser.add_argument("comando", choices=["reconstruir", "verificar"])
+    parser.add_argument(
+        "--desde", type=date.fromisoformat, help="Fecha inicial (AAAA-MM-DD)"
+    )
+    parser.add_argument(
+        "--hasta", type=date.fromisoformat, help="Fecha final (AAAA-MM-DD)"
+    )
+    args = parser.parse_args()
+    if args.comando == "reconstruir":
+        resultado = reconstruir(args.desde, args.hasta)
+        if "error" in resultado:
+            raise SystemExit(resultado["error"])
+        print(f"Resumen reconstruido: {resultado['filas']} filas")
+    else:
+        diferencias = verificar(args.desde, args.hasta)
+        if diferencias.empty:
+            print("El resumen coincide con las tablas base")
+        else:
+            print(diferencias.to_string())
+            raise SystemExit(1)
@@ -1,352 +1,828 @@
 # services.py
-from db import SessionLocal
-from models import Curso, Cliente, Venta, Devolucion, Comision, Socio
+from db import obtener_sesion
+from models import Curso, Cliente, Venta, Devolucion, Comision, Socio, VentaDiaria
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
+from sqlalchemy import (
+    DateTime,
+    delete,
+    insert,
+    literal,
+    select,
+    func,
+    text,
+    tuple_,
+    update,
+)
+from datetime import datetime
 import pandas as pd
+import time
+import os
+import buscador
+import cache
+import exportacion
+import resumen_ventas
+import snapshot_analitico
+import snapshot_ventas
+from cache import cacheado, invalida
+from consultas import (
+    GRANULARIDADES,
+    es_violacion_unica,
+    leer_dataframe,
+    insert_ignorando_conflictos,
+    rango_fechas,
+    truncar_fecha,
+    valores_existentes,
+)
+
+# Entidades con paginación por cursor: (modelo, columna de fecha del cursor)
+_ENTIDADES_PAGINABLES = {
+    "cursos": (Curso, Curso.fecha_creacion),
+    "clientes": (Cliente, Cliente.fecha_creacion),
+    "ventas": (Venta, Venta.fecha_venta),
+}
+# Tipos de las columnas de los DataFrames de reportes
+TIPOS_REPORTES = {
+    "id": "int64",
+    "cliente_id": "int64",
+    "curso_id": "int64",
+    "monto": "float64",
+    "fecha_venta": "datetime64[ns]",
+    "pais": "category",
+    "fuente_referencia": "category",
+}
+# Por encima de este tamaño el total se toma de la estimación de PostgreSQL
+_UMBRAL_CONTEO_ESTIMADO = 100000
+# Conteos exactos por (entidad, búsqueda, versión de la tabla)
+_conteos = cache.CacheLRU(max_entradas=1024, ttl=300)
+
+
+def _contar(db, entidad, busqueda=None):
+    # Total para la paginación. Sin búsqueda en PostgreSQL se usa la estimación
+    # del planificador (pg_class.reltuples) si la tabla es grande; los conteos
+    # exactos se guardan hasta que cambia la tabla para no repetir COUNT(*) en
+    # cada rerun.
+    modelo = _ENTIDADES_PAGINABLES[entidad][0]
+    if not busqueda and db.get_bind().dialect.name == "postgresql":
+        estimado = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE relname = :tabla"),
+            {"tabla": modelo.__tablename__},
+        ).scalar()
+        if estimado is not None and estimado >= _UMBRAL_CONTEO_ESTIMADO:
+            return int(estimado)
+    clave = (entidad, busqueda or None, cache.version(entidad))
+    encontrado, total = _conteos.obtener(clave)
+    if encontrado:
+        return total
+    query = select(func.count()).select_from(modelo)
+    if busqueda:
+        query = query.where(buscador.filtro(db, entidad, busqueda))
+    total = db.execute(query).scalar()
+    _conteos.guardar(clave, total)
+    return total
 
 
 # --- Gestión de Cursos ---
-def crear_curso(nombre, descripcion, precio, fecha_creacion=None):
-    db = SessionLocal()
-    try:
-        # Validar que el nombre sea único
-        curso_existente = db.query(Curso).filter(Curso.nombre == nombre).first()
-        if curso_existente:
-            return {"error": "El curso ya existe"}
-        nuevo_curso = Curso(nombre=nombre, descripcion=descripcion, precio=precio)
+@invalida("cursos", solo_altas=True)
+def crear_curso(nombre, descripcion, precio, fecha_creacion=None, db=None):
+    # Una sola sentencia: la unicidad del nombre la resuelve el ON CONFLICT
+    with obtener_sesion(db) as db:
+        valores = {"nombre": nombre, "descripcion": descripcion, "precio": precio}
         if fecha_creacion:
-            nuevo_curso.fecha_creacion = fecha_creacion
-        db.add(nuevo_curso)
-        db.commit()
-        db.refresh(nuevo_curso)
-        return nuevo_curso
-    except IntegrityError as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
-
-
-def actualizar_curso(curso_id, nombre, descripcion, precio):
-    db = SessionLocal()
-    try:
-        curso = db.query(Curso).filter(Curso.id == curso_id).first()
-        if not curso:
-            return {"error": "Curso no encontrado"}
-        # Validar que el nuevo nombre sea único si se cambia
-        if nombre != curso.nombre:
-            curso_existente = db.query(Curso).filter(Curso.nombre == nombre).first()
-            if curso_existente:
+            valores["fecha_creacion"] = fecha_creacion
+        try:
+            stmt = insert_ignorando_conflictos(db, Curso, ["nombre"])
+            curso = db.execute(
+                stmt.values(**valores).returning(*Curso.__table__.c)
+            ).first()
+            if curso is None:
+                db.rollback()
+                return {"error": "El curso ya existe"}
+            db.commit()
+            return curso
+        except IntegrityError as e:
+            db.rollback()
+            if es_violacion_unica(e, Curso.nombre):
+                return {"error": "El curso ya existe"}
+            return {"error": str(e)}
+
+
+@invalida("cursos")
+def actualizar_curso(curso_id, nombre, descripcion, precio, db=None):
+    with obtener_sesion(db) as db:
+        try:
+            curso = db.execute(
+                update(Curso)
+                .where(Curso.id == curso_id)
+                .values(nombre=nombre, descripcion=descripcion, precio=precio)
+                .returning(*Curso.__table__.c)
+            ).first()
+            if curso is None:
+                db.rollback()
+                return {"error": "Curso no encontrado"}
+            db.commit()
+            return curso
+        except IntegrityError as e:
+            db.rollback()
+            if es_violacion_unica(e, Curso.nombre):
                 return {"error": "Ya existe otro curso con ese nombre"}
-        curso.nombre = nombre
-        curso.descripcion = descripcion
-        curso.precio = precio
-        db.commit()
-        db.refresh(curso)
-        return curso
-    except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+            return {"error": str(e)}
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
 
 
-def eliminar_curso(curso_id):
-    db = SessionLocal()
-    try:
-        curso = db.query(Curso).filter(Curso.id == curso_id).first()
-        if not curso:
-            return {"error": "Curso no encontrado"}
-        db.delete(curso)
-        db.commit()
-        return {"message": "Curso eliminado"}
-    except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+@invalida("cursos")
+def eliminar_curso(curso_id, db=None):
+    with obtener_sesion(db) as db:
+        try:
+            eliminado = db.execute(
+                delete(Curso).where(Curso.id == curso_id).returning(Curso.id)
+            ).first()
+            if eliminado is None:
+                db.rollback()
+                return {"error": "Curso no encontrado"}
+            db.commit()
+            return {"message": "Curso eliminado"}
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
 
 
-def obtener_cursos(busqueda=None, filtro=None, orden="asc", page=1, per_page=10):
-    db = SessionLocal()
-    try:
-        query = db.query(Curso)
+@cacheado("cursos")
+def obtener_cursos(
+    busqueda=None, filtro=None, orden="asc", page=1, per_page=10, db=None
+):
+    with obtener_sesion(db) as db:
+        query = select(*Curso.__table__.c)
         if busqueda:
-            query = query.filter(
-                or_(
-                    Curso.nombre.ilike(f"%{busqueda}%"),
-                    Curso.descripcion.ilike(f"%{busqueda}%"),
-                )
-            )
+            query = query.where(buscador.filtro(db, "cursos", busqueda))
+        total = _contar(db, "cursos", busqueda)
         if orden == "asc":
             query = query.order_by(Curso.fecha_creacion.asc())
         else:
             query = query.order_by(Curso.fecha_creacion.desc())
-        total = query.count()
-        cursos = query.offset((page - 1) * per_page).limit(per_page).all()
+        cursos = db.execute(query.offset((page - 1) * per_page).limit(per_page)).all()
         return {"total": total, "cursos": cursos}
-    finally:
-        db.close()
+
+
+@cacheado("cursos")
+def buscar_cursos(busqueda, limite=20, db=None):
+    # [(curso, puntaje)] ordenados por relevancia
+    return buscador.buscar("cursos", busqueda, limite, db=db)
 
 
 def exportar_cursos(formato="csv", busqueda=None):
-    data = obtener_cursos(busqueda=busqueda, per_page=1000)  # ajustar si es necesario
-    cursos = data["cursos"]
-    rows = []
-    for curso in cursos:
-        rows.append(
-            {
-                "id": curso.id,
-                "nombre": curso.nombre,
-                "descripcion": curso.descripcion,
-                "precio": curso.precio,
-                "fecha_creacion": curso.fecha_creacion,
-            }
-        )
-    df = pd.DataFrame(rows)
+    # Sin tope de filas: se arma con la exportación por lotes de exportacion.py
     if formato == "csv":
-        return df.to_csv(index=False)
+        bloques = exportacion.exportar_csv("cursos", busqueda=busqueda)
+        return b"".join(bloques).decode("utf-8")
     elif formato == "excel":
-        from io import BytesIO
-
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Cursos")
-        return output.getvalue()
+        ruta = exportacion.exportar_a_archivo("cursos", "excel", busqueda=busqueda)
+        if isinstance(ruta, dict):
+            return ruta
+        try:
+            with open(ruta, "rb") as archivo:
+                return archivo.read()
+        finally:
+            os.remove(ruta)
 
 
 # --- Gestión de Clientes ---
-def crear_cliente(nombre, email, telefono, pais, fuente_referencia):
-    db = SessionLocal()
-    try:
-        # Validar duplicidad por email
-        cliente_existente = db.query(Cliente).filter(Cliente.email == email).first()
-        if cliente_existente:
-            return {"error": "El cliente con este email ya existe"}
-        nuevo_cliente = Cliente(
-            nombre=nombre,
-            email=email,
-            telefono=telefono,
-            pais=pais,
-            fuente_referencia=fuente_referencia,
-        )
-        db.add(nuevo_cliente)
-        db.commit()
-        db.refresh(nuevo_cliente)
-        return nuevo_cliente
-    except IntegrityError as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
-
-
-def actualizar_cliente(cliente_id, nombre, email, telefono, pais, fuente_referencia):
-    db = SessionLocal()
-    try:
-        cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
-        if not cliente:
-            return {"error": "Cliente no encontrado"}
-        if email != cliente.email:
-            if db.query(Cliente).filter(Cliente.email == email).first():
+@invalida("clientes", solo_altas=True)
+def crear_cliente(nombre, email, telefono, pais, fuente_referencia, db=None):
+    # Una sola sentencia: la duplicidad por email la resuelve el ON CONFLICT
+    with obtener_sesion(db) as db:
+        try:
+            stmt = insert_ignorando_conflictos(db, Cliente, ["email"])
+            cliente = db.execute(
+                stmt.values(
+                    nombre=nombre,
+                    email=email,
+                    telefono=telefono,
+                    pais=pais,
+                    fuente_referencia=fuente_referencia,
+                ).returning(*Cliente.__table__.c)
+            ).first()
+            if cliente is None:
+                db.rollback()
+                return {"error": "El cliente con este email ya existe"}
+            db.commit()
+            return cliente
+        except IntegrityError as e:
+            db.rollback()
+            if es_violacion_unica(e, Cliente.email):
+                return {"error": "El cliente con este email ya existe"}
+            return {"error": str(e)}
+
+
+@invalida("clientes")
+def actualizar_cliente(
+    cliente_id, nombre, email, telefono, pais, fuente_referencia, db=None
+):
+    with obtener_sesion(db) as db:
+        try:
+            cliente = db.execute(
+                update(Cliente)
+                .where(Cliente.id == cliente_id)
+                .values(
+                    nombre=nombre,
+                    email=email,
+                    telefono=telefono,
+                    pais=pais,
+                    fuente_referencia=fuente_referencia,
+                )
+                .returning(*Cliente.__table__.c)
+            ).first()
+            if cliente is None:
+                db.rollback()
+                return {"error": "Cliente no encontrado"}
+            db.commit()
+            return cliente
+        except IntegrityError as e:
+            db.rollback()
+            if es_violacion_unica(e, Cliente.email):
                 return {"error": "Ya existe otro cliente con ese email"}
-        cliente.nombre = nombre
-        cliente.email = email
-        cliente.telefono = telefono
-        cliente.pais = pais
-        cliente.fuente_referencia = fuente_referencia
-        db.commit()
-        db.refresh(cliente)
-        return cliente
-    except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+            return {"error": str(e)}
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
 
 
-def obtener_clientes(busqueda=None, filtro=None):
-    db = SessionLocal()
-    try:
-        query = db.query(Cliente)
+@cacheado("clientes")
+def obtener_clientes(busqueda=None, filtro=None, db=None):
+    with obtener_sesion(db) as db:
+        query = select(*Cliente.__table__.c)
         if busqueda:
-            query = query.filter(
-                or_(
-                    Cliente.nombre.ilike(f"%{busqueda}%"),
-                    Cliente.email.ilike(f"%{busqueda}%"),
-                    Cliente.pais.ilike(f"%{busqueda}%"),
-                )
-            )
-        clientes = query.all()
-        return clientes
-    finally:
-        db.close()
+            query = query.where(buscador.filtro(db, "clientes", busqueda))
+        return db.execute(query).all()
+
 
+@cacheado("clientes")
+def buscar_clientes(busqueda, limite=20, db=None):
+    # [(cliente, puntaje)] ordenados por relevancia
+    return buscador.buscar("clientes", busqueda, limite, db=db)
 
-def importar_clientes_desde_excel(file):
+
+def importar_clientes_desde_excel(file, batch_size=1000, progreso=None, db=None):
     try:
         df = pd.read_excel(file)
     except Exception as e:
         return {"error": f"Error al leer el archivo: {str(e)}"}
+    return importar_clientes_df(df, batch_size=batch_size, progreso=progreso, db=db)
+
+
+@invalida("clientes", solo_altas=True)
+def importar_clientes_df(df, batch_size=1000, progreso=None, db=None):
+    # progreso(filas, total), si se pasa, se llama después de cada lote
+    inicio = time.perf_counter()
     expected_cols = ["nombre", "email", "telefono", "pais", "fuente_referencia"]
     if not all(col in df.columns for col in expected_cols):
         return {
             "error": "Formato de archivo incorrecto. Se requieren columnas: nombre, email, telefono, pais, fuente_referencia"
         }
-    db = SessionLocal()
-    report = {"insertados": 0, "errores": []}
-    for index, row in df.iterrows():
+    total = len(df.index)
+    df = df[expected_cols].copy()
+    df["fila"] = df.index + 2
+    errores = []
+
+    # Validaciones vectorizadas: campos vacíos y emails repetidos dentro del archivo
+    vacios = df[expected_cols].isna().any(axis=1)
+    for fila in df.loc[vacios, "fila"]:
+        errores.append((fila, f"Fila {fila}: Error - Campos obligatorios vacíos."))
+    df = df[~vacios].astype({"telefono": str})
+    repetidos = df["email"].duplicated(keep="first")
+    for fila, email in df.loc[repetidos, ["fila", "email"]].itertuples(index=False):
+        errores.append(
+            (fila, f"Fila {fila}: Email {email} repetido dentro del archivo.")
+        )
+    df = df[~repetidos]
+
+    insertados = 0
+    with obtener_sesion(db) as db:
+        # Un solo chequeo contra la tabla para todos los emails del archivo
+        existentes = valores_existentes(db, Cliente.email, df["email"].tolist())
+        ya_existen = df["email"].isin(existentes)
+        for fila, email in df.loc[ya_existen, ["fila", "email"]].itertuples(
+            index=False
+        ):
+            errores.append((fila, f"Fila {fila}: Cliente con email {email} ya existe."))
+        df = df[~ya_existen]
+
+        for i in range(0, len(df), batch_size):
+            lote = df.iloc[i : i + batch_size]
+            registros = lote[expected_cols].to_dict("records")
+            try:
+                stmt = insert_ignorando_conflictos(db, Cliente, ["email"])
+                nuevos = set(db.scalars(stmt.returning(Cliente.email), registros))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for fila in lote["fila"]:
+                    errores.append((fila, f"Fila {fila}: Error - {str(e)}"))
+                continue
+            insertados += len(nuevos)
+            # Filas insertadas por otra sesión entre el chequeo y el INSERT
+            for fila, email in lote[["fila", "email"]].itertuples(index=False):
+                if email not in nuevos:
+                    errores.append(
+                        (fila, f"Fila {fila}: Cliente con email {email} ya existe.")
+                    )
+            if progreso is not None:
+                progreso(i + len(lote.index), len(df.index))
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "insertados": insertados,
+        "errores": [mensaje for _, mensaje in sorted(errores, key=lambda e: e[0])],
+        "estadisticas": {
+            "filas": total,
+            "segundos": segundos,
+            "filas_por_segundo": total / segundos if segundos else 0.0,
+        },
+    }
+
+
+# --- Gestión de Socios ---
+@invalida("socios")
+def crear_socio(nombre, porcentaje_participacion, db=None):
+    if porcentaje_participacion <= 0:
+        return {"error": "El porcentaje de participación debe ser positivo"}
+    with obtener_sesion(db) as db:
         try:
-            if db.query(Cliente).filter(Cliente.email == row["email"]).first():
-                report["errores"].append(
-                    f"Fila {index + 2}: Cliente con email {row['email']} ya existe."
+            socio = db.execute(
+                insert(Socio)
+                .values(
+                    nombre=nombre, porcentaje_participacion=porcentaje_participacion
                 )
-                continue
-            nuevo_cliente = Cliente(
-                nombre=row["nombre"],
-                email=row["email"],
-                telefono=str(row["telefono"]),
-                pais=row["pais"],
-                fuente_referencia=row["fuente_referencia"],
-            )
-            db.add(nuevo_cliente)
+                .returning(*Socio.__table__.c)
+            ).one()
             db.commit()
-            report["insertados"] += 1
+            return socio
         except Exception as e:
             db.rollback()
-            report["errores"].append(f"Fila {index + 2}: Error - {str(e)}")
-    db.close()
-    return report
+            return {"error": str(e)}
 
 
-# --- Gestión de Ventas ---
-def crear_venta(cliente_id, curso_id, monto, fecha_venta=None):
-    db = SessionLocal()
-    try:
-        from models import Cliente, Curso  # Asegurarse de validar existencia
-
-        cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
-        curso = db.query(Curso).filter(Curso.id == curso_id).first()
-        if not cliente or not curso:
-            return {"error": "Cliente o Curso no encontrado"}
-        if monto <= 0:
-            return {"error": "El monto de la venta debe ser positivo"}
-        nueva_venta = Venta(cliente_id=cliente_id, curso_id=curso_id, monto=monto)
-        if fecha_venta:
-            nueva_venta.fecha_venta = fecha_venta
-        db.add(nueva_venta)
-        db.commit()
-        db.refresh(nueva_venta)
-        return nueva_venta
-    except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+@invalida("socios")
+def actualizar_socio(socio_id, nombre, porcentaje_participacion, db=None):
+    if porcentaje_participacion <= 0:
+        return {"error": "El porcentaje de participación debe ser positivo"}
+    with obtener_sesion(db) as db:
+        try:
+            socio = db.execute(
+                update(Socio)
+                .where(Socio.id == socio_id)
+                .values(
+                    nombre=nombre, porcentaje_participacion=porcentaje_participacion
+                )
+                .returning(*Socio.__table__.c)
+            ).first()
+            if socio is None:
+                db.rollback()
+                return {"error": "Socio no encontrado"}
+            db.commit()
+            return socio
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
 
 
-def obtener_ventas(filtro=None):
-    db = SessionLocal()
-    try:
-        query = db.query(Venta)
-        ventas = query.all()
-        return ventas
-    finally:
-        db.close()
+@cacheado("socios")
+def obtener_socios(db=None):
+    with obtener_sesion(db) as db:
+        return db.execute(select(*Socio.__table__.c).order_by(Socio.id)).all()
 
 
-# --- Gestión de Devoluciones ---
-def crear_devolucion(venta_id, motivo, monto_reembolso, fecha_devolucion=None):
-    db = SessionLocal()
-    try:
-        venta = db.query(Venta).filter(Venta.id == venta_id).first()
-        if not venta:
-            return {"error": "Venta no encontrada"}
-        if monto_reembolso > venta.monto:
-            return {
-                "error": "El monto de reembolso no puede exceder el monto de la venta"
-            }
-        devolucion = Devolucion(
-            venta_id=venta_id, motivo=motivo, monto_reembolso=monto_reembolso
-        )
-        if fecha_devolucion:
-            devolucion.fecha_devolucion = fecha_devolucion
-        db.add(devolucion)
-        db.commit()
-        db.refresh(devolucion)
-        return devolucion
-    except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+# --- Gestión de Ventas ---
+@invalida("ventas_diarias")
+@invalida("ventas", solo_altas=True)
+def crear_venta(cliente_id, curso_id, monto, fecha_venta=None, db=None):
+    if monto <= 0:
+        return {"error": "El monto de la venta debe ser positivo"}
+    with obtener_sesion(db) as db:
+        try:
+            # INSERT ... SELECT que solo inserta si existen el cliente y el
+            # curso; la fecha (si la pone la base) vuelve en el RETURNING
+            fila = select(
+                literal(cliente_id),
+                literal(curso_id),
+                literal(monto),
+                literal(fecha_venta, DateTime) if fecha_venta else func.now(),
+            ).where(
+                select(Cliente.id).where(Cliente.id == cliente_id).exists(),
+                select(Curso.id).where(Curso.id == curso_id).exists(),
+            )
+            venta = db.execute(
+                insert(Venta)
+                .from_select(["cliente_id", "curso_id", "monto", "fecha_venta"], fila)
+                .returning(*Venta.__table__.c)
+            ).first()
+            if venta is None:
+                db.rollback()
+                return {"error": "Cliente o Curso no encontrado"}
+            resumen_ventas.acumular(
+                db,
+                venta.fecha_venta,
+                curso_id,
+                ventas_brutas=monto,
+                cantidad_ventas=1,
+            )
+            db.commit()
+            return venta
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
 
 
-# --- Gestión de Comisiones ---
-def crear_comision(venta_id, closer, porcentaje, ajuste_manual=0.0):
-    db = SessionLocal()
+def importar_ventas_desde_archivo(file, batch_size=1000, progreso=None, db=None):
+    # CSV o Excel con columnas cliente_id, curso_id, monto y opcionalmente fecha_venta
     try:
-        venta = db.query(Venta).filter(Venta.id == venta_id).first()
-        if not venta:
-            return {"error": "Venta no encontrada"}
-        monto_comision = venta.monto * (porcentaje / 100) + ajuste_manual
-        comision = Comision(
-            venta_id=venta_id,
-            closer=closer,
-            porcentaje=porcentaje,
-            monto_comision=monto_comision,
-            ajuste_manual=ajuste_manual,
-        )
-        db.add(comision)
-        db.commit()
-        db.refresh(comision)
-        return comision
+        if getattr(file, "name", "").lower().endswith(".csv"):
+            df = pd.read_csv(file)
+        else:
+            df = pd.read_excel(file)
     except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+        return {"error": f"Error al leer el archivo: {str(e)}"}
+    return crear_ventas_bulk(df, batch_size=batch_size, progreso=progreso, db=db)
 
 
-# --- Funciones de Reportes y Analytics ---
-def obtener_reportes_ventas():
-    db = SessionLocal()
-    try:
-        ventas = db.query(Venta).all()
-        data = []
-        for venta in ventas:
-            data.append(
+@invalida("ventas_diarias")
+@invalida("ventas", solo_altas=True)
+def crear_ventas_bulk(df, batch_size=1000, progreso=None, db=None):
+    # Registra un lote de ventas. Devuelve los contadores, los errores y un
+    # DataFrame "resultados" con una fila por fila del archivo (venta_id o error).
+    # progreso(filas, total), si se pasa, se llama después de cada lote.
+    inicio = time.perf_counter()
+    expected_cols = ["cliente_id", "curso_id", "monto"]
+    if not all(col in df.columns for col in expected_cols):
+        return {
+            "error": "Formato de archivo incorrecto. Se requieren columnas: cliente_id, curso_id, monto"
+        }
+    total = len(df.index)
+    datos = pd.DataFrame({"fila": df.index + 2})
+    for col in expected_cols:
+        datos[col] = pd.to_numeric(df[col], errors="coerce").to_numpy()
+    fecha_original = df.get("fecha_venta", pd.Series(None, index=df.index))
+    fechas = pd.to_datetime(fecha_original, errors="coerce")
+    fecha_invalida = (fecha_original.notna() & fechas.isna()).to_numpy()
+    # Sin fecha la venta se registra con la fecha actual (como crear_venta)
+    datos["fecha_venta"] = fechas.fillna(pd.Timestamp(datetime.now())).to_numpy()
+    datos["error"] = None
+
+    # Validaciones vectorizadas de formato y monto
+    ids_invalidos = datos[["cliente_id", "curso_id"]].isna().any(axis=1) | (
+        datos[["cliente_id", "curso_id"]] % 1 != 0
+    ).any(axis=1)
+    datos.loc[fecha_invalida, "error"] = "Fecha de venta inválida"
+    datos.loc[datos["monto"].isna(), "error"] = "Monto inválido"
+    datos.loc[datos["monto"] <= 0, "error"] = "El monto de la venta debe ser positivo"
+    datos.loc[ids_invalidos, "error"] = "cliente_id y curso_id deben ser enteros"
+
+    insertados = 0
+    datos["venta_id"] = pd.Series(pd.NA, index=datos.index, dtype="Int64")
+    with obtener_sesion(db) as db:
+        # Un solo chequeo de existencia por tabla para todo el archivo
+        validas = datos["error"].isna()
+        clientes = valores_existentes(
+            db,
+            Cliente.id,
+            datos.loc[validas, "cliente_id"].astype(int).unique().tolist(),
+        )
+        cursos = valores_existentes(
+            db, Curso.id, datos.loc[validas, "curso_id"].astype(int).unique().tolist()
+        )
+        datos.loc[validas & ~datos["curso_id"].isin(cursos), "error"] = (
+            "Curso no encontrado"
+        )
+        datos.loc[validas & ~datos["cliente_id"].isin(clientes), "error"] = (
+            "Cliente no encontrado"
+        )
+
+        validas = datos.index[datos["error"].isna()]
+        for i in range(0, len(validas), batch_size):
+            lote = datos.loc[validas[i : i + batch_size]]
+            registros = [
                 {
-                    "id": venta.id,
-                    "cliente_id": venta.cliente_id,
-                    "curso_id": venta.curso_id,
-                    "monto": venta.monto,
-                    "fecha_venta": venta.fecha_venta,
+                    "cliente_id": int(cliente_id),
+                    "curso_id": int(curso_id),
+                    "monto": float(monto),
+                    "fecha_venta": fecha.to_pydatetime(),
                 }
+                for cliente_id, curso_id, monto, fecha in lote[
+                    ["cliente_id", "curso_id", "monto", "fecha_venta"]
+                ].itertuples(index=False)
+            ]
+            try:
+                ids = db.scalars(
+                    insert(Venta).returning(Venta.id, sort_by_parameter_order=True),
+                    registros,
+                ).all()
+                # El resumen diario se actualiza una vez por (día, curso) del lote
+                resumen = lote.groupby([lote["fecha_venta"].dt.date, "curso_id"]).agg(
+                    ventas_brutas=("monto", "sum"), cantidad_ventas=("monto", "size")
+                )
+                for (fecha, curso_id), fila in resumen.iterrows():
+                    resumen_ventas.acumular(
+                        db,
+                        fecha,
+                        int(curso_id),
+                        ventas_brutas=float(fila["ventas_brutas"]),
+                        cantidad_ventas=int(fila["cantidad_ventas"]),
+                    )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                datos.loc[lote.index, "error"] = f"Error - {str(e)}"
+                continue
+            datos.loc[lote.index, "venta_id"] = ids
+            insertados += len(ids)
+            if progreso is not None:
+                progreso(i + len(lote.index), len(validas))
+
+    errores = [
+        f"Fila {fila}: {error}"
+        for fila, error in datos.loc[
+            datos["error"].notna(), ["fila", "error"]
+        ].itertuples(index=False)
+    ]
+    segundos = time.perf_counter() - inicio
+    return {
+        "insertados": insertados,
+        "errores": errores,
+        "resultados": datos[["fila", "venta_id", "error"]],
+        "estadisticas": {
+            "filas": total,
+            "segundos": segundos,
+            "filas_por_segundo": total / segundos if segundos else 0.0,
+        },
+    }
+
+
+@cacheado("ventas")
+def obtener_ventas(filtro=None, db=None):
+    with obtener_sesion(db) as db:
+        return db.execute(select(*Venta.__table__.c)).all()
+
+
+@cacheado("ventas")
+def ventas_de_cliente(cliente_id, limite=50, db=None):
+    # Últimas ventas de un cliente, para elegir una sin escribir su id (usa el
+    # índice por cliente_id y fecha_venta)
+    with obtener_sesion(db) as db:
+        return db.execute(
+            select(Venta.id, Venta.curso_id, Venta.monto, Venta.fecha_venta)
+            .where(Venta.cliente_id == cliente_id)
+            .order_by(Venta.fecha_venta.desc(), Venta.id.desc())
+            .limit(limite)
+        ).all()
+
+
+# --- Paginación por cursor (keyset) ---
+@cacheado(lambda entidad, *args, **kwargs: (entidad,))
+def obtener_pagina(
+    entidad, cursor=None, per_page=20, busqueda=None, orden="desc", db=None
+):
+    # Página de cursos, clientes o ventas ordenada por (fecha, id). El cursor
+    # es el de la última fila de la página anterior, así que cualquier página
+    # cuesta lo mismo que la primera (no hay OFFSET).
+    if entidad not in _ENTIDADES_PAGINABLES:
+        return {"error": f"Entidad no paginable: {entidad}"}
+    if busqueda and entidad not in buscador.ENTIDADES:
+        return {"error": f"La entidad {entidad} no admite búsqueda"}
+    modelo, columna_fecha = _ENTIDADES_PAGINABLES[entidad]
+    clave = tuple_(columna_fecha, modelo.id)
+    with obtener_sesion(db) as db:
+        query = select(*modelo.__table__.c)
+        if busqueda:
+            query = query.where(buscador.filtro(db, entidad, busqueda))
+        if cursor:
+            posicion = _decodificar_cursor(cursor)
+            query = query.where(
+                clave > posicion if orden == "asc" else clave < posicion
             )
-        df = pd.DataFrame(data)
-        return df
-    finally:
-        db.close()
+        if orden == "asc":
+            query = query.order_by(columna_fecha.asc(), modelo.id.asc())
+        else:
+            query = query.order_by(columna_fecha.desc(), modelo.id.desc())
+        # Se pide una fila extra para saber si hay página siguiente
+        items = db.execute(query.limit(per_page + 1)).all()
+        siguiente = None
+        if len(items) > per_page:
+            items = items[:per_page]
+            ultimo = items[-1]
+            siguiente = _codificar_cursor(getattr(ultimo, columna_fecha.key), ultimo.id)
+        return {
+            "items": items,
+            "siguiente": siguiente,
+            "total": _contar(db, entidad, busqueda),
+        }
 
 
-def obtener_reportes_clientes():
-    db = SessionLocal()
-    try:
-        clientes = db.query(Cliente).all()
-        data = []
-        for cliente in clientes:
-            data.append(
-                {
-                    "id": cliente.id,
-                    "nombre": cliente.nombre,
-                    "email": cliente.email,
-                    "pais": cliente.pais,
-                    "fuente_referencia": cliente.fuente_referencia,
+def _codificar_cursor(fecha, id_):
+    return f"{fecha.isoformat()}|{id_}"
+
+
+def _decodificar_cursor(cursor):
+    fecha, id_ = cursor.rsplit("|", 1)
+    return (datetime.fromisoformat(fecha), int(id_))
+
+
+# --- Gestión de Devoluciones ---
+@invalida("ventas_diarias")
+@invalida("devoluciones", solo_altas=True)
+def crear_devolucion(venta_id, motivo, monto_reembolso, fecha_devolucion=None, db=None):
+    with obtener_sesion(db) as db:
+        try:
+            # Solo inserta si la venta existe y cubre el reembolso; el resumen
+            # toma el curso de la venta con una subconsulta
+            fila = select(
+                Venta.id,
+                literal(motivo),
+                literal(monto_reembolso),
+                literal(fecha_devolucion, DateTime) if fecha_devolucion else func.now(),
+            ).where(Venta.id == venta_id, Venta.monto >= monto_reembolso)
+            devolucion = db.execute(
+                insert(Devolucion)
+                .from_select(
+                    ["venta_id", "motivo", "monto_reembolso", "fecha_devolucion"],
+                    fila,
+                )
+                .returning(*Devolucion.__table__.c)
+            ).first()
+            if devolucion is None:
+                db.rollback()
+                # Solo en este caso hace falta leer la venta, para el mensaje
+                if db.get(Venta, venta_id) is None:
+                    return {"error": "Venta no encontrada"}
+                return {
+                    "error": "El monto de reembolso no puede exceder el monto de la venta"
                 }
+            resumen_ventas.acumular(
+                db,
+                devolucion.fecha_devolucion,
+                resumen_ventas.curso_de_venta(venta_id),
+                reembolsos=monto_reembolso,
+            )
+            db.commit()
+            return devolucion
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+# --- Gestión de Comisiones ---
+@invalida("comisiones", "ventas_diarias")
+def crear_comision(venta_id, closer, porcentaje, ajuste_manual=0.0, db=None):
+    with obtener_sesion(db) as db:
+        try:
+            # El monto se calcula en la base a partir de la venta, y el resumen
+            # toma su día y curso con subconsultas
+            fila = select(
+                Venta.id,
+                literal(closer),
+                literal(porcentaje),
+                Venta.monto * (porcentaje / 100) + ajuste_manual,
+                literal(ajuste_manual),
+            ).where(Venta.id == venta_id)
+            comision = db.execute(
+                insert(Comision)
+                .from_select(
+                    [
+                        "venta_id",
+                        "closer",
+                        "porcentaje",
+                        "monto_comision",
+                        "ajuste_manual",
+                    ],
+                    fila,
+                )
+                .returning(*Comision.__table__.c)
+            ).first()
+            if comision is None:
+                db.rollback()
+                return {"error": "Venta no encontrada"}
+            resumen_ventas.acumular(
+                db,
+                resumen_ventas.dia_de_venta(venta_id),
+                resumen_ventas.curso_de_venta(venta_id),
+                comisiones=comision.monto_comision,
             )
-        df = pd.DataFrame(data)
-        return df
-    finally:
-        db.close()
+            db.commit()
+            return comision
+        except Exception as e:
+            db.rollback()
+            return {"error": str(e)}
+
+
+# --- Funciones de Reportes y Analytics ---
+# Las consultas se arman aparte para reutilizarlas en servicios_async.py
+def query_reportes_clientes():
+    return select(
+        Cliente.id,
+        Cliente.nombre,
+        Cliente.email,
+        Cliente.pais,
+        Cliente.fuente_referencia,
+    )
+
+
+def query_reporte_agrupado(
+    dialecto, granularidad="mes", agrupar_por=None, fecha_desde=None, fecha_hasta=None
+):
+    # Agregación en la base: una fila por período (y por curso o país si se pide).
+    # Sin desglose o por curso se lee del resumen diario (ventas_diarias); el
+    # desglose por país necesita el cliente y se calcula sobre ventas.
+    if granularidad not in GRANULARIDADES:
+        return {"error": f"Granularidad no soportada: {granularidad}"}
+    if agrupar_por not in (None, "curso", "pais"):
+        return {"error": f"Agrupación no soportada: {agrupar_por}"}
+    if agrupar_por == "pais":
+        query = _query_ventas_por_pais(dialecto, granularidad)
+        fecha = Venta.fecha_venta
+    else:
+        query = _query_resumen_diario(dialecto, granularidad, agrupar_por)
+        fecha = VentaDiaria.fecha
+    return query.where(*rango_fechas(fecha, fecha_desde, fecha_hasta))
+
+
+def preparar_reporte_agrupado(df):
+    df["periodo"] = pd.to_datetime(df["periodo"])
+    return df
+
+
+def obtener_reportes_ventas(db=None):
+    # Vista del snapshot incremental en memoria, con ids int32 (ver
+    # snapshot_ventas.py)
+    return snapshot_ventas.ventas(db=db)
+
+
+@cacheado("clientes")
+def obtener_reportes_clientes(db=None):
+    with obtener_sesion(db) as db:
+        return leer_dataframe(db, query_reportes_clientes(), TIPOS_REPORTES)
+
+
+@cacheado("ventas", "ventas_diarias", "clientes")
+def obtener_reporte_ventas_agrupado(
+    granularidad="mes",
+    agrupar_por=None,
+    fecha_desde=None,
+    fecha_hasta=None,
+    backend=None,
+    db=None,
+):
+    # backend: "oltp" (la base) o "snapshot" (ver snapshot_analitico.py); por
+    # defecto el de REPORTES_BACKEND
+    backend = backend or snapshot_analitico.BACKEND
+    error = snapshot_analitico.error_backend(backend)
+    if error:
+        return error
+    with obtener_sesion(db) as db:
+        if snapshot_analitico.usa_snapshot(backend):
+            dialecto = snapshot_analitico.DIALECTO
+        else:
+            dialecto = db.get_bind().dialect.name
+        query = query_reporte_agrupado(
+            dialecto, granularidad, agrupar_por, fecha_desde, fecha_hasta
+        )
+        if isinstance(query, dict):
+            return query
+        return preparar_reporte_agrupado(snapshot_analitico.leer(query, backend, db=db))
+
+
+def _query_resumen_diario(dialecto, granularidad, agrupar_por):
+    periodo = truncar_fecha(dialecto, VentaDiaria.fecha, granularidad).label("periodo")
+    claves = [periodo]
+    if agrupar_por == "curso":
+        claves.append(VentaDiaria.curso_id.label("curso_id"))
+    total = func.sum(VentaDiaria.ventas_brutas)
+    cantidad = func.sum(VentaDiaria.cantidad_ventas)
+    return (
+        select(
+            *claves,
+            total.label("total"),
+            cantidad.label("cantidad"),
+            (total / func.nullif(cantidad, 0)).label("promedio"),
+            func.sum(VentaDiaria.reembolsos).label("reembolsos"),
+            func.sum(VentaDiaria.comisiones).label("comisiones"),
+            func.sum(VentaDiaria.ingreso_neto).label("ingreso_neto"),
+        )
+        .group_by(*claves)
+        .order_by(*claves)
+    )
+
+
+def _query_ventas_por_pais(dialecto, granularidad):
+    periodo = truncar_fecha(dialecto, Venta.fecha_venta, granularidad).label("periodo")
+    claves = [periodo, Cliente.pais.label("pais")]
+    return (
+        select(
+            *claves,
+            func.sum(Venta.monto).label("total"),
+            func.count(Venta.id).label("cantidad"),
+            func.avg(Venta.monto).label("promedio"),
+        )
+        .join(Cliente, Cliente.id == Venta.cliente_id)
+        .group_by(*claves)
+        .order_by(*claves)
+    )
@@ -0,0 +1,218 @@
+# servicios_async.py
+# Versiones asíncronas de los servicios de reportes, con la extensión asyncio
+# de SQLAlchemy (asyncpg en PostgreSQL, aiosqlite en SQLite).
+# ejecutar_concurrente() las corre a la vez desde el script de Streamlit, así
+# que una página con varios reportes tarda lo que el más lento y no la suma.
+#
+# Las corrutinas corren en un event loop propio, en un hilo que vive lo que el
+# proceso: las conexiones del pool asíncrono quedan atadas al loop que las
+# abrió, así que no sirve un asyncio.run() nuevo en cada rerun. Si el driver
+# asíncrono no está instalado, cada servicio corre su versión sincrónica en un
+# hilo del loop, con una sesión propia.
+import asyncio
+import functools
+import importlib.util
+import os
+import threading
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import analitica_clientes
+import db
+import services
+import snapshot_analitico
+from cache import cacheado_async
+from consultas import dataframe_de_resultado
+
+# Backend: (módulo del driver, drivername asíncrono)
+DRIVERS = {
+    "postgresql": ("asyncpg", "postgresql+asyncpg"),
+    "sqlite": ("aiosqlite", "sqlite+aiosqlite"),
+}
+TIMEOUT = float(os.environ.get("ASYNC_TIMEOUT_S", 120))
+
+_lock = threading.Lock()
+_loop = None
+# Solo se tocan desde el hilo del loop
+_engine = None
+_url_sincronica = None
+
+
+def url_async(url):
+    # URL equivalente con driver asíncrono, o None si no hay driver instalado
+    url = make_url(url)
+    if url.get_backend_name() not in DRIVERS:
+        return None
+    modulo, drivername = DRIVERS[url.get_backend_name()]
+    if importlib.util.find_spec(modulo) is None:
+        return None
+    return url.set(drivername=drivername)
+
+
+def _loop_de_fondo():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="servicios_async", daemon=True
+            ).start()
+        return _loop
+
+
+async def _engine_actual():
+    # Engine asíncrono de la misma base que db.engine (db.configurar puede
+    # cambiarla); None si no hay driver asíncrono
+    global _engine, _url_sincronica
+    if _url_sincronica is None or db.engine.url != _url_sincronica:
+        anterior = _engine
+        url = url_async(db.engine.url)
+        _engine = db.crear_engine(url, create_async_engine) if url else None
+        _url_sincronica = db.engine.url
+        if anterior is not None:
+            await anterior.dispose()
+    return _engine
+
+
+async def _leer(engine, query, tipos=None):
+    async with engine.connect() as conn:
+        return dataframe_de_resultado(await conn.execute(query), tipos)
+
+
+async def _en_hilo(servicio, *args, **kwargs):
+    # run_in_executor no copia el contexto: el servicio abre su propia sesión
+    # en lugar de usar la del rerun, que no es segura entre hilos
+    return await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(servicio, *args, **kwargs)
+    )
+
+
+def ejecutar_concurrente(**corrutinas):
+    # Corre las corrutinas a la vez y devuelve {nombre: resultado}. La que
+    # falla devuelve {"error": ...} sin cancelar las demás.
+    async def todas():
+        resultados = await asyncio.gather(*corrutinas.values(), return_exceptions=True)
+        return {
+            nombre: {"error": str(r)} if isinstance(r, Exception) else r
+            for nombre, r in zip(corrutinas, resultados)
+        }
+
+    futuro = asyncio.run_coroutine_threadsafe(todas(), _loop_de_fondo())
+    return futuro.result(TIMEOUT)
+
+
+# --- Reportes ---
+async def obtener_reportes_ventas():
+    # El snapshot incremental solo lee las ventas nuevas: basta un hilo
+    return await _en_hilo(services.obtener_reportes_ventas)
+
+
+@cacheado_async("clientes")
+async def obtener_reportes_clientes():
+    engine = await _engine_actual()
+    if engine is None:
+        return await _en_hilo(services.obtener_reportes_clientes)
+    return await _leer(
+        engine, services.query_reportes_clientes(), services.TIPOS_REPORTES
+    )
+
+
+@cacheado_async("ventas", "ventas_diarias", "clientes")
+async def obtener_reporte_ventas_agrupado(
+    granularidad="mes",
+    agrupar_por=None,
+    fecha_desde=None,
+    fecha_hasta=None,
+    backend=None,
+):
+    backend = backend or snapshot_analitico.BACKEND
+    engine = await _engine_actual()
+    # DuckDB no tiene driver asíncrono: el snapshot se consulta en un hilo
+    if engine is None or backend != "oltp":
+        return await _en_hilo(
+            services.obtener_reporte_ventas_agrupado,
+            granularidad,
+            agrupar_por,
+            fecha_desde,
+            fecha_hasta,
+            backend,
+        )
+    query = services.query_reporte_agrupado(
+        engine.dialect.name, granularidad, agrupar_por, fecha_desde, fecha_hasta
+    )
+    if isinstance(query, dict):
+        return query
+    return services.preparar_reporte_agrupado(await _leer(engine, query))
+
+
+# --- Análisis de clientes (analitica_clientes.py) ---
+async def cohortes(
+    fecha_desde=None, fecha_hasta=None, fecha_referencia=None, backend=None
+):
+    hasta = fecha_referencia or analitica_clientes.fecha_referencia_por_defecto()
+    backend = backend or snapshot_analitico.BACKEND
+    return await _cohortes(fecha_desde, fecha_hasta, hasta, backend)
+
+
+@cacheado_async(ttl=analitica_clientes.UN_DIA)
+async def _cohortes(fecha_desde, fecha_hasta, hasta, backend):
+    engine = await _engine_actual()
+    if engine is None or backend != "oltp":
+        return await _en_hilo(
+            analitica_clientes.cohortes, fecha_desde, fecha_hasta, hasta, backend
+        )
+    query = analitica_clientes.query_cohortes(fecha_desde, fecha_hasta, hasta)
+    return analitica_clientes.preparar_cohortes(await _leer(engine, query))
+
+
+async def resumen_cohortes(
+    fecha_desde=None, fecha_hasta=None, fecha_referencia=None, backend=None
+):
+    hasta = fecha_referencia or analitica_clientes.fecha_referencia_por_defecto()
+    backend = backend or snapshot_analitico.BACKEND
+    return await _resumen_cohortes(fecha_desde, fecha_hasta, hasta, backend)
+
+
+@cacheado_async(ttl=analitica_clientes.UN_DIA)
+async def _resumen_cohortes(fecha_desde, fecha_hasta, hasta, backend):
+    engine = await _engine_actual()
+    if engine is None or backend != "oltp":
+        return await _en_hilo(
+            analitica_clientes.resumen_cohortes,
+            fecha_desde,
+            fecha_hasta,
+            hasta,
+            backend,
+        )
+    query = analitica_clientes.query_resumen_cohortes(fecha_desde, fecha_hasta, hasta)
+    return analitica_clientes.preparar_resumen_cohortes(await _leer(engine, query))
+
+
+async def rfm(fecha_referencia=None, backend=None):
+    hasta = fecha_referencia or analitica_clientes.fecha_referencia_por_defecto()
+    return await _rfm(hasta, backend or snapshot_analitico.BACKEND)
+
+
+@cacheado_async(ttl=analitica_clientes.UN_DIA)
+async def _rfm(hasta, backend):
+    engine = await _engine_actual()
+    if engine is None or backend != "oltp":
+        return await _en_hilo(analitica_clientes.rfm, hasta, backend)
+    query = analitica_clientes.query_rfm(hasta)
+    return analitica_clientes.preparar_rfm(await _leer(engine, query), hasta)
+
+
+async def ltv_por(dimension, fecha_referencia=None, backend=None):
+    if dimension not in analitica_clientes.DIMENSIONES:
+        return {"error": f"Dimensión no soportada: {dimension}"}
+    hasta = fecha_referencia or analitica_clientes.fecha_referencia_por_defecto()
+    return await _ltv_por(dimension, hasta, backend or snapshot_analitico.BACKEND)
+
+
+@cacheado_async(ttl=analitica_clientes.UN_DIA)
+async def _ltv_por(dimension, hasta, backend):
+    engine = await _engine_actual()
+    if engine is None or backend != "oltp":
+        return await _en_hilo(analitica_clientes.ltv_por, dimension, hasta, backend)
+    return await _leer(engine, analitica_clientes.query_ltv(dimension, hasta))
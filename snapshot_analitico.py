@@ -0,0 +1,598 @@
+# snapshot_analitico.py
+# Copia columnar de ventas, devoluciones, comisiones, clientes y cursos en
+# archivos Parquet, para que los reportes se consulten con DuckDB sin cargar
+# la base transaccional. Ventas, devoluciones y comisiones se parten por mes
+# (de la venta o de la devolución); clientes y cursos, que son chicas y se
+# editan sin patrón de solo altas, van en un solo archivo que se reescribe
+# entero en cada actualización.
+#
+# La actualización es incremental: lee de la base solo las filas con id mayor
+# a la marca de agua de cada tabla y las agrega como un archivo nuevo por mes.
+# Las ediciones y bajas (comisiones liquidadas, devoluciones editadas) se
+# detectan comparando por mes la cantidad de filas, la suma de ids y un valor
+# de control entre la base y el snapshot; los meses que difieren se
+# reescriben.
+# Esa verificación recorre las tablas, así que se hace cada VERIFICACION_S o
+# cuando este proceso modificó la tabla (ver cache.invalida).
+#
+# estado.json lista los archivos vigentes. Las consultas leen esa lista, así
+# que nunca ven un mes a medio escribir; los archivos reemplazados se borran
+# después de GRACIA_S, cuando ya no los lee ninguna consulta en curso.
+#
+# Las consultas son los mismos select() de SQLAlchemy de los servicios,
+# compilados para PostgreSQL: DuckDB entiende ese SQL (date_trunc, extract,
+# funciones de ventana). Las tablas son vistas sobre los archivos con el
+# mismo nombre y columnas que en la base, más ventas_diarias, que se calcula
+# sobre el snapshot en lugar de copiarse.
+#
+#   python -m snapshot_analitico actualizar [--verificar | --reconstruir]
+#   python -m snapshot_analitico estado
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+import cache
+from consultas import leer_dataframe, numero_mes
+from db import obtener_sesion
+from exportacion import TAMANO_LOTE, esquema_arrow
+from models import Cliente, Comision, Curso, Devolucion, Venta
+
+DIRECTORIO = os.environ.get(
+    "ANALITICO_DIRECTORIO",
+    os.path.join(tempfile.gettempdir(), "cursos_analitico"),
+)
+# Backend de los reportes cuando no se pide uno: "oltp" (la base) o "snapshot"
+BACKENDS = ("oltp", "snapshot")
+BACKEND = os.environ.get("REPORTES_BACKEND", "oltp")
+# Segundos de antigüedad a partir de los cuales una consulta pide actualizar
+VIGENCIA_S = float(os.environ.get("ANALITICO_VIGENCIA_S", 300))
+# Segundos entre verificaciones de ediciones y bajas
+VERIFICACION_S = float(os.environ.get("ANALITICO_VERIFICACION_S", 24 * 3600))
+# Segundos que se conservan los archivos reemplazados
+GRACIA_S = 600
+# Con más archivos que esto un mes se compacta en uno solo
+MAX_ARCHIVOS_POR_MES = 8
+# Una actualización que dejó el bloqueo hace más que esto se da por muerta
+_BLOQUEO_VENCIDO_S = 3600
+# Dialecto con el que se compilan las consultas para DuckDB
+DIALECTO = "postgresql"
+_DIALECTO = postgresql.dialect(paramstyle="numeric_dollar")
+
+# tabla -> (modelo, fecha que define el mes, valor de control). El orden es el
+# de lectura: las que referencian a otra van antes, así la referenciada
+# siempre incluye las filas que ellas apuntan.
+TABLAS = {
+    "comisiones": (
+        Comision,
+        Venta.fecha_venta,
+        Comision.monto_comision + func.coalesce(Comision.ajuste_reembolso, 0.0),
+    ),
+    "devoluciones": (
+        Devolucion,
+        Devolucion.fecha_devolucion,
+        Devolucion.monto_reembolso,
+    ),
+    "ventas": (Venta, Venta.fecha_venta, Venta.monto),
+    "clientes": (Cliente, None, None),
+    "cursos": (Curso, None, None),
+}
+
+# Resumen diario calculado sobre el snapshot, con el mismo criterio que
+# resumen_ventas.calcular_desde_base: los reembolsos van al día de la
+# devolución y las comisiones al día de la venta. Cada actualización lo
+# guarda en un archivo propio (ver _materializar_resumen).
+_VISTA_VENTAS_DIARIAS = """
+CREATE OR REPLACE VIEW ventas_diarias AS
+WITH v AS (
+    SELECT CAST(fecha_venta AS DATE) AS fecha, curso_id,
+        SUM(monto) AS ventas_brutas, COUNT(*) AS cantidad_ventas
+    FROM ventas GROUP BY 1, 2
+), r AS (
+    SELECT CAST(d.fecha_devolucion AS DATE) AS fecha, v.curso_id,
+        SUM(d.monto_reembolso) AS reembolsos
+    FROM devoluciones d JOIN ventas v ON v.id = d.venta_id GROUP BY 1, 2
+), c AS (
+    SELECT CAST(v.fecha_venta AS DATE) AS fecha, v.curso_id,
+        SUM(c.monto_comision) AS comisiones
+    FROM comisiones c JOIN ventas v ON v.id = c.venta_id GROUP BY 1, 2
+)
+SELECT fecha, curso_id,
+    COALESCE(ventas_brutas, 0) AS ventas_brutas,
+    COALESCE(reembolsos, 0) AS reembolsos,
+    COALESCE(comisiones, 0) AS comisiones,
+    COALESCE(ventas_brutas, 0) - COALESCE(reembolsos, 0)
+        - COALESCE(comisiones, 0) AS ingreso_neto,
+    CAST(COALESCE(cantidad_ventas, 0) AS BIGINT) AS cantidad_ventas
+FROM v FULL JOIN r USING (fecha, curso_id) FULL JOIN c USING (fecha, curso_id)
+"""
+
+_lock = threading.Lock()
+_lock_actualizacion = threading.Lock()
+_duckdb = None
+_generacion = None
+# Modificaciones de cada tabla (cache.modificaciones) en la última actualización
+_modificaciones_vistas = {}
+
+
+# --- Estado ---
+def _ruta_estado():
+    return os.path.join(DIRECTORIO, "estado.json")
+
+
+def existe():
+    return os.path.exists(_ruta_estado())
+
+
+def leer_estado():
+    if not existe():
+        return {
+            "generacion": 0,
+            "actualizado": None,
+            "tablas": {
+                tabla: {"marca": 0, "verificado": None, "meses": {}} for tabla in TABLAS
+            },
+            "ventas_diarias": None,
+            "borrar": [],
+        }
+    with open(_ruta_estado(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_estado(estado):
+    estado["generacion"] += 1
+    temporal = _ruta_estado() + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=1)
+    os.replace(temporal, _ruta_estado())
+
+
+def actualizado():
+    # Fecha de la última actualización, o None si no hay snapshot
+    if not existe():
+        return None
+    marca = leer_estado()["actualizado"]
+    return datetime.fromtimestamp(marca) if marca else None
+
+
+@contextmanager
+def _bloqueo():
+    # Una sola actualización a la vez, también entre procesos (la app y el
+    # comando de línea). Devuelve False si hay otra en curso.
+    if not _lock_actualizacion.acquire(blocking=False):
+        yield False
+        return
+    ruta = os.path.join(DIRECTORIO, ".actualizando")
+    try:
+        os.makedirs(DIRECTORIO, exist_ok=True)
+        try:
+            if time.time() - os.path.getmtime(ruta) > _BLOQUEO_VENCIDO_S:
+                os.remove(ruta)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(ruta, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            os.remove(ruta)
+    finally:
+        _lock_actualizacion.release()
+
+
+# --- Escritura ---
+def _columnas(modelo):
+    return list(modelo.__table__.c)
+
+
+def _nombre_mes(numero):
+    return "" if numero is None else f"{numero // 12:04d}-{numero % 12 + 1:02d}"
+
+
+def _rango_mes(nombre):
+    anio, mes = map(int, nombre.split("-"))
+    siguiente = (anio, mes + 1) if mes < 12 else (anio + 1, 1)
+    return datetime(anio, mes, 1), datetime(*siguiente, 1)
+
+
+def _query(tabla, columnas):
+    modelo, fecha, _ = TABLAS[tabla]
+    query = select(*columnas).select_from(modelo)
+    if fecha is not None and fecha.class_ is not modelo:
+        query = query.join(fecha.class_)
+    return query
+
+
+def _exportar(db, tabla, desde_id=0, hasta_id=None, mes=None, progreso=None):
+    # Escribe las filas con id en (desde_id, hasta_id] (y del mes, si se pide)
+    # en un archivo nuevo por mes. Devuelve {mes: ruta relativa}, el id mayor
+    # y la cantidad de filas.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    modelo, fecha, _ = TABLAS[tabla]
+    columnas = _columnas(modelo)
+    nombres = [c.key for c in columnas]
+    esquema = esquema_arrow(columnas)
+    if fecha is None:
+        query = _query(tabla, columnas)
+    else:
+        query = _query(tabla, columnas + [numero_mes(fecha).label("_mes")])
+        nombres_lote = nombres + ["_mes"]
+    query = query.where(modelo.id > desde_id)
+    if hasta_id is not None:
+        query = query.where(modelo.id <= hasta_id)
+    if mes:
+        desde, hasta = _rango_mes(mes)
+        query = query.where(fecha >= desde, fecha < hasta)
+    resultado = db.execute(
+        query.order_by(modelo.id).execution_options(yield_per=TAMANO_LOTE)
+    )
+    escritores, archivos, marca, filas = {}, {}, desde_id, 0
+    try:
+        for particion in resultado.partitions():
+            if fecha is None:
+                grupos = [("", pd.DataFrame(particion, columns=nombres))]
+            else:
+                lote = pd.DataFrame(particion, columns=nombres_lote)
+                grupos = [
+                    (_nombre_mes(int(numero)), grupo)
+                    for numero, grupo in lote.groupby("_mes")
+                ]
+            for nombre, grupo in grupos:
+                if nombre not in escritores:
+                    archivos[nombre] = os.path.join(
+                        tabla, nombre, f"{uuid.uuid4().hex}.parquet"
+                    )
+                    ruta = os.path.join(DIRECTORIO, archivos[nombre])
+                    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                    escritores[nombre] = pq.ParquetWriter(ruta, esquema)
+                escritores[nombre].write_table(
+                    pa.Table.from_pandas(
+                        grupo[nombres], schema=esquema, preserve_index=False
+                    )
+                )
+                marca = max(marca, int(grupo["id"].iloc[-1]))
+                filas += len(grupo.index)
+            if progreso is not None:
+                progreso(filas, None, f"{tabla}: {filas} filas")
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return archivos, marca, filas
+
+
+def _compactar(tabla, archivos):
+    # Une los archivos de un mes en uno solo, leyendo del snapshot
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    relativa = os.path.join(os.path.dirname(archivos[0]), f"{uuid.uuid4().hex}.parquet")
+    pq.write_table(
+        pa.concat_tables(
+            pq.read_table(os.path.join(DIRECTORIO, archivo)) for archivo in archivos
+        ),
+        os.path.join(DIRECTORIO, relativa),
+    )
+    return relativa
+
+
+def _literal(ruta):
+    return "'" + ruta.replace("'", "''") + "'"
+
+
+def _materializar_resumen(estado):
+    # Escribe ventas_diarias calculado sobre los archivos de `estado`, para
+    # que los reportes no lo recalculen en cada consulta
+    import duckdb
+
+    relativa = os.path.join("ventas_diarias", f"{uuid.uuid4().hex}.parquet")
+    ruta = os.path.join(DIRECTORIO, relativa)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    conexion = duckdb.connect()
+    try:
+        _crear_vistas(conexion, dict(estado, ventas_diarias=None))
+        conexion.execute(
+            "COPY (SELECT * FROM ventas_diarias ORDER BY fecha, curso_id) "
+            f"TO {_literal(ruta)} (FORMAT parquet)"
+        )
+    finally:
+        conexion.close()
+    return relativa
+
+
+def _query_huellas(tabla, marca):
+    # Por mes: filas, suma de ids y suma del valor de control de las filas con
+    # id hasta la marca. Se corre igual en la base y en el snapshot.
+    modelo, fecha, control = TABLAS[tabla]
+    mes = numero_mes(fecha).label("mes")
+    return (
+        _query(
+            tabla,
+            [
+                mes,
+                func.count().label("filas"),
+                func.sum(modelo.id).label("ids"),
+                func.sum(control).label("control"),
+            ],
+        )
+        .where(modelo.id <= marca)
+        .group_by(mes)
+    )
+
+
+def _meses_distintos(db, tabla, marca):
+    query = _query_huellas(tabla, marca)
+    base = leer_dataframe(db, query)
+    snapshot = consultar(query)
+    comparado = base.merge(snapshot, on="mes", how="outer", suffixes=("", "_s"))
+    comparado = comparado.fillna(0)
+    distinto = (
+        (comparado["filas"] != comparado["filas_s"])
+        | (comparado["ids"] != comparado["ids_s"])
+        | ((comparado["control"] - comparado["control_s"]).abs() > 0.005)
+    )
+    return [_nombre_mes(int(numero)) for numero in comparado.loc[distinto, "mes"]]
+
+
+def _tablas_a_verificar(estado, ahora, todas):
+    tablas = []
+    for tabla, (_, fecha, _) in TABLAS.items():
+        if fecha is None:
+            continue
+        verificado = estado["tablas"][tabla]["verificado"]
+        modificada = cache.modificaciones(tabla) != _modificaciones_vistas.get(tabla, 0)
+        if todas or modificada or ahora - verificado > VERIFICACION_S:
+            tablas.append(tabla)
+    return tablas
+
+
+def _archivos(estado, tabla):
+    return [
+        a for archivos in estado["tablas"][tabla]["meses"].values() for a in archivos
+    ]
+
+
+def actualizar(verificar=False, reconstruir=False, progreso=None, db=None):
+    # Agrega al snapshot las filas nuevas de cada tabla y reescribe los meses
+    # que cambiaron (todos si verificar=True); reconstruir=True exporta todo de
+    # nuevo. progreso(hechas, total, mensaje) como en trabajos.avance.
+    with _bloqueo() as propio:
+        if not propio:
+            return {"error": "Hay otra actualización del snapshot en curso"}
+        estado = leer_estado()
+        primera = reconstruir or not existe()
+        reemplazados = []
+        if reconstruir:
+            reemplazados = [a for tabla in TABLAS for a in _archivos(estado, tabla)]
+            for datos in estado["tablas"].values():
+                datos.update(marca=0, meses={})
+        ahora = time.time()
+        modificaciones = {tabla: cache.modificaciones(tabla) for tabla in TABLAS}
+        nuevos = []
+        resumen = {"filas_nuevas": 0, "meses_reescritos": 0, "meses_compactados": 0}
+        try:
+            with obtener_sesion(db) as db:
+                for tabla, (_, fecha, _) in TABLAS.items():
+                    datos = estado["tablas"][tabla]
+                    if fecha is None:
+                        # Tabla chica: se reescribe entera, con sus ediciones
+                        archivos, datos["marca"], _ = _exportar(db, tabla)
+                        reemplazados += _archivos(estado, tabla)
+                        datos["meses"] = {m: [a] for m, a in archivos.items()}
+                        nuevos += archivos.values()
+                        continue
+                    archivos, datos["marca"], filas = _exportar(
+                        db, tabla, datos["marca"], progreso=progreso
+                    )
+                    for mes, archivo in archivos.items():
+                        datos["meses"].setdefault(mes, []).append(archivo)
+                    nuevos += archivos.values()
+                    resumen["filas_nuevas"] += filas
+                    if primera:
+                        datos["verificado"] = ahora
+                if not primera:
+                    # La comparación consulta el snapshot con las filas nuevas
+                    _guardar_estado(estado)
+                    nuevos = []
+                    for tabla in _tablas_a_verificar(estado, ahora, verificar):
+                        datos = estado["tablas"][tabla]
+                        for mes in _meses_distintos(db, tabla, datos["marca"]):
+                            archivos, _, _ = _exportar(
+                                db, tabla, hasta_id=datos["marca"], mes=mes
+                            )
+                            reemplazados += datos["meses"].pop(mes, [])
+                            if mes in archivos:
+                                datos["meses"][mes] = [archivos[mes]]
+                                nuevos.append(archivos[mes])
+                            resumen["meses_reescritos"] += 1
+                        datos["verificado"] = ahora
+            for tabla, datos in estado["tablas"].items():
+                for mes, archivos in datos["meses"].items():
+                    if len(archivos) > MAX_ARCHIVOS_POR_MES:
+                        datos["meses"][mes] = [_compactar(tabla, archivos)]
+                        nuevos.append(datos["meses"][mes][0])
+                        reemplazados += archivos
+                        resumen["meses_compactados"] += 1
+            if primera or resumen["filas_nuevas"] or resumen["meses_reescritos"]:
+                if estado["ventas_diarias"]:
+                    reemplazados.append(estado["ventas_diarias"])
+                estado["ventas_diarias"] = _materializar_resumen(estado)
+                nuevos.append(estado["ventas_diarias"])
+        except Exception as e:
+            # Los archivos que no llegaron a estado.json no los lee nadie
+            for archivo in nuevos:
+                _borrar(archivo)
+            return {"error": str(e)}
+        estado["actualizado"] = ahora
+        estado["borrar"] += [[archivo, ahora] for archivo in reemplazados]
+        estado["borrar"] = [
+            [archivo, reemplazado]
+            for archivo, reemplazado in estado["borrar"]
+            if ahora - reemplazado < GRACIA_S or not _borrar(archivo)
+        ]
+        _guardar_estado(estado)
+        _modificaciones_vistas.update(modificaciones)
+        return resumen
+
+
+def _borrar(archivo):
+    try:
+        os.remove(os.path.join(DIRECTORIO, archivo))
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def _actualizar_en_segundo_plano():
+    # La consulta usa el snapshot vigente y la actualización va como trabajo
+    import trabajos
+
+    if any(t.activo for t in trabajos.listar("snapshot_analitico")):
+        return
+    trabajos.enviar(
+        "snapshot_analitico",
+        "Actualizar el snapshot analítico",
+        lambda trabajo: actualizar(progreso=trabajo.avance),
+    )
+
+
+# --- Consultas ---
+def _crear_vistas(conexion, estado):
+    for tabla, (modelo, _, _) in TABLAS.items():
+        archivos = [os.path.join(DIRECTORIO, a) for a in _archivos(estado, tabla)]
+        if archivos:
+            origen = f"read_parquet([{', '.join(map(_literal, archivos))}])"
+        else:
+            # Tabla vacía con las columnas del modelo. Lo registrado con
+            # register() no lo ven los cursores, una tabla sí.
+            origen = f"_{tabla}_vacia"
+            conexion.register("_vacia", esquema_arrow(_columnas(modelo)).empty_table())
+            conexion.execute(f"CREATE OR REPLACE TABLE {origen} AS FROM _vacia")
+            conexion.unregister("_vacia")
+        conexion.execute(f"CREATE OR REPLACE VIEW {tabla} AS SELECT * FROM {origen}")
+    if estado["ventas_diarias"]:
+        ruta = os.path.join(DIRECTORIO, estado["ventas_diarias"])
+        conexion.execute(
+            "CREATE OR REPLACE VIEW ventas_diarias AS "
+            f"SELECT * FROM read_parquet({_literal(ruta)})"
+        )
+    else:
+        conexion.execute(_VISTA_VENTAS_DIARIAS)
+
+
+def _conexion():
+    # Cursor de DuckDB (uno por llamada: no se comparten entre hilos) con las
+    # vistas de la generación vigente del snapshot
+    global _duckdb, _generacion
+    estado = leer_estado()
+    with _lock:
+        if _duckdb is None:
+            import duckdb
+
+            _duckdb = duckdb.connect()
+        if estado["generacion"] != _generacion:
+            _crear_vistas(_duckdb, estado)
+            _generacion = estado["generacion"]
+        return _duckdb.cursor()
+
+
+def consultar(query):
+    # DataFrame de un select() de SQLAlchemy ejecutado en DuckDB
+    compilado = query.compile(dialect=_DIALECTO)
+    parametros = [compilado.params[nombre] for nombre in compilado.positiontup]
+    cursor = _conexion()
+    try:
+        cursor.execute(str(compilado), parametros)
+        tipos = [str(columna[1]) for columna in cursor.description]
+        df = cursor.df()
+    finally:
+        cursor.close()
+    # SUM de enteros es HUGEINT en DuckDB y llega como float
+    for nombre, tipo in zip(df.columns, tipos):
+        if tipo == "HUGEINT" and not df[nombre].isna().any():
+            df[nombre] = df[nombre].astype("int64")
+    return df
+
+
+def usa_snapshot(backend):
+    # Si los reportes van al snapshot: se pidió y ya existe. Mientras no se
+    # cree se consulta la base.
+    return backend == "snapshot" and existe()
+
+
+def leer(query, backend, db=None):
+    # Resultado de un select() desde la base o desde el snapshot. Si el
+    # snapshot está vencido responde con él y pide actualizarlo.
+    if not usa_snapshot(backend):
+        with obtener_sesion(db) as db:
+            return leer_dataframe(db, query)
+    df = consultar(query)
+    marca = leer_estado()["actualizado"]
+    if marca and time.time() - marca > VIGENCIA_S:
+        _actualizar_en_segundo_plano()
+    return df
+
+
+def error_backend(backend):
+    if backend not in BACKENDS:
+        return {"error": f"Backend no soportado: {backend}"}
+    return None
+
+
+def describir():
+    # Marca de agua, meses, archivos y bytes de cada tabla
+    estado = leer_estado()
+    filas = []
+    for tabla, datos in estado["tablas"].items():
+        archivos = [a for v in datos["meses"].values() for a in v]
+        filas.append(
+            {
+                "tabla": tabla,
+                "marca": datos["marca"],
+                "meses": len([m for m in datos["meses"] if m]),
+                "archivos": len(archivos),
+                "bytes": sum(
+                    os.path.getsize(os.path.join(DIRECTORIO, a)) for a in archivos
+                ),
+            }
+        )
+    return pd.DataFrame(filas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot analítico en Parquet")
+    parser.add_argument("comando", choices=["actualizar", "estado"])
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument(
+        "--verificar",
+        action="store_true",
+        help="Comparar todos los meses con la base y reescribir los que cambiaron",
+    )
+    grupo.add_argument(
+        "--reconstruir", action="store_true", help="Exportar todo de nuevo"
+    )
+    args = parser.parse_args()
+    if args.comando == "estado":
+        print(f"{DIRECTORIO} (actualizado: {actualizado() or 'nunca'})")
+        print(describir().to_string(index=False))
+    else:
+        inicio = time.perf_counter()
+        resultado = actualizar(verificar=args.verificar, reconstruir=args.reconstruir)
+        if "error" in resultado:
+            raise SystemExit(resultado["error"])
+        print(
+            f"Snapshot actualizado en {time.perf_counter() - inicio:.1f} s: {resultado}"
+        )
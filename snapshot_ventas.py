@@ -0,0 +1,192 @@
+# snapshot_ventas.py
+# DataFrames de ventas y devoluciones en memoria, compartidos por todas las
+# sesiones del proceso y puestos al día de forma incremental: como las tablas
+# casi solo reciben altas, cada pedido lee únicamente las filas con id mayor
+# a la marca de agua menos VENTANA_IDS y agrega al final las que no tenía, así
+# que el costo depende de las filas nuevas y no del historial. La ventana
+# cubre los ids que se confirman fuera de orden (en PostgreSQL una
+# transacción puede confirmar un id menor después de que se leyó uno mayor);
+# esas filas quedan al final, fuera del orden por id. Las columnas se guardan
+# en arrays con capacidad de sobra (el DataFrame es una vista sin copia de sus
+# primeras filas) y con los ids en int32 mientras entren. Los montos quedan en
+# float64: en float32 cada valor conserva sus centavos, pero las sumas no.
+#
+# Una recarga completa cubre ediciones y borrados: cuando la tabla cambia por
+# algo que no son altas (ver cache.invalida) o cada RESYNC_S segundos, por
+# los cambios hechos fuera de este proceso.
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+import cache
+from consultas import leer_dataframe
+from db import obtener_sesion
+from models import Devolucion, Venta
+
+# Segundos entre consultas de altas hechas fuera de este proceso
+REVISION_S = float(os.environ.get("SNAPSHOT_REVISION_S", 60))
+# Segundos entre recargas completas
+RESYNC_S = float(os.environ.get("SNAPSHOT_RESYNC_S", 3600))
+# Ids por debajo de la marca de agua que se vuelven a leer en cada consulta
+VENTANA_IDS = int(os.environ.get("SNAPSHOT_VENTANA_IDS", 1000))
+_CAPACIDAD_MINIMA = 1024
+
+
+def _tipo_compacto(valores, tipo):
+    # dtype más chico que representa `valores` sin pérdida, para una columna
+    # declarada como "entero", "monto" o "fecha"
+    if tipo == "fecha":
+        return np.dtype("datetime64[ns]")
+    if tipo == "monto":
+        return np.dtype("float64")
+    if not len(valores):
+        return np.dtype("int32")
+    limites = np.iinfo(np.int32)
+    if limites.min <= valores.min() and valores.max() <= limites.max:
+        return np.dtype("int32")
+    return np.dtype("int64")
+
+
+class Snapshot:
+    def __init__(self, modelo, columnas):
+        # columnas: {nombre: "entero" | "monto" | "fecha"}, con "id" primero
+        self.modelo = modelo
+        self.tabla = modelo.__tablename__
+        self.columnas = columnas
+        self._lock = threading.Lock()
+        self._vigencia = None
+        self._vaciar()
+        self.estadisticas = {"recargas": 0, "incrementales": 0, "filas_leidas": 0}
+
+    def _vaciar(self):
+        self.filas = 0
+        self.marca = 0
+        # Ids del snapshot dentro de la ventana, para no repetir filas
+        self._recientes = np.empty(0, dtype=np.int64)
+        self._buffers = {
+            nombre: np.empty(0, dtype=_tipo_compacto([], tipo))
+            for nombre, tipo in self.columnas.items()
+        }
+        self._df = self._vista()
+        self._revisado = self._recargado = time.monotonic()
+
+    def _vista(self):
+        return pd.DataFrame(
+            {nombre: buffer[: self.filas] for nombre, buffer in self._buffers.items()},
+            copy=False,
+        )
+
+    def _agregar(self, df):
+        nuevas = len(df.index)
+        if not nuevas:
+            return
+        total = self.filas + nuevas
+        capacidad = len(self._buffers["id"])
+        if total > capacidad:
+            capacidad = max(total, 2 * capacidad, _CAPACIDAD_MINIMA)
+        for nombre, tipo in self.columnas.items():
+            valores = df[nombre].to_numpy()
+            buffer = self._buffers[nombre]
+            actual = buffer[: self.filas]
+            dtype = np.promote_types(buffer.dtype, _tipo_compacto(valores, tipo))
+            if capacidad != len(buffer) or dtype != buffer.dtype:
+                # Buffer nuevo: las vistas ya entregadas siguen apuntando al viejo
+                buffer = np.empty(capacidad, dtype=dtype)
+                buffer[: self.filas] = actual
+                self._buffers[nombre] = buffer
+            buffer[self.filas : total] = valores
+        self.filas = total
+        ids = df["id"].to_numpy(dtype=np.int64)
+        self.marca = max(self.marca, int(ids.max()))
+        recientes = np.concatenate([self._recientes, ids])
+        self._recientes = recientes[recientes > self.marca - VENTANA_IDS]
+        self._df = self._vista()
+
+    def _leer(self, db, desde_id=0):
+        query = select(*(getattr(self.modelo, c) for c in self.columnas))
+        df = leer_dataframe(
+            db, query.where(self.modelo.id > desde_id).order_by(self.modelo.id)
+        )
+        self.estadisticas["filas_leidas"] += len(df.index)
+        return df
+
+    def dataframe(self, db=None):
+        # Vista del snapshot al día. Con copy-on-write (pandas 3, ver
+        # requirements.txt), modificarla no altera el snapshot.
+        with obtener_sesion(db) as db:
+            vigencia = (
+                id(db.get_bind()),
+                cache.version(self.tabla),
+                cache.modificaciones(self.tabla),
+            )
+            ahora = time.monotonic()
+            if (
+                vigencia == self._vigencia
+                and ahora - self._revisado < REVISION_S
+                and ahora - self._recargado <= RESYNC_S
+            ):
+                return self._df.copy(deep=False)
+            with self._lock:
+                if (
+                    self._vigencia is None
+                    or vigencia[0::2] != self._vigencia[0::2]
+                    or ahora - self._recargado > RESYNC_S
+                ):
+                    self._vaciar()
+                    self._agregar(self._leer(db))
+                    self.estadisticas["recargas"] += 1
+                elif vigencia != self._vigencia or ahora - self._revisado >= REVISION_S:
+                    nuevas = self._leer(db, max(self.marca - VENTANA_IDS, 0))
+                    self._agregar(nuevas[~nuevas["id"].isin(self._recientes)])
+                    self.estadisticas["incrementales"] += 1
+                self._vigencia = vigencia
+                self._revisado = ahora
+                return self._df.copy(deep=False)
+
+    def memoria(self):
+        return sum(b[: self.filas].nbytes for b in self._buffers.values())
+
+
+_ventas = Snapshot(
+    Venta,
+    {
+        "id": "entero",
+        "cliente_id": "entero",
+        "curso_id": "entero",
+        "monto": "monto",
+        "fecha_venta": "fecha",
+    },
+)
+_devoluciones = Snapshot(
+    Devolucion,
+    {
+        "id": "entero",
+        "venta_id": "entero",
+        "monto_reembolso": "monto",
+        "fecha_devolucion": "fecha",
+    },
+)
+
+
+def ventas(db=None):
+    return _ventas.dataframe(db=db)
+
+
+def devoluciones(db=None):
+    return _devoluciones.dataframe(db=db)
+
+
+def estadisticas():
+    return {
+        snapshot.tabla: {
+            "filas": snapshot.filas,
+            "marca": snapshot.marca,
+            "bytes": snapshot.memoria(),
+            **snapshot.estadisticas,
+        }
+        for snapshot in (_ventas, _devoluciones)
+    }
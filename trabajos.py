@@ -0,0 +1,252 @@
+# trabajos.py
+# Trabajos en segundo plano para las importaciones y exportaciones largas. Un
+# pool de hilos acotado, compartido por todas las sesiones de Streamlit del
+# proceso, ejecuta cada trabajo fuera del hilo del script; el registro guarda
+# su estado (en cola, en curso, terminado, fallido o cancelado) y el avance
+# que informa el servicio por lotes, así que la página solo consulta el
+# estado y el trabajo sigue aunque el navegador se reconecte. Los archivos
+# que dejan (exportaciones, informes de importación) quedan en disco hasta
+# que vencen. Cada trabajo guarda la sesión que lo creó: listar, obtener y
+# cancelar solo ven los de la sesión que se les pasa (None para los internos
+# de la app), así que un usuario no ve ni descarga los archivos de otro.
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import exportacion
+import services
+
+MAX_TRABAJOS = int(os.environ.get("TRABAJOS_MAX", 2))
+# Segundos que se conservan un trabajo terminado y su archivo
+VIGENCIA_S = float(os.environ.get("TRABAJOS_VIGENCIA_S", 3600))
+DIRECTORIO = os.environ.get(
+    "TRABAJOS_DIRECTORIO", os.path.join(tempfile.gettempdir(), "cursos_trabajos")
+)
+ESTADOS = ("en_cola", "en_curso", "terminado", "fallido", "cancelado")
+
+_trabajos = {}
+_lock = threading.Lock()
+_pool = None
+
+
+class Cancelado(Exception):
+    pass
+
+
+class Trabajo:
+    def __init__(self, tipo, descripcion, sesion=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.tipo = tipo
+        self.sesion = sesion
+        self.descripcion = descripcion
+        self.estado = "en_cola"
+        self.progreso = 0.0
+        self.mensaje = "En cola"
+        self.resultado = None
+        self.error = None
+        self.artefacto = None
+        self.creado = time.time()
+        self.terminado = None
+        self._cancelar = threading.Event()
+        self._futuro = None
+
+    @property
+    def activo(self):
+        return self.estado in ("en_cola", "en_curso")
+
+    def avance(self, hechas, total=None, mensaje=None):
+        # Callback de progreso para los servicios: se llama por lote y corta
+        # el trabajo si se pidió cancelarlo
+        if self._cancelar.is_set():
+            raise Cancelado()
+        if total:
+            self.progreso = min(hechas / total, 1.0)
+        self.mensaje = mensaje or (
+            f"{hechas} de {total} filas" if total else f"{hechas} filas"
+        )
+
+    def ruta(self, nombre):
+        # Ruta de un archivo del trabajo dentro de DIRECTORIO
+        os.makedirs(DIRECTORIO, exist_ok=True)
+        self.artefacto = os.path.join(DIRECTORIO, f"{self.id}_{nombre}")
+        return self.artefacto
+
+    def _ejecutar(self, fn):
+        if self._cancelar.is_set():
+            self.estado, self.mensaje = "cancelado", "Cancelado"
+            self.terminado = time.time()
+            return
+        self.estado, self.mensaje = "en_curso", "Iniciando"
+        try:
+            resultado = fn(self)
+        except Cancelado:
+            resultado = None
+        except Exception as e:
+            resultado = {"error": str(e)}
+        # Un servicio puede atrapar la cancelación y devolver un error
+        if self._cancelar.is_set():
+            self.estado, self.mensaje = "cancelado", "Cancelado"
+            self._borrar_artefacto()
+        elif isinstance(resultado, dict) and "error" in resultado:
+            self.estado, self.error, self.mensaje = "fallido", resultado["error"], ""
+        else:
+            self.estado, self.resultado = "terminado", resultado
+            self.progreso, self.mensaje = 1.0, "Terminado"
+        self.terminado = time.time()
+
+    def _borrar_artefacto(self):
+        if self.artefacto:
+            _borrar(self.artefacto)
+
+
+def _borrar(ruta):
+    # Otra sesión puede estar limpiando el mismo archivo
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def _obtener_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=MAX_TRABAJOS, thread_name_prefix="trabajo"
+            )
+        return _pool
+
+
+def enviar(tipo, descripcion, fn, sesion=None):
+    # Encola fn(trabajo) y devuelve el Trabajo. fn informa el avance con
+    # trabajo.avance, guarda sus archivos en trabajo.ruta(nombre) y devuelve
+    # el resultado o {"error": ...}.
+    limpiar()
+    trabajo = Trabajo(tipo, descripcion, sesion)
+    with _lock:
+        _trabajos[trabajo.id] = trabajo
+    trabajo._futuro = _obtener_pool().submit(trabajo._ejecutar, fn)
+    return trabajo
+
+
+def obtener(trabajo_id, sesion=None):
+    trabajo = _trabajos.get(trabajo_id)
+    if trabajo is None or trabajo.sesion != sesion:
+        return None
+    return trabajo
+
+
+def listar(tipo=None, sesion=None):
+    # Trabajos vigentes de la sesión, del más nuevo al más viejo
+    limpiar()
+    with _lock:
+        trabajos = [t for t in _trabajos.values() if t.sesion == sesion]
+    if tipo:
+        trabajos = [t for t in trabajos if t.tipo == tipo]
+    return sorted(trabajos, key=lambda t: t.creado, reverse=True)
+
+
+def cancelar(trabajo_id, sesion=None):
+    trabajo = obtener(trabajo_id, sesion)
+    if trabajo is None or not trabajo.activo:
+        return {"error": "El trabajo no está en curso"}
+    trabajo._cancelar.set()
+    # Si todavía no empezó, sale de la cola sin ejecutarse
+    if trabajo._futuro is not None and trabajo._futuro.cancel():
+        trabajo.estado, trabajo.mensaje = "cancelado", "Cancelado"
+        trabajo.terminado = time.time()
+    return {"message": "Cancelación solicitada"}
+
+
+def limpiar(ahora=None):
+    # Quita los trabajos vencidos con sus archivos, y los archivos viejos que
+    # hayan quedado de otro proceso
+    ahora = ahora or time.time()
+    with _lock:
+        vencidos = [
+            t
+            for t in _trabajos.values()
+            if t.terminado is not None and ahora - t.terminado > VIGENCIA_S
+        ]
+        for trabajo in vencidos:
+            del _trabajos[trabajo.id]
+        vigentes = {t.artefacto for t in _trabajos.values()}
+    for trabajo in vencidos:
+        trabajo._borrar_artefacto()
+    if not os.path.isdir(DIRECTORIO):
+        return len(vencidos)
+    for nombre in os.listdir(DIRECTORIO):
+        ruta = os.path.join(DIRECTORIO, nombre)
+        if ruta in vigentes:
+            continue
+        try:
+            vencido = ahora - os.path.getmtime(ruta) > VIGENCIA_S
+        except OSError:
+            continue
+        if vencido:
+            _borrar(ruta)
+    return len(vencidos)
+
+
+# --- Tareas de la app ---
+def _copiar_archivo(archivo):
+    # El archivo subido pertenece a la sesión: el trabajo usa una copia
+    copia = io.BytesIO(archivo.getvalue())
+    copia.name = getattr(archivo, "name", "")
+    return copia
+
+
+def importar_clientes(archivo, sesion=None):
+    copia = _copiar_archivo(archivo)
+
+    def tarea(trabajo):
+        resultado = services.importar_clientes_desde_excel(
+            copia, progreso=trabajo.avance
+        )
+        if "error" in resultado:
+            return resultado
+        # Informe con los errores por fila, para descargar
+        with open(trabajo.ruta("informe.csv"), "w", newline="", encoding="utf-8") as f:
+            escritor = csv.writer(f)
+            escritor.writerow(["error"])
+            escritor.writerows([error] for error in resultado["errores"])
+        return resultado
+
+    return enviar("importar_clientes", f"Importar {copia.name}", tarea, sesion)
+
+
+def importar_ventas(archivo, sesion=None):
+    copia = _copiar_archivo(archivo)
+
+    def tarea(trabajo):
+        resultado = services.importar_ventas_desde_archivo(
+            copia, progreso=trabajo.avance
+        )
+        if "error" in resultado:
+            return resultado
+        # El detalle por fila va al informe en disco y no queda en memoria
+        detalle = resultado.pop("resultados")
+        detalle.to_csv(trabajo.ruta("informe.csv"), index=False)
+        return resultado
+
+    return enviar("importar_ventas", f"Importar {copia.name}", tarea, sesion)
+
+
+def exportar(entidad, formato, sesion=None, **filtros):
+    def tarea(trabajo):
+        ruta = trabajo.ruta(entidad + exportacion.EXTENSIONES.get(formato, ""))
+        resultado = exportacion.exportar_a_archivo(
+            entidad, formato, ruta=ruta, progreso=trabajo.avance, **filtros
+        )
+        if isinstance(resultado, dict):
+            return resultado
+        return {"ruta": resultado, "bytes": os.path.getsize(resultado)}
+
+    return enviar(
+        f"exportar_{entidad}", f"Exportar {entidad} ({formato})", tarea, sesion
+    )